@@ -50,11 +50,16 @@ import {
 // Constants
 // ============================================
 
-const CONOCER_BASE_URL = "https://conocer.gob.mx";
-const _RENEC_URL = `${CONOCER_BASE_URL}/acciones_movil/renec_v2/index.html#/renec`;
-const EC_DETAIL_URL = (codigo: string) =>
-  `${CONOCER_BASE_URL}/acciones_movil/renec_v2/index.html#/competencia/${codigo}`;
-const API_URL = `${CONOCER_BASE_URL}/CONOCERBACKCITAS/sectoresProductivos/getEstandaresAll`;
+// CONOCER_API_BASE / CONOCER_SPA_URL point the extractor elsewhere, e.g. at
+// src/scripts/mock_conocer.py (same variables as the Python scripts)
+const API_BASE =
+  process.env.CONOCER_API_BASE ?? "https://conocer.gob.mx/CONOCERBACKCITAS";
+const SPA_URL =
+  process.env.CONOCER_SPA_URL ??
+  "https://conocer.gob.mx/acciones_movil/renec_v2/index.html";
+const _RENEC_URL = `${SPA_URL}#/renec`;
+const EC_DETAIL_URL = (codigo: string) => `${SPA_URL}#/competencia/${codigo}`;
+const API_URL = `${API_BASE}/sectoresProductivos/getEstandaresAll`;
 
 // Accordion panel selectors for EC detail pages
 const _PANEL_SELECTORS = {
@@ -11,7 +11,9 @@ import * as fs from 'fs';
 import * as path from 'path';
 
 const OUTPUT_DIR = path.join(__dirname, '../../data/extracted');
-const API_BASE = 'https://conocer.gob.mx/CONOCERBACKCITAS';
+// Overridable, e.g. to point at mock_conocer.py
+const API_BASE = process.env.CONOCER_API_BASE ?? 'https://conocer.gob.mx/CONOCERBACKCITAS';
+const SPA_URL = process.env.CONOCER_SPA_URL ?? 'https://conocer.gob.mx/conocer/';
 
 // Discovered API endpoints
 const API_ENDPOINTS = {
@@ -70,7 +72,7 @@ async function init() {
   page = await browser.newPage();
 
   // Navigate to site first to establish session
-  await page.goto('https://conocer.gob.mx/conocer/#/renec', { waitUntil: 'networkidle' });
+  await page.goto(`${SPA_URL}#/renec`, { waitUntil: 'networkidle' });
   await page.waitForTimeout(2000);
 }
 
@@ -140,7 +142,7 @@ async function extractSectors() {
     console.log('⚠️ Sectors API not available, extracting from page...');
 
     // Fall back to page scraping
-    await page.goto('https://conocer.gob.mx/conocer/#/sectoresProductivos', { waitUntil: 'networkidle' });
+    await page.goto(`${SPA_URL}#/sectoresProductivos`, { waitUntil: 'networkidle' });
     await page.waitForTimeout(3000);
 
     const paragraphs = await page.$$eval('main p', (els) =>
@@ -204,7 +206,7 @@ async function extractECDetails(maxItems?: number) {
 
     try {
       // Navigate to RENEC and search for EC
-      await page.goto('https://conocer.gob.mx/conocer/#/renec', { waitUntil: 'networkidle' });
+      await page.goto(`${SPA_URL}#/renec`, { waitUntil: 'networkidle' });
       await page.waitForSelector('[role="gridcell"]', { timeout: 10000 });
 
       // Search for EC
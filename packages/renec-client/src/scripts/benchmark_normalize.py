@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: entity name normalization during a registry build.
+
+Replays the normalize/entity-type calls build_master_registries.py makes
+over ec_certifiers_all.json (registry pass, matrix pass, entity types per
+name variant), once with the original per-call regex code and once with
+the precompiled, memoized entity_names functions.
+
+Usage:
+  python benchmark_normalize.py [--repeat 5]
+"""
+
+import argparse
+import json
+import re
+import time
+from pathlib import Path
+
+import entity_names
+
+OUTPUT_DIR = Path(__file__).parent.parent.parent / "data" / "extracted"
+INPUT_FILE = OUTPUT_DIR / "ec_certifiers_all.json"
+
+
+def legacy_normalize_name(name: str) -> str:
+    """normalize_name as it was before entity_names (inline patterns)."""
+    if not name:
+        return ""
+    n = name.lower().strip()
+    n = re.sub(
+        r"\s*(s\.?a\.?\s*de\s*c\.?v\.?|s\.?c\.?|a\.?c\.?)\s*$", "", n, flags=re.I
+    )
+    n = re.sub(r"\s+", " ", n)
+    n = re.sub(r"[.,;:]+", "", n)
+    return n.strip()
+
+
+def legacy_entity_type(name: str) -> str:
+    if re.search(r"s\.?a\.?\s*de\s*c\.?v\.?", name, re.I):
+        return "SA de CV"
+    elif re.search(r"s\.?c\.?", name, re.I):
+        return "SC"
+    elif re.search(r"a\.?c\.?", name, re.I):
+        return "AC"
+    return "Unknown"
+
+
+def build_pass(ec_data: dict, normalize, detect_type) -> int:
+    """The normalization work of one full registry build; returns call count."""
+    calls = 0
+    for data in ec_data.values():
+        certifiers = data.get("certifiers", [])
+        # ECE registry
+        for name in certifiers:
+            normalize(name)
+            detect_type(name)
+        # Matrix
+        for name in certifiers:
+            normalize(name)
+        # CCAP registry
+        for course in data.get("courses", []):
+            normalize(course)
+        calls += 3 * len(certifiers) + len(data.get("courses", []))
+    return calls
+
+
+def timed(ec_data: dict, normalize, detect_type, repeat: int) -> tuple[float, int]:
+    best = None
+    for _ in range(repeat):
+        entity_names.clear_caches()
+        start = time.perf_counter()
+        calls = build_pass(ec_data, normalize, detect_type)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, calls
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Name normalization benchmark")
+    parser.add_argument("--repeat", type=int, default=5, help="runs per variant")
+    args = parser.parse_args()
+
+    with open(INPUT_FILE, "r", encoding="utf-8") as f:
+        ec_data = json.load(f).get("ec_details", {})
+
+    names = {n for d in ec_data.values() for n in d.get("certifiers", [])}
+    mismatches = [
+        n
+        for n in names
+        if legacy_normalize_name(n) != entity_names.normalize_name(n)
+        or legacy_entity_type(n) != entity_names.entity_type(n)
+    ]
+    if mismatches:
+        print(f"ERROR: {len(mismatches)} names normalize differently, e.g. {mismatches[0]!r}")
+        return
+
+    legacy, calls = timed(ec_data, legacy_normalize_name, legacy_entity_type, args.repeat)
+    cached, _ = timed(
+        ec_data, entity_names.normalize_name, entity_names.entity_type, args.repeat
+    )
+    info = entity_names.cache_info()["normalize_name"]
+
+    print(f"ECs: {len(ec_data)} | unique certifier names: {len(names)} | calls/build: {calls}")
+    print(f"  legacy (inline re.sub):     {legacy * 1000:8.2f} ms")
+    print(f"  precompiled + LRU cache:    {cached * 1000:8.2f} ms")
+    print(f"  speedup:                    {legacy / cached:8.1f}x")
+    print(f"  normalize_name cache: {info['hits']} hits, {info['misses']} misses")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: control-character sanitization of committee responses.
+
+Rebuilds the raw comites/{id} response bodies from committees_complete.json
+(the checked-in committee payloads), dirties a fraction of them with stray
+control bytes like the backend sometimes sends, and parses every body once
+with the original decode + regex + json.loads path and once with
+json_sanitize.parse_json. Both must produce identical records.
+
+Usage:
+  python benchmark_sanitize.py [--repeat 5] [--dirty 0.05]
+"""
+
+import argparse
+import json
+import random
+import re
+import time
+from pathlib import Path
+
+from json_sanitize import parse_json
+
+OUTPUT_DIR = Path(__file__).parent.parent.parent / "data" / "extracted"
+INPUT_FILE = OUTPUT_DIR / "committees_complete.json"
+
+
+def legacy_parse(body: bytes):
+    """fetch_committee's parse before json_sanitize (str regex, strict)."""
+    text = body.decode("utf-8", errors="replace")
+    return json.loads(re.sub(r"[\x00-\x08\x0b\x0c\x0e-\x1f]", "", text))
+
+
+def response_bodies(dirty: float, seed: int = 0) -> list[bytes]:
+    """comites/{id} bodies; `dirty` of them get control bytes inside strings."""
+    with open(INPUT_FILE, "r", encoding="utf-8") as f:
+        committees = json.load(f)
+    rng = random.Random(seed)
+    bodies = []
+    for committee in committees:
+        results = {k: v for k, v in committee.items() if k != "id"}
+        body = json.dumps(
+            {"responseStatus": 200, "results": results}, ensure_ascii=False
+        ).encode("utf-8")
+        if rng.random() < dirty:
+            # Right after an opening quote is always inside a string
+            quotes = [m.end() for m in re.finditer(rb'": "', body)]
+            for pos in sorted(rng.sample(quotes, min(3, len(quotes))), reverse=True):
+                body = body[:pos] + bytes([rng.choice((0x01, 0x0B, 0x1F))]) + body[pos:]
+        bodies.append(body)
+    return bodies
+
+
+def timed(bodies: list[bytes], parse, repeat: int) -> float:
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for body in bodies:
+            parse(body)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="JSON sanitizer benchmark")
+    parser.add_argument("--repeat", type=int, default=5, help="runs per variant")
+    parser.add_argument(
+        "--dirty", type=float, default=0.05, help="fraction of bodies with controls"
+    )
+    args = parser.parse_args()
+
+    bodies = response_bodies(args.dirty)
+    dirty = sum(1 for b in bodies if re.search(rb"[\x00-\x08\x0b\x0c\x0e-\x1f]", b))
+    mismatches = [b for b in bodies if legacy_parse(b) != parse_json(b)]
+    if mismatches:
+        print(f"ERROR: {len(mismatches)} bodies parse differently")
+        return
+
+    legacy = timed(bodies, legacy_parse, args.repeat)
+    fast = timed(bodies, parse_json, args.repeat)
+    size = sum(len(b) for b in bodies)
+    raw = timed(bodies, json.loads, args.repeat) if not dirty else None
+
+    print(f"Bodies: {len(bodies)} ({size / 1e6:.1f} MB) | with control bytes: {dirty}")
+    print(f"  legacy (decode + re.sub):   {legacy * 1000:8.2f} ms")
+    print(f"  json_sanitize.parse_json:   {fast * 1000:8.2f} ms")
+    print(f"  speedup:                    {legacy / fast:8.1f}x")
+    if raw is not None:
+        print(f"  bare json.loads (floor):    {raw * 1000:8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -7,266 +7,451 @@ Builds deduplicated master registries for:
 - CCAPs (Centros de Capacitación) - Training Centers (from courses)
 - EC-ECE relationships (which certifiers can certify which standards)
 
-Input: ec_certifiers_all.json (from batch extraction)
+Input: ec_certifiers_all.json (from batch extraction), plus
+       ec_standards_api.json for per-sector/committee stats
 Output:
   - master_ece_registry.json (unique certifiers with EC relationships)
   - master_ccap_registry.json (unique training centers with course relationships)
   - ec_ece_matrix.json (EC to ECE mapping for quick lookups)
+  - ec_ece_matrix.csr (the same mapping as memory-mappable CSR arrays)
+  - registry_state.json (aggregates + per-EC content hashes for --incremental)
+  - registry_ids.json (stable normalized name -> ECE/CCAP ID mapping)
+  - registry_changes.json (ECE/CCAP IDs added/changed/removed by this build)
+
+Usage:
+  python build_master_registries.py                # Full rebuild
+  python build_master_registries.py --incremental  # Apply only changed ECs
+  python build_master_registries.py --exact        # No fuzzy certifier merging
 """
 
+import argparse
+import hashlib
 import json
-import re
-from collections import defaultdict
 from datetime import datetime
 from pathlib import Path
 
-OUTPUT_DIR = Path(__file__).parent.parent.parent / "data" / "extracted"
-
+import entity_resolution
+from checkpoint_journal import CheckpointJournal
+from ec_ece_csr import CSR_FILE, write_csr
+from entity_names import entity_type, normalize_name
+from harvest_store import CERTIFIERS, open_store
+from json_stream import iter_json
+from registry_ids import IdAllocator
+from stats_engine import (
+    EC_HISTOGRAM,
+    ECE_HISTOGRAM,
+    Degrees,
+    Relationships,
+    load_ec_groups,
+)
 
-def normalize_name(name: str) -> str:
-    """Normalize entity names for deduplication."""
-    if not name:
-        return ""
-    # Lowercase, strip whitespace
-    n = name.lower().strip()
-    # Remove common suffixes/variations
-    n = re.sub(
-        r"\s*(s\.?a\.?\s*de\s*c\.?v\.?|s\.?c\.?|a\.?c\.?)\s*$", "", n, flags=re.I
+OUTPUT_DIR = Path(__file__).parent.parent.parent / "data" / "extracted"
+STATE_FILE = OUTPUT_DIR / "registry_state.json"
+IDS_FILE = OUTPUT_DIR / "registry_ids.json"
+CHANGES_FILE = OUTPUT_DIR / "registry_changes.json"
+STATE_VERSION = 2
+
+
+def detect_entity_type(names) -> str:
+    """First known legal entity type among a set of name variants."""
+    for name in names:
+        detected = entity_type(name)
+        if detected != "Unknown":
+            return detected
+    return "Unknown"
+
+
+def ec_content_hash(data: dict) -> str:
+    """Hash of the EC fields the registries are built from."""
+    payload = json.dumps(
+        [data.get("title", ""), data.get("certifiers", []), data.get("courses", [])],
+        ensure_ascii=False,
     )
-    # Remove extra whitespace
-    n = re.sub(r"\s+", " ", n)
-    # Remove punctuation except essential
-    n = re.sub(r"[.,;:]+", "", n)
-    return n.strip()
-
-
-def extract_entity_info(name: str) -> dict:
-    """Extract additional info from entity name if available."""
-    info = {"original_name": name, "normalized": normalize_name(name)}
-
-    # Try to detect legal entity type
-    if re.search(r"s\.?a\.?\s*de\s*c\.?v\.?", name, re.I):
-        info["entity_type"] = "SA de CV"
-    elif re.search(r"s\.?c\.?", name, re.I):
-        info["entity_type"] = "SC"
-    elif re.search(r"a\.?c\.?", name, re.I):
-        info["entity_type"] = "AC"
-    else:
-        info["entity_type"] = "Unknown"
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+def ec_contributions(data: dict) -> dict:
+    """Normalized (key, name) pairs an EC record adds to each registry."""
+    ece = []
+    for cert_name in data.get("certifiers", []):
+        if not cert_name or len(cert_name) < 3:
+            continue
+        norm = normalize_name(cert_name)
+        if norm:
+            ece.append([norm, cert_name])
+
+    # Courses are typically "Course Name - Provider" or just names
+    ccap = []
+    for course in data.get("courses", []):
+        if not course or len(course) < 5:
+            continue
+        norm = normalize_name(course)
+        if norm:
+            ccap.append([norm, course])
 
-    return info
-
-
-def build_ece_registry(ec_data: dict) -> dict:
-    """Build master ECE registry from extracted data."""
-    # Map normalized name -> ECE record
-    ece_map = defaultdict(
-        lambda: {
-            "names": set(),
-            "ec_codes": set(),
-            "first_seen": None,
-            "entity_type": None,
-        }
-    )
+    return {
+        "title": data.get("title", ""),
+        "ece": ece,
+        "ccap": ccap,
+        # Every certifier key, used to look up ECE IDs for the matrix
+        "matrix_keys": sorted({normalize_name(c) for c in data.get("certifiers", [])}),
+    }
 
-    for ec_code, data in ec_data.items():
-        certifiers = data.get("certifiers", [])
-        for cert_name in certifiers:
-            if not cert_name or len(cert_name) < 3:
-                continue
 
-            norm = normalize_name(cert_name)
-            if not norm:
+class RegistryState:
+    """Registry aggregates that can be updated one EC record at a time.
+
+    Entities are keyed by normalized name and keep reference counts of the
+    ECs and raw name variants that contribute to them, so an EC can be
+    retracted exactly when it changes or disappears. Persisted to
+    STATE_FILE together with per-EC content hashes, so --incremental runs
+    only re-normalize records whose content changed. IDs come from an
+    IdAllocator, so they stay stable across full and incremental builds.
+    """
+
+    def __init__(self):
+        self.ecs = {}  # ec_code -> {"hash", "title", "ece", "ccap", "matrix_keys"}
+        self.entities = {"ece": {}, "ccap": {}}  # kind -> norm -> aggregate
+        self.aliases = {}  # kind -> norm -> representative norm, set by registry()
+
+    @classmethod
+    def load(cls, path: Path) -> "RegistryState":
+        state = cls()
+        if path.exists():
+            with open(path, "r", encoding="utf-8") as f:
+                saved = json.load(f)
+            if saved.get("version") == STATE_VERSION:
+                state.ecs = saved["ecs"]
+                state.entities = saved["entities"]
+        return state
+
+    def save(self, path: Path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "version": STATE_VERSION,
+                    "ecs": self.ecs,
+                    "entities": self.entities,
+                },
+                f,
+                ensure_ascii=False,
+            )
+
+    def _add(self, ec_code: str, contrib: dict):
+        for kind in ("ece", "ccap"):
+            for norm, name in contrib[kind]:
+                entity = self.entities[kind].setdefault(
+                    norm, {"names": {}, "ec_codes": {}}
+                )
+                entity["names"][name] = entity["names"].get(name, 0) + 1
+                entity["ec_codes"][ec_code] = entity["ec_codes"].get(ec_code, 0) + 1
+
+    def _retract(self, ec_code: str):
+        contrib = self.ecs[ec_code]
+        for kind in ("ece", "ccap"):
+            for norm, name in contrib[kind]:
+                entity = self.entities[kind][norm]
+                for field, key in (("names", name), ("ec_codes", ec_code)):
+                    entity[field][key] -= 1
+                    if not entity[field][key]:
+                        del entity[field][key]
+                if not entity["ec_codes"]:
+                    del self.entities[kind][norm]
+
+    def apply(self, records) -> dict:
+        """Bring the state in line with (ec_code, data) records.
+
+        `records` is consumed once, one EC at a time, so it can stream from
+        disk. ECs in the state but not in `records` are removed. Returns the
+        EC-level diff.
+        """
+        diff = {"added": [], "changed": [], "removed": [], "unchanged": 0}
+        seen = set()
+
+        for ec_code, data in records:
+            seen.add(ec_code)
+            content_hash = ec_content_hash(data)
+            previous = self.ecs.get(ec_code)
+            if previous and previous["hash"] == content_hash:
+                diff["unchanged"] += 1
                 continue
-
-            ece = ece_map[norm]
-            ece["names"].add(cert_name)
-            ece["ec_codes"].add(ec_code)
-
-            info = extract_entity_info(cert_name)
-            if not ece["entity_type"] or ece["entity_type"] == "Unknown":
-                ece["entity_type"] = info["entity_type"]
-
-    # Convert to list format
-    registry = []
-    for norm_name, ece in ece_map.items():
-        # Pick canonical name (longest or most complete)
-        canonical = max(ece["names"], key=len)
-
-        registry.append(
-            {
-                "id": f"ECE-{len(registry) + 1:05d}",
+            if previous:
+                self._retract(ec_code)
+                diff["changed"].append(ec_code)
+            else:
+                diff["added"].append(ec_code)
+
+            contrib = ec_contributions(data)
+            contrib["hash"] = content_hash
+            self._add(ec_code, contrib)
+            self.ecs[ec_code] = contrib
+
+        for ec_code in [c for c in self.ecs if c not in seen]:
+            self._retract(ec_code)
+            del self.ecs[ec_code]
+            diff["removed"].append(ec_code)
+
+        return diff
+
+    def _clusters(self, kind: str, ids: IdAllocator, resolve: bool) -> dict:
+        """Representative key -> {member key: merge score} for each entity.
+
+        Without `resolve` every key is its own entity. Otherwise near-duplicate
+        keys are merged; the representative is the member that already holds
+        an ID (the oldest one), else the one with the most ECs.
+        """
+        keys = self.entities[kind]
+        clusters = {key: {key: 1.0} for key in keys}
+        if not resolve:
+            return clusters
+
+        def rank(key):
+            existing = ids.lookup(kind, key)
+            return (
+                existing is None,
+                existing or "",
+                -len(keys[key]["ec_codes"]),
+                key,
+            )
+
+        for members in entity_resolution.resolve(keys):
+            representative = min(members, key=rank)
+            for key in members:
+                del clusters[key]
+            clusters[representative] = members
+        return clusters
+
+    def registry(
+        self, kind: str, ids: IdAllocator, resolve: bool = False
+    ) -> tuple[list, dict]:
+        """Registry list sorted by EC count, plus the allocator's ID diff.
+
+        With `resolve`, near-duplicate keys (accent, typo and abbreviation
+        variants) are merged into one entity; their names are added to
+        alternate_names and the merged keys listed under merged_keys.
+        """
+        registry = []
+        self.aliases[kind] = {}
+        for norm_name, members in self._clusters(kind, ids, resolve).items():
+            name_set, ec_codes = set(), set()
+            for key in members:
+                name_set.update(self.entities[kind][key]["names"])
+                ec_codes.update(self.entities[kind][key]["ec_codes"])
+                self.aliases[kind][key] = norm_name
+            names = sorted(name_set)
+            # Pick canonical name (longest or most complete)
+            canonical = max(names, key=len)
+
+            record = {
+                "id": None,
                 "canonical_name": canonical,
-                "alternate_names": sorted(ece["names"] - {canonical}),
+                "alternate_names": [n for n in names if n != canonical],
                 "normalized_key": norm_name,
-                "entity_type": ece["entity_type"],
-                "ec_codes": sorted(ece["ec_codes"]),
-                "ec_count": len(ece["ec_codes"]),
             }
-        )
-
-    # Sort by EC count descending
-    registry.sort(key=lambda x: (-x["ec_count"], x["canonical_name"]))
-
-    # Reassign IDs after sorting
-    for i, ece in enumerate(registry):
-        ece["id"] = f"ECE-{i + 1:05d}"
-
-    return registry
-
-
-def build_ccap_registry(ec_data: dict) -> dict:
-    """Build master CCAP registry from course data."""
-    # Courses might contain training center info
-    ccap_map = defaultdict(
-        lambda: {"names": set(), "ec_codes": set(), "courses": set()}
-    )
-
-    for ec_code, data in ec_data.items():
-        courses = data.get("courses", [])
-        for course in courses:
-            if not course or len(course) < 5:
-                continue
-
-            # Courses are typically "Course Name - Provider" or just names
-            # For now, track unique courses per EC
-            norm = normalize_name(course)
-            if not norm:
-                continue
-
-            ccap = ccap_map[norm]
-            ccap["names"].add(course)
-            ccap["ec_codes"].add(ec_code)
-            ccap["courses"].add(course)
-
-    registry = []
-    for norm_name, ccap in ccap_map.items():
-        canonical = max(ccap["names"], key=len)
-
-        registry.append(
-            {
-                "id": f"CCAP-{len(registry) + 1:05d}",
-                "canonical_name": canonical,
-                "alternate_names": sorted(ccap["names"] - {canonical}),
-                "normalized_key": norm_name,
-                "ec_codes": sorted(ccap["ec_codes"]),
-                "ec_count": len(ccap["ec_codes"]),
+            if len(members) > 1:
+                record["merged_keys"] = [
+                    {"normalized_key": key, "score": members[key]}
+                    for key in sorted(members)
+                    if key != norm_name
+                ]
+            if kind == "ece":
+                record["entity_type"] = detect_entity_type(names)
+            record["ec_codes"] = sorted(ec_codes)
+            record["ec_count"] = len(ec_codes)
+            registry.append(record)
+
+        # Sort by EC count descending
+        registry.sort(key=lambda x: (-x["ec_count"], x["canonical_name"]))
+
+        # Known entities keep their IDs; new ones are numbered in registry order
+        changes = ids.assign(kind, registry)
+        return registry, changes
+
+    def matrix(self, ec_order, ids: IdAllocator) -> dict:
+        """EC -> ECE lookup; call after registry("ece") so every ECE has an ID."""
+        aliases = self.aliases.get("ece", {})
+        norm_to_id = {
+            norm: ids.lookup("ece", aliases.get(norm, norm))
+            for norm in self.entities["ece"]
+        }
+        matrix = {}
+        for ec_code in ec_order:
+            ec = self.ecs[ec_code]
+            ece_ids = sorted({norm_to_id[k] for k in ec["matrix_keys"] if k in norm_to_id})
+            matrix[ec_code] = {
+                "ece_ids": ece_ids,
+                "ece_count": len(ece_ids),
+                "title": ec["title"],
             }
-        )
-
-    registry.sort(key=lambda x: (-x["ec_count"], x["canonical_name"]))
-
-    for i, ccap in enumerate(registry):
-        ccap["id"] = f"CCAP-{i + 1:05d}"
+        return matrix
 
-    return registry
 
+def tally(records, summary: dict):
+    """Pass (ec_code, data) records through, counting them into `summary`.
 
-def build_ec_ece_matrix(ec_data: dict, ece_registry: list) -> dict:
-    """Build EC to ECE lookup matrix."""
-    # Create normalized name to ECE ID mapping
-    norm_to_id = {}
-    for ece in ece_registry:
-        norm_to_id[ece["normalized_key"]] = ece["id"]
-
-    matrix = {}
-    for ec_code, data in ec_data.items():
+    Collects what generate_stats reports about the input while the records
+    stream past, so they never need to be held in memory together.
+    """
+    summary.setdefault("ec_codes", [])
+    summary.setdefault("certifier_relationships", 0)
+    summary.setdefault("ecs_with_certifiers", 0)
+    for ec_code, data in records:
         certifiers = data.get("certifiers", [])
-        ece_ids = []
-        for cert in certifiers:
-            norm = normalize_name(cert)
-            if norm in norm_to_id:
-                ece_ids.append(norm_to_id[norm])
-
-        matrix[ec_code] = {
-            "ece_ids": sorted(set(ece_ids)),
-            "ece_count": len(set(ece_ids)),
-            "title": data.get("title", ""),
-        }
-
-    return matrix
+        summary["ec_codes"].append(ec_code)
+        summary["certifier_relationships"] += len(certifiers)
+        summary["ecs_with_certifiers"] += 1 if certifiers else 0
+        yield ec_code, data
 
 
 def generate_stats(
-    ec_data: dict, ece_registry: list, ccap_registry: list, matrix: dict
+    summary: dict,
+    ece_registry: list,
+    ccap_registry: list,
+    matrix: dict,
+    groups: dict | None = None,
 ) -> dict:
-    """Generate comprehensive statistics."""
-    total_relationships = sum(len(d.get("certifiers", [])) for d in ec_data.values())
-    ecs_with_certifiers = sum(1 for d in ec_data.values() if d.get("certifiers"))
-
-    # ECE stats
-    ece_ec_counts = [e["ec_count"] for e in ece_registry]
-
-    # Top certifiers
-    top_eces = ece_registry[:20]
+    """Generate comprehensive statistics.
+
+    `groups` ({"sector": {ec_code: name}, "committee": ...}, see
+    stats_engine.ec_groups) adds per-sector and per-committee coverage.
+    """
+    total_ecs = len(summary["ec_codes"])
+    total_relationships = summary["certifier_relationships"]
+    ecs_with_certifiers = summary["ecs_with_certifiers"]
+    groups = groups or {}
+
+    # Degree arrays, built once; every metric below reads from them
+    eces = Degrees(
+        (e["ec_count"] for e in ece_registry),
+        (e["canonical_name"] for e in ece_registry),
+    )
+    links = Relationships(matrix)
+    ecs = links.ec_degrees
 
     return {
         "extraction_summary": {
-            "total_ecs_processed": len(ec_data),
+            "total_ecs_processed": total_ecs,
             "ecs_with_certifiers": ecs_with_certifiers,
-            "ecs_without_certifiers": len(ec_data) - ecs_with_certifiers,
+            "ecs_without_certifiers": total_ecs - ecs_with_certifiers,
             "total_certifier_relationships": total_relationships,
         },
         "ece_registry_stats": {
             "unique_certifiers": len(ece_registry),
-            "avg_ecs_per_certifier": round(sum(ece_ec_counts) / len(ece_ec_counts), 2)
-            if ece_ec_counts
-            else 0,
-            "max_ecs_per_certifier": max(ece_ec_counts) if ece_ec_counts else 0,
-            "certifiers_with_1_ec": sum(1 for c in ece_ec_counts if c == 1),
-            "certifiers_with_5plus_ecs": sum(1 for c in ece_ec_counts if c >= 5),
-            "certifiers_with_10plus_ecs": sum(1 for c in ece_ec_counts if c >= 10),
+            "avg_ecs_per_certifier": eces.mean(),
+            "max_ecs_per_certifier": eces.max(),
+            "certifiers_with_1_ec": eces.exactly(1),
+            "certifiers_with_5plus_ecs": eces.at_least(5),
+            "certifiers_with_10plus_ecs": eces.at_least(10),
+            "ec_count_percentiles": eces.percentiles(),
+            "ec_count_histogram": eces.histogram(ECE_HISTOGRAM),
+        },
+        "ec_certifier_stats": {
+            "avg_certifiers_per_ec": ecs.mean(),
+            "max_certifiers_per_ec": ecs.max(),
+            "ecs_with_10plus_certifiers": ecs.at_least(10),
+            "certifier_count_percentiles": ecs.percentiles(),
+            "certifier_count_histogram": ecs.histogram(EC_HISTOGRAM),
         },
         "ccap_registry_stats": {"unique_courses_or_centers": len(ccap_registry)},
         "top_20_certifiers": [
-            {"name": e["canonical_name"], "ec_count": e["ec_count"]} for e in top_eces
+            {"name": name, "ec_count": count} for name, count in eces.top(20)
         ],
+        "by_sector": links.breakdown(groups.get("sector", {})),
+        "by_committee": links.breakdown(groups.get("committee", {})),
     }
 
 
+def print_id_changes(changes: dict):
+    print(
+        f"  → IDs: {len(changes['added'])} new, {len(changes['changed'])} changed, "
+        f"{len(changes['removed'])} retired, {len(changes['reactivated'])} reactivated"
+    )
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="CONOCER Master Registry Builder")
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help=f"apply only added/changed/removed ECs to {STATE_FILE.name}",
+    )
+    parser.add_argument(
+        "--exact",
+        action="store_true",
+        help="dedupe certifiers by exact normalized name only (no fuzzy merging)",
+    )
+    return parser.parse_args()
+
+
 def main():
+    args = parse_args()
+
     print("=" * 60)
     print("CONOCER Master Registry Builder")
     print("=" * 60)
 
-    # Load extracted data
+    # Stream extracted data (harvest store, final file or checkpoint)
     input_file = OUTPUT_DIR / "ec_certifiers_all.json"
-    if not input_file.exists():
+    store = open_store()
+    if store and store.progress(CERTIFIERS)["processed"]:
+        print(f"Using harvest store: {store.path}")
+        records = store.iter_ec_details(CERTIFIERS)
+    elif not input_file.exists():
         # Try checkpoint file
-        checkpoint_file = OUTPUT_DIR / "certifiers_checkpoint.json"
-        if checkpoint_file.exists():
-            print(f"Using checkpoint file: {checkpoint_file}")
-            with open(checkpoint_file, "r", encoding="utf-8") as f:
-                checkpoint = json.load(f)
-                ec_data = checkpoint.get("data", {})
+        journal = CheckpointJournal(OUTPUT_DIR / "certifiers_checkpoint.json")
+        if journal.checkpoint_file.exists() or journal.journal_file.exists():
+            print(f"Using checkpoint file: {journal.checkpoint_file}")
+            records = journal.iter_data()
         else:
             print("ERROR: No extraction data found!")
             print(f"Expected: {input_file}")
             return
     else:
-        with open(input_file, "r", encoding="utf-8") as f:
-            data = json.load(f)
-            ec_data = data.get("ec_details", {})
+        records = iter_json(input_file, "ec_details")
 
-    print(f"Loaded {len(ec_data)} EC records")
+    if args.incremental:
+        state = RegistryState.load(STATE_FILE)
+        print(f"Incremental mode: {len(state.ecs)} EC records in saved state")
+    else:
+        state = RegistryState()
+
+    summary = {}
+    diff = state.apply(tally(records, summary))
+    if store:
+        store.close()
+    print(f"Loaded {len(summary['ec_codes'])} EC records")
+    print(
+        f"  → {len(diff['added'])} added, {len(diff['changed'])} changed, "
+        f"{len(diff['removed'])} removed, {diff['unchanged']} unchanged"
+    )
+
+    # Existing entities keep their published IDs across builds
+    ids = IdAllocator(IDS_FILE)
 
     # Build ECE registry
     print("\nBuilding ECE (Certifier) registry...")
-    ece_registry = build_ece_registry(ec_data)
+    ece_registry, ece_changes = state.registry("ece", ids, resolve=not args.exact)
     print(f"  → {len(ece_registry)} unique certifiers identified")
+    print_id_changes(ece_changes)
 
     # Build CCAP registry
     print("\nBuilding CCAP (Training Center/Course) registry...")
-    ccap_registry = build_ccap_registry(ec_data)
+    ccap_registry, ccap_changes = state.registry("ccap", ids)
     print(f"  → {len(ccap_registry)} unique courses/centers identified")
+    print_id_changes(ccap_changes)
 
     # Build EC-ECE matrix
     print("\nBuilding EC-ECE relationship matrix...")
-    matrix = build_ec_ece_matrix(ec_data, ece_registry)
+    matrix = state.matrix(summary["ec_codes"], ids)
+
+    state.save(STATE_FILE)
+    ids.save()
 
     # Generate stats
     print("\nGenerating statistics...")
-    stats = generate_stats(ec_data, ece_registry, ccap_registry, matrix)
+    stats = generate_stats(
+        summary, ece_registry, ccap_registry, matrix, load_ec_groups()
+    )
 
     # Save outputs
     timestamp = datetime.now().isoformat()
@@ -306,6 +491,19 @@ def main():
     with open(matrix_file, "w", encoding="utf-8") as f:
         json.dump(matrix_output, f, indent=2, ensure_ascii=False)
     print(f"✅ EC-ECE Matrix saved: {matrix_file}")
+    write_csr(matrix, [ece["id"] for ece in ece_registry], CSR_FILE)
+    print(f"✅ EC-ECE CSR matrix saved: {CSR_FILE}")
+
+    # ID-level changes, for downstream upserts of just the diff
+    changes_output = {
+        "generated_at": timestamp,
+        "description": "ECE/CCAP IDs added, changed or removed by this build",
+        "ece": ece_changes,
+        "ccap": ccap_changes,
+    }
+    with open(CHANGES_FILE, "w", encoding="utf-8") as f:
+        json.dump(changes_output, f, indent=2, ensure_ascii=False)
+    print(f"✅ Registry changes saved: {CHANGES_FILE}")
 
     # Stats
     stats_output = {"generated_at": timestamp, **stats}
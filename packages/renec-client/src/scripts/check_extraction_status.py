@@ -5,54 +5,46 @@ Check extraction status and optionally run final build.
 Usage:
   python check_extraction_status.py         # Check status
   python check_extraction_status.py --build # Check and build if complete
+
+--build brings the registries, the report and the registry index up to
+date through harvest_pipeline.py (offline), so unchanged inputs are not
+rebuilt.
+
+A sharded run (harvest_shards.py) counts as running while any shard
+worker's heartbeat is live or its lease queue still has pending or leased
+ECs; shard journals left unmerged hold back --build until they are merged.
 """
 
-import json
-import subprocess
 import sys
-from datetime import datetime
 from pathlib import Path
 
+from checkpoint_journal import CheckpointJournal
+from harvest_pipeline import run_pipeline
+from harvest_shards import LEASED, PENDING, queue_counts, shard_journals, shard_statuses
+from harvest_store import CERTIFIERS, open_store
+from json_stream import count_records
+from run_status import is_running, read_status
+
 OUTPUT_DIR = Path(__file__).parent.parent.parent / "data" / "extracted"
-SCRIPTS_DIR = Path(__file__).parent
+CHECKPOINT_FILE = OUTPUT_DIR / "certifiers_checkpoint.json"
 
 
-def load_checkpoint() -> dict:
-    """Load checkpoint file."""
-    checkpoint_file = OUTPUT_DIR / "certifiers_checkpoint.json"
-    if checkpoint_file.exists():
-        with open(checkpoint_file, "r", encoding="utf-8") as f:
-            return json.load(f)
-    return {}
+def load_checkpoint() -> CheckpointJournal:
+    """Checkpoint file plus the live run's journal."""
+    return CheckpointJournal(CHECKPOINT_FILE)
 
 
 def load_ec_count() -> int:
-    """Load total EC count."""
-    ec_file = OUTPUT_DIR / "ec_standards_api.json"
-    if ec_file.exists():
-        with open(ec_file, "r", encoding="utf-8") as f:
-            return len(json.load(f))
-    return 0
-
-
-def check_process_running() -> bool:
-    """Check if extraction is still running."""
-    try:
-        result = subprocess.run(
-            ["pgrep", "-f", "extract_certifiers_batch"], capture_output=True, text=True
-        )
-        return result.returncode == 0
-    except Exception:
-        return False
+    """Count EC standards without loading the file."""
+    return count_records(OUTPUT_DIR / "ec_standards_api.json")
 
 
 def run_build():
-    """Run registry builder and report generator."""
-    print("\n🔨 Running registry builder...")
-    subprocess.run([sys.executable, SCRIPTS_DIR / "build_master_registries.py"])
-
-    print("\n📊 Generating report...")
-    subprocess.run([sys.executable, SCRIPTS_DIR / "generate_extraction_report.py"])
+    """Bring registries, report and index up to date from local data."""
+    print("\n🔨 Building registries, report and index...")
+    outcomes = run_pipeline(["report", "index"], offline=True)
+    for name, outcome in outcomes.items():
+        print(f"   {name}: {outcome}")
 
 
 def main():
@@ -62,19 +54,54 @@ def main():
     print("CONOCER/RENEC Extraction Status")
     print("=" * 60)
 
-    total_ecs = load_ec_count()
-    checkpoint = load_checkpoint()
-
-    processed = len(checkpoint.get("processed", []))
-    failed = len(checkpoint.get("failed", []))
-    last_updated = checkpoint.get("last_updated", "Unknown")
-
-    # Calculate certifier stats from data
-    data = checkpoint.get("data", {})
-    total_certs = sum(len(d.get("certifiers", [])) for d in data.values())
-    ecs_with_certs = sum(1 for d in data.values() if d.get("certifiers"))
-
-    running = check_process_running()
+    # The extractor's status sidecar answers everything in O(1)
+    status = read_status(CHECKPOINT_FILE)
+    store = None if status else open_store()
+    if status:
+        total_ecs = status["total"]
+        processed = status["processed"]
+        failed = status["failed"]
+        last_updated = status["heartbeat"]
+        total_certs = status["counts"].get("certifier_relationships", 0)
+        ecs_with_certs = status["counts"].get("ecs_with_certifiers", 0)
+    elif store:
+        # Indexed counts; no JSON parsing
+        with store:
+            total_ecs = store.count("standards") or load_ec_count()
+            progress = store.progress(CERTIFIERS)
+            cert_stats = store.certifier_stats()
+        processed = progress["processed"]
+        failed = progress["failed"]
+        last_updated = progress["last_updated"] or "Unknown"
+        total_certs = cert_stats["relationships"]
+        ecs_with_certs = cert_stats["ecs_with_certifiers"]
+    else:
+        total_ecs = load_ec_count()
+        journal = load_checkpoint()
+        checkpoint = journal.load_index()
+
+        processed = len(checkpoint.get("processed", []))
+        failed = len(checkpoint.get("failed", []))
+        last_updated = checkpoint.get("last_updated") or "Unknown"
+
+        # Calculate certifier stats from data, one EC at a time
+        total_certs = 0
+        ecs_with_certs = 0
+        for _, d in journal.iter_data():
+            total_certs += len(d.get("certifiers", []))
+            ecs_with_certs += 1 if d.get("certifiers") else 0
+
+    # Shard workers (harvest_shards.py) keep their own sidecars and a lease
+    # queue; the main sidecar may be missing or left over from an old run
+    live_shards = {
+        worker: s
+        for worker, s in shard_statuses(CHECKPOINT_FILE).items()
+        if is_running(s)
+    }
+    queue = queue_counts(CHECKPOINT_FILE)
+    queued = queue[PENDING] + queue[LEASED] if queue else 0
+    unmerged = shard_journals(CHECKPOINT_FILE)
+    running = (bool(status) and is_running(status)) or bool(live_shards) or queued > 0
 
     progress_pct = (processed / total_ecs * 100) if total_ecs > 0 else 0
 
@@ -82,30 +109,36 @@ def main():
     print(f"❌ Failed: {failed:,}")
     print(f"⏱️  Last Update: {last_updated}")
     print(f"🔄 Process Running: {'Yes' if running else 'No'}")
+    if live_shards:
+        print(f"   Shard workers: {', '.join(sorted(live_shards))}")
+    if queue:
+        print(f"   Lease queue: {queued:,} pending or leased")
 
     print(f"\n📊 Current Stats:")
     print(f"   ECs with certifiers: {ecs_with_certs:,}")
     print(f"   Total certifier relationships: {total_certs:,}")
 
-    # Estimate completion
-    if running and processed > 0:
-        # Parse last_updated to estimate rate
-        try:
-            from datetime import datetime
-
-            last_dt = datetime.fromisoformat(last_updated)
-            # Rough estimate assuming 4-5 ECs/min
-            remaining = total_ecs - processed
-            eta_minutes = remaining / 4.5
-            print(
-                f"\n⏳ Estimated time remaining: {eta_minutes:.0f} minutes (~{eta_minutes / 60:.1f} hours)"
-            )
-        except Exception:
-            pass
-
-    is_complete = processed >= total_ecs or (not running and processed > 0)
-
-    if is_complete:
+    # Estimate completion from the extractors' measured rolling rates
+    shard_rate = sum(s["rate_per_min"] for s in live_shards.values())
+    if live_shards and queue and shard_rate > 0:
+        eta_minutes = queued / shard_rate
+        print(
+            f"\n⏳ Estimated time remaining: {eta_minutes:.0f} minutes"
+            f" at {shard_rate:.1f} ECs/min across {len(live_shards)} workers"
+        )
+    elif running and status and status.get("eta_minutes") is not None:
+        eta_minutes = status["eta_minutes"]
+        print(
+            f"\n⏳ Estimated time remaining: {eta_minutes:.0f} minutes (~{eta_minutes / 60:.1f} hours)"
+            f" at {status['rate_per_min']:.1f} ECs/min"
+        )
+
+    is_complete = not running and not unmerged and processed > 0
+
+    if not running and unmerged:
+        print(f"\n⚠️  {len(unmerged)} shard journals not merged yet; run:")
+        print("   python harvest_shards.py merge certifiers")
+    elif is_complete:
         print("\n✅ EXTRACTION COMPLETE!")
 
         if build_if_complete:
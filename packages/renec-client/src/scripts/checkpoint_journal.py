@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Append-only checkpoint journal for the EC extractors.
+
+Rewriting the whole checkpoint dict every batch makes checkpointing O(n^2)
+over a run and can leave a truncated file if the process dies mid-write.
+Instead, each result is appended as one JSON line to <checkpoint>.jsonl and
+fsynced in batches; the checkpoint JSON itself (same shape as before) is only
+materialized by compact(), atomically, at start-up and at the end of a run.
+
+Journal line format:
+  {"ec_code": "EC0217", "status": "ok", "data": {...}}
+  {"ec_code": "EC0999", "status": "failed"}
+"""
+
+import json
+import os
+from datetime import datetime
+from pathlib import Path
+
+from json_stream import iter_jsonl, iter_object
+
+FSYNC_EVERY = 20  # Records between fsyncs
+
+
+def empty_checkpoint() -> dict:
+    return {"processed": [], "failed": [], "data": {}, "last_updated": None}
+
+
+def replay(checkpoint: dict, records) -> dict:
+    """Apply journal records to a checkpoint dict, like the live loop does.
+
+    Codes already listed are not listed twice, so replaying a journal over
+    a snapshot that already contains it is harmless.
+    """
+    processed = set(checkpoint["processed"])
+    failed = set(checkpoint["failed"])
+    for record in records:
+        ec_code = record["ec_code"]
+        if record.get("status") == "ok":
+            checkpoint["data"][ec_code] = record.get("data")
+            if ec_code not in processed:
+                processed.add(ec_code)
+                checkpoint["processed"].append(ec_code)
+        elif ec_code not in failed:
+            failed.add(ec_code)
+            checkpoint["failed"].append(ec_code)
+    return checkpoint
+
+
+def write_json_atomic(path: Path, payload, indent: int | None = None):
+    """Write JSON to a temp file, fsync it and rename it over `path`."""
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(payload, f, ensure_ascii=False, indent=indent)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+class CheckpointJournal:
+    """Journal of per-EC results backing a checkpoint JSON file."""
+
+    def __init__(
+        self,
+        checkpoint_file: Path,
+        fsync_every: int = FSYNC_EVERY,
+        indent: int | None = None,
+    ):
+        self.checkpoint_file = Path(checkpoint_file)
+        self.journal_file = self.checkpoint_file.with_suffix(".jsonl")
+        self.fsync_every = fsync_every
+        self.indent = indent
+        self._fh = None
+        self._unsynced = 0
+
+    # -- reading ---------------------------------------------------------
+
+    def iter_records(self):
+        """Yield journal records; a torn final line from a crash is skipped."""
+        return iter_jsonl(self.journal_file)
+
+    def load(self) -> dict:
+        """Checkpoint snapshot with the journal replayed on top (read-only)."""
+        if self.checkpoint_file.exists():
+            with open(self.checkpoint_file, "r", encoding="utf-8") as f:
+                checkpoint = json.load(f)
+        else:
+            checkpoint = empty_checkpoint()
+        return replay(checkpoint, self.iter_records())
+
+    def load_index(self) -> dict:
+        """Like load(), but with "data" left out; the snapshot is streamed."""
+        checkpoint = empty_checkpoint()
+        for key, value in iter_object(self.checkpoint_file, stream=("data",)):
+            if key != "data":
+                checkpoint[key] = value
+        index = replay(checkpoint, self.iter_records())
+        index["data"] = {}
+        return index
+
+    def iter_data(self):
+        """Stream (ec_code, data) of successful results, journal included.
+
+        Snapshot entries are read one at a time; only the journal's own
+        results (the tail since the last compaction) are held in memory.
+        Order and values match load()["data"].
+        """
+        journaled = {}
+        for record in self.iter_records():
+            if record.get("status") == "ok":
+                journaled[record["ec_code"]] = record.get("data")
+
+        for key, value in iter_object(self.checkpoint_file, stream=("data",)):
+            if key != "data":
+                continue
+            for ec_code, data in value:
+                yield ec_code, journaled.pop(ec_code, data)
+        yield from journaled.items()
+
+    # -- writing ---------------------------------------------------------
+
+    def append(self, ec_code: str, data: dict | None):
+        """Journal one result; data=None records a failure."""
+        if self._fh is None:
+            self._fh = open(self.journal_file, "a", encoding="utf-8")
+        record = {"ec_code": ec_code, "status": "ok" if data else "failed"}
+        if data:
+            record["data"] = data
+        self._fh.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self._unsynced += 1
+        if self._unsynced >= self.fsync_every:
+            self.sync()
+
+    def sync(self):
+        if self._fh is not None:
+            self._fh.flush()
+            os.fsync(self._fh.fileno())
+        self._unsynced = 0
+
+    def close(self):
+        if self._fh is not None:
+            self.sync()
+            self._fh.close()
+            self._fh = None
+
+    def compact(self, checkpoint: dict):
+        """Materialize `checkpoint` as the snapshot and truncate the journal.
+
+        `checkpoint` must already include every journaled record (the live
+        dict, or the result of load()). The snapshot is replaced atomically
+        before the journal is removed; a crash in between just replays the
+        journal over a snapshot that already has it.
+        """
+        self.close()
+        checkpoint["last_updated"] = datetime.now().isoformat()
+        write_json_atomic(self.checkpoint_file, checkpoint, self.indent)
+        if self.journal_file.exists():
+            self.journal_file.unlink()
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Committee ID discovery for refresh scans.
+
+Committee IDs are sparse (581 live IDs between 1 and 798, with long dead
+stretches such as 5-79), so sweeping every integer up to a hardcoded MAX_ID
+spends most requests on 404/409s. Discovery instead:
+
+  1. seeds from known committee IDs (committees_complete.json) and the
+     comiteGestion.idComite references in ec_standards_api.json;
+  2. sweeps only dense regions: runs of seeds less than GAP apart, plus
+     MARGIN IDs on either side;
+  3. probes the gaps between regions and the space above the highest live
+     ID with galloping (1, 2, 4, 8, ... steps) search, sweeping densely
+     around every hit, until no probe finds anything new.
+
+A committee hidden in the middle of a long dead stretch can be missed; the
+full scan (no --discover) remains the exhaustive option.
+"""
+
+from committee_scan import run_scan
+from json_stream import iter_json
+
+GAP = 8  # Seeds closer than this are swept as one dense region
+MARGIN = 4  # IDs swept beyond both ends of a dense region
+MAX_PROBE_SPAN = 256  # How far above the highest live ID galloping looks
+
+
+def load_seeds(committees_file, standards_file) -> set:
+    """Committee IDs already known or referenced by EC standards."""
+    seeds = set()
+    for committee in iter_json(committees_file):
+        if isinstance(committee.get("id"), int):
+            seeds.add(committee["id"])
+    for std in iter_json(standards_file):
+        ref = std.get("comiteGestion") or {}
+        if isinstance(ref, dict) and str(ref.get("idComite", "")).isdigit():
+            seeds.add(int(ref["idComite"]))
+    return seeds
+
+
+def regions(ids, gap: int = GAP) -> list:
+    """Merge sorted IDs into (first, last) runs with gaps smaller than `gap`."""
+    runs = []
+    for id in sorted(ids):
+        if runs and id - runs[-1][1] < gap:
+            runs[-1][1] = id
+        else:
+            runs.append([id, id])
+    return [tuple(run) for run in runs]
+
+
+def region_ids(ids, gap: int = GAP, margin: int = MARGIN) -> set:
+    """Every ID inside the dense regions around `ids`, margins included."""
+    targets = set()
+    for first, last in regions(ids, gap):
+        targets.update(range(max(1, first - margin), last + margin + 1))
+    return targets
+
+
+def gallop(start: int, stop: int) -> list:
+    """start+1, start+2, start+4, ... while below `stop`."""
+    probes = []
+    step = 1
+    while start + step < stop:
+        probes.append(start + step)
+        step *= 2
+    return probes
+
+
+def gap_probes(ids, top_span: int = MAX_PROBE_SPAN) -> set:
+    """Galloping probes into each gap (from both edges) and above the top."""
+    runs = regions(ids)
+    probes = set()
+    edges = [(0, runs[0][0])] if runs else []
+    edges += [(a[1], b[0]) for a, b in zip(runs, runs[1:])]
+    for low, high in edges:
+        probes.update(gallop(low, high))
+        probes.update(high - step for step in gallop(0, high - low))
+    if runs:
+        top = runs[-1][1]
+        probes.update(gallop(top, top + top_span + 1))
+    return {id for id in probes if id >= 1}
+
+
+class Discovery:
+    """Outcome of a discovery run."""
+
+    def __init__(self):
+        self.scanned = set()
+        self.live = set()
+        self.failed = set()
+        self.rounds = 0
+
+    @property
+    def upper_bound(self) -> int:
+        return max(self.live, default=0)
+
+
+def discover(seeds, fetch, on_found=None, on_progress=None, **scan_kwargs):
+    """Find live committee IDs around `seeds`; returns a Discovery.
+
+    `fetch`, `on_found`, `on_progress` and `scan_kwargs` are passed through
+    to committee_scan.run_scan for each batch.
+    """
+    result = Discovery()
+
+    def sweep(ids) -> set:
+        batch = sorted(set(ids) - result.scanned)
+        if not batch:
+            return set()
+        hits = set()
+
+        def found(committee):
+            hits.add(committee["id"])
+            if on_found:
+                on_found(committee)
+
+        progress = run_scan(
+            batch, fetch, on_found=found, on_progress=on_progress, **scan_kwargs
+        )
+        result.rounds += 1
+        # Unanswered IDs stay unscanned, so a later sweep may retry them
+        result.failed.difference_update(batch)
+        result.failed.update(progress.failed)
+        result.scanned.update(set(batch) - result.failed)
+        result.live |= hits
+        return hits
+
+    sweep(region_ids(seeds))
+    while True:
+        # Fill in the dense regions around everything live so far
+        while sweep(region_ids(result.live)):
+            pass
+        # Then look for live IDs outside them
+        if not sweep(gap_probes(result.live or seeds)):
+            return result
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Async committee scanner for the CONOCER API.
+
+Walks a range of committee IDs with a bounded concurrency window and a global
+token-bucket rate limit instead of one blocking request at a time. The fetch
+function stays a plain blocking callable (see fetch_committee in the
+extract_committees scripts) and runs on a dedicated thread pool.
+
+Within that window an AdaptiveLimiter sets the actual concurrency from how
+the server responds. Fetches that fail with an overload (429/5xx, timeouts)
+are retried rather than counted as missing IDs; while the limiter's circuit
+is open the whole scan pauses.
+"""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterable
+
+from rate_limit import AdaptiveLimiter, TokenBucket, TransientError
+
+CONCURRENCY = 8  # Maximum requests in flight
+RATE_PER_SECOND = 6.0  # Global request rate ceiling (~ the old 0.15s sleep)
+PROGRESS_INTERVAL = 50  # Call on_progress every N scanned IDs
+MAX_ATTEMPTS = 5  # Overloaded fetches of one ID before it is given up on
+
+
+class ScanProgress:
+    """Tracks scanned IDs and the contiguous high-water mark used for resume.
+
+    With concurrent fetches IDs complete out of order, so `last_id` only
+    advances once every ID up to it has been scanned. Persisting it as the
+    `last_id` in extraction_progress.json keeps resume safe. IDs that kept
+    failing (`failed`) are never marked, so `last_id` stops short of them and
+    the next resume retries them.
+    """
+
+    def __init__(self, ids: Iterable[int]):
+        self._order = sorted(ids)
+        self._done = set()
+        self._cursor = 0
+        self.last_id = self._order[0] - 1 if self._order else 0
+        self.scanned = 0
+        self.found = 0
+        self.failed = []
+
+    @property
+    def total(self) -> int:
+        return len(self._order)
+
+    def mark(self, id: int):
+        self._done.add(id)
+        self.scanned += 1
+        while (
+            self._cursor < len(self._order)
+            and self._order[self._cursor] in self._done
+        ):
+            self._done.discard(self._order[self._cursor])
+            self.last_id = self._order[self._cursor]
+            self._cursor += 1
+
+
+async def scan_committees(
+    ids: Iterable[int],
+    fetch: Callable[[int], dict | None],
+    on_found: Callable[[dict], None] | None = None,
+    on_progress: Callable[[ScanProgress], None] | None = None,
+    concurrency: int = CONCURRENCY,
+    rate: float = RATE_PER_SECOND,
+    progress_interval: int = PROGRESS_INTERVAL,
+    limiter: AdaptiveLimiter | None = None,
+    cached: Callable[[int], bool] | None = None,
+) -> ScanProgress:
+    """Fetch every ID concurrently; callbacks run on the event loop thread.
+
+    `fetch` returns None for a missing ID and raises for overloads (see
+    AdaptiveLimiter.is_transient); those IDs are re-queued. Any other
+    exception is logged and the ID recorded in `failed`. IDs for which
+    `cached` returns True are answered locally and skip the rate limit.
+    """
+    ids = list(ids)
+    progress = ScanProgress(ids)
+    bucket = TokenBucket(rate)
+    limiter = limiter or AdaptiveLimiter(maximum=concurrency)
+    attempts = {}
+    queue = asyncio.Queue()
+    for id in ids:
+        queue.put_nowait(id)
+
+    loop = asyncio.get_running_loop()
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+
+        async def worker():
+            while True:
+                try:
+                    id = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                if not (cached and cached(id)):
+                    await bucket.acquire()
+                try:
+                    result = await loop.run_in_executor(
+                        executor, limiter.call, fetch, id
+                    )
+                except TransientError as e:
+                    attempts[id] = attempts.get(id, 0) + 1
+                    if attempts[id] < MAX_ATTEMPTS:
+                        queue.put_nowait(id)
+                    else:
+                        print(f"  Giving up on ID {id} for this run: {e}")
+                        progress.failed.append(id)
+                    continue
+                except Exception as e:
+                    # A bug or odd payload for one ID must not end the sweep
+                    print(f"  Error ID {id}: {type(e).__name__}: {e}")
+                    progress.failed.append(id)
+                    continue
+                progress.mark(id)
+                if result:
+                    progress.found += 1
+                    if on_found:
+                        on_found(result)
+                if on_progress and progress.scanned % progress_interval == 0:
+                    on_progress(progress)
+
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+
+    return progress
+
+
+def run_scan(ids: Iterable[int], fetch: Callable[[int], dict | None], **kwargs):
+    """Synchronous entry point for the extraction scripts."""
+    return asyncio.run(scan_committees(ids, fetch, **kwargs))
@@ -0,0 +1,324 @@
+#!/usr/bin/env python3
+"""
+Shared HTTP client for the CONOCERBACKCITAS API.
+
+One pooled, keep-alive client used by every extraction script so repeated
+calls reuse TCP+TLS connections instead of paying a handshake per request.
+Also centralizes header profiles, per-endpoint timeouts and gzip/deflate
+decoding, and serves repeated requests from the on-disk response cache when
+CONOCER_CACHE is set (see response_cache.py).
+"""
+
+import gzip
+import http.client
+import os
+import queue
+import threading
+import zlib
+from functools import partial
+from urllib.parse import urljoin, urlsplit
+
+from json_sanitize import parse_json
+from response_cache import ResponseCache, cache_from_env
+
+# Both overridable, e.g. to point the extractors at mock_conocer.py
+API_BASE = os.environ.get("CONOCER_API_BASE", "https://conocer.gob.mx/CONOCERBACKCITAS")
+SPA_URL = os.environ.get("CONOCER_SPA_URL", "https://conocer.gob.mx/conocer/")
+RENEC_URL = SPA_URL + "#/renec"
+USER_AGENT = "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36"
+
+# Header profiles shared by all scripts
+HEADER_PROFILES = {
+    # Plain JSON GETs (committees)
+    "json": {
+        "Accept": "application/json",
+        "Content-Type": "application/json",
+        "User-Agent": USER_AGENT,
+    },
+    # Mimics the SPA's XHR calls (sectoresProductivos endpoints)
+    "browser": {
+        "Accept": "application/json, text/plain, */*",
+        "Accept-Language": "es-MX,es;q=0.9,en;q=0.8",
+        "Content-Type": "application/json",
+        "User-Agent": USER_AGENT,
+        "Origin": "https://conocer.gob.mx",
+        "Referer": "https://conocer.gob.mx/conocer/",
+    },
+}
+
+# Timeouts in seconds, matched by substring against the request path
+ENDPOINT_TIMEOUTS = {
+    "/comites/": 15,
+    "getDescEstandar": 30,
+    "getDatosGeneralesComite": 30,
+    "search": 30,
+    "getEstandaresAll": 120,
+}
+DEFAULT_TIMEOUT = 30
+POOL_SIZE = 8  # Idle connections kept per host
+
+# Requests carrying these validators want the server's answer, not the cache's
+CONDITIONAL_HEADERS = ("If-None-Match", "If-Modified-Since")
+
+# Errors that mean a pooled keep-alive connection went stale
+_STALE_ERRORS = (
+    http.client.RemoteDisconnected,
+    http.client.CannotSendRequest,
+    BrokenPipeError,
+    ConnectionResetError,
+)
+
+
+class HTTPError(Exception):
+    """Non-2xx response. Mirrors urllib.error.HTTPError's `code` attribute."""
+
+    def __init__(
+        self, code: int, url: str, body: bytes = b"", headers: dict | None = None
+    ):
+        super().__init__(f"HTTP {code} for {url}")
+        self.code = code
+        self.url = url
+        self.body = body
+        self.headers = headers or {}
+
+
+class Response:
+    """Fully read, decoded response."""
+
+    def __init__(
+        self,
+        status: int,
+        headers: dict,
+        body: bytes,
+        url: str,
+        from_cache: bool = False,
+    ):
+        self.status = status
+        self.headers = headers
+        self.body = body
+        self.url = url
+        self.from_cache = from_cache
+        self.invalidate = None  # Drops the body from the cache, if cached
+
+    def text(self, errors: str = "replace") -> str:
+        return self.body.decode("utf-8", errors=errors)
+
+    def json(self):
+        """Parsed body, with stray control characters removed.
+
+        A body that does not parse (truncated, garbled) is dropped from the
+        response cache, so the next request goes back to the network.
+        """
+        try:
+            return parse_json(self.body)
+        except ValueError:
+            if self.invalidate:
+                self.invalidate()
+            raise
+
+
+def decode_body(body: bytes, encoding: str | None) -> bytes:
+    """Undo Content-Encoding gzip/deflate."""
+    encoding = (encoding or "").lower()
+    if encoding == "gzip":
+        return gzip.decompress(body)
+    if encoding == "deflate":
+        try:
+            return zlib.decompress(body)
+        except zlib.error:
+            # Some servers send raw deflate without the zlib header
+            return zlib.decompress(body, -zlib.MAX_WBITS)
+    return body
+
+
+class ConocerClient:
+    """Thread-safe keep-alive connection pool for the CONOCER backend."""
+
+    def __init__(
+        self,
+        base_url: str = API_BASE,
+        profile: str = "json",
+        pool_size: int = POOL_SIZE,
+        cache: ResponseCache | None = None,
+    ):
+        self.base_url = base_url.rstrip("/") + "/"
+        self.profile = profile
+        self.pool_size = pool_size
+        self.cache = cache
+        self._pools: dict[tuple, queue.LifoQueue] = {}
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # -- connection pool -------------------------------------------------
+
+    def _pool(self, key: tuple) -> queue.LifoQueue:
+        with self._lock:
+            if key not in self._pools:
+                self._pools[key] = queue.LifoQueue(maxsize=self.pool_size)
+            return self._pools[key]
+
+    def _connect(self, key: tuple, timeout: float):
+        scheme, host, port = key
+        if scheme == "https":
+            return http.client.HTTPSConnection(host, port, timeout=timeout)
+        return http.client.HTTPConnection(host, port, timeout=timeout)
+
+    def _checkout(self, key: tuple, timeout: float):
+        try:
+            conn = self._pool(key).get_nowait()
+        except queue.Empty:
+            return self._connect(key, timeout), False
+        conn.timeout = timeout
+        if conn.sock is not None:
+            conn.sock.settimeout(timeout)
+        return conn, True
+
+    def _checkin(self, key: tuple, conn):
+        try:
+            self._pool(key).put_nowait(conn)
+        except queue.Full:
+            conn.close()
+
+    def close(self):
+        """Close all idle pooled connections."""
+        with self._lock:
+            pools = list(self._pools.values())
+            self._pools.clear()
+        for pool in pools:
+            while True:
+                try:
+                    pool.get_nowait().close()
+                except queue.Empty:
+                    break
+
+    # -- requests --------------------------------------------------------
+
+    def url_for(self, path: str) -> str:
+        if path.startswith(("http://", "https://")):
+            return path
+        return urljoin(self.base_url, path.lstrip("/"))
+
+    def cached(
+        self,
+        method: str,
+        path: str,
+        body: bytes | None = None,
+        use_cache: bool = True,
+    ) -> bool:
+        """Whether the request would be answered from the cache."""
+        return (
+            use_cache
+            and bool(self.cache)
+            and self.cache.contains(method, self.url_for(path), body)
+        )
+
+    @staticmethod
+    def timeout_for(url: str) -> float:
+        for pattern, timeout in ENDPOINT_TIMEOUTS.items():
+            if pattern in url:
+                return timeout
+        return DEFAULT_TIMEOUT
+
+    def request(
+        self,
+        method: str,
+        path: str,
+        body: bytes | None = None,
+        headers: dict | None = None,
+        profile: str | None = None,
+        timeout: float | None = None,
+        use_cache: bool = True,
+    ) -> Response:
+        """Send a request over a pooled connection; raises HTTPError on non-2xx.
+
+        use_cache=False (refresh mode) always goes to the network; the answer
+        still replaces the cached copy. Conditional requests do the same.
+        """
+        url = self.url_for(path)
+        conditional = any(h in (headers or {}) for h in CONDITIONAL_HEADERS)
+        if self.cache and use_cache and not conditional:
+            hit = self.cache.get(method, url, body)
+            if hit:
+                status, cached_headers, content = hit
+                response = Response(status, cached_headers, content, url, True)
+                response.invalidate = partial(self.cache.delete, method, url, body)
+                if not 200 <= status < 300:
+                    raise HTTPError(status, url, content, cached_headers)
+                return response
+
+        parts = urlsplit(url)
+        port = parts.port or (443 if parts.scheme == "https" else 80)
+        key = (parts.scheme, parts.hostname, port)
+        target = parts.path or "/"
+        if parts.query:
+            target += "?" + parts.query
+
+        send_headers = dict(HEADER_PROFILES[profile or self.profile])
+        send_headers["Accept-Encoding"] = "gzip, deflate"
+        send_headers["Connection"] = "keep-alive"
+        if headers:
+            send_headers.update(headers)
+
+        timeout = timeout or self.timeout_for(url)
+
+        for attempt in range(2):
+            conn, reused = self._checkout(key, timeout)
+            try:
+                conn.request(method, target, body=body, headers=send_headers)
+                resp = conn.getresponse()
+                raw = resp.read()
+            except _STALE_ERRORS:
+                conn.close()
+                # A reused connection may have been closed by the server
+                # while idle; retry once on a fresh one.
+                if reused and attempt == 0:
+                    continue
+                raise
+            except Exception:
+                conn.close()
+                raise
+
+            if resp.will_close:
+                conn.close()
+            else:
+                self._checkin(key, conn)
+            break
+
+        response = Response(
+            resp.status,
+            {k.lower(): v for k, v in resp.getheaders()},
+            decode_body(raw, resp.getheader("Content-Encoding")),
+            url,
+        )
+        if self.cache:
+            self.cache.put(
+                method, url, body, response.status, response.headers, response.body
+            )
+            response.invalidate = partial(self.cache.delete, method, url, body)
+        if not 200 <= response.status < 300:
+            raise HTTPError(response.status, url, response.body, response.headers)
+        return response
+
+    def get(self, path: str, **kwargs) -> Response:
+        return self.request("GET", path, **kwargs)
+
+    def post(self, path: str, body: bytes | None = None, **kwargs) -> Response:
+        return self.request("POST", path, body=body, **kwargs)
+
+
+_default_client = None
+_default_lock = threading.Lock()
+
+
+def get_client() -> ConocerClient:
+    """Process-wide shared client."""
+    global _default_client
+    with _default_lock:
+        if _default_client is None:
+            _default_client = ConocerClient(cache=cache_from_env())
+        return _default_client
@@ -0,0 +1,320 @@
+#!/usr/bin/env python3
+"""
+Memory-mappable CSR form of the EC x ECE matrix.
+
+ec_ece_matrix.json spends ~400 KB of pretty-printed JSON on ~7,500 edges,
+and every consumer parses all of it before the first lookup.
+ec_ece_matrix.csr holds the same relationships as integer arrays that are
+used straight from an mmap: opening it reads a 152-byte header, and a
+lookup touches only the few pages it needs.
+
+ECs (sorted by code) and ECEs (sorted by ID) are numbered from 0. The
+file is little-endian:
+
+  header   "ECECSR\\0\\0", version, n_ecs, n_eces, nnz   (<8sIIII)
+           then (offset, size) of the 8 sections         (<16Q)
+  sections, each 8-byte aligned:
+    ec_indptr         uint32[n_ecs + 1]   row i = ec_indices[p[i]:p[i+1]]
+    ec_indices        uint32[nnz]         ECE numbers, ascending per row
+    ece_indptr        uint32[n_eces + 1]  the transpose, for ECE -> ECs
+    ece_indices       uint32[nnz]         EC numbers, ascending per column
+    ec_name_offsets   uint32[n_ecs + 1]   into ec_names
+    ece_name_offsets  uint32[n_eces + 1]  into ece_names
+    ec_names          UTF-8 EC codes, concatenated
+    ece_names         UTF-8 ECE IDs, concatenated
+
+Titles and counts stay in the JSON matrix (counts are indptr differences).
+
+Usage:
+  python ec_ece_csr.py build                     # From ec_ece_matrix.json
+  python ec_ece_csr.py stats
+  python ec_ece_csr.py eces EC0217.01            # Certifiers of an EC
+  python ec_ece_csr.py ecs ECE-00001             # ECs of a certifier
+  python ec_ece_csr.py common EC0217.01 EC0301   # Certifiers shared by ECs
+"""
+
+import mmap
+import os
+import struct
+import sys
+import time
+from array import array
+from pathlib import Path
+
+from json_stream import iter_json
+
+OUTPUT_DIR = Path(__file__).parent.parent.parent / "data" / "extracted"
+CSR_FILE = OUTPUT_DIR / "ec_ece_matrix.csr"
+MATRIX_FILE = OUTPUT_DIR / "ec_ece_matrix.json"
+ECE_REGISTRY_FILE = OUTPUT_DIR / "master_ece_registry.json"
+
+MAGIC = b"ECECSR\0\0"
+VERSION = 1
+HEADER = struct.Struct("<8sIIII")
+SECTIONS = struct.Struct("<16Q")
+HEADER_SIZE = HEADER.size + SECTIONS.size
+ALIGN = 8
+LITTLE_ENDIAN = sys.byteorder == "little"
+
+(
+    EC_INDPTR,
+    EC_INDICES,
+    ECE_INDPTR,
+    ECE_INDICES,
+    EC_NAME_OFFSETS,
+    ECE_NAME_OFFSETS,
+    EC_NAMES,
+    ECE_NAMES,
+) = range(8)
+
+
+def _u32(values) -> bytes:
+    arr = array("I", values)
+    if not LITTLE_ENDIAN:
+        arr.byteswap()
+    return arr.tobytes()
+
+
+def _name_table(names: list[str]) -> tuple[bytes, bytes]:
+    """(offsets, blob) for a list of strings."""
+    encoded = [name.encode("utf-8") for name in names]
+    offsets = [0]
+    for raw in encoded:
+        offsets.append(offsets[-1] + len(raw))
+    return _u32(offsets), b"".join(encoded)
+
+
+def _indptr_indices(rows: list[list[int]]) -> tuple[bytes, bytes]:
+    indptr = [0]
+    for row in rows:
+        indptr.append(indptr[-1] + len(row))
+    return _u32(indptr), _u32(i for row in rows for i in row)
+
+
+def write_csr(matrix: dict, ece_ids, path: Path = CSR_FILE) -> dict:
+    """Write `matrix` ({ec_code: {"ece_ids": [...]}}) as CSR; returns counts.
+
+    `ece_ids` is every ECE in the registry, so certifiers without ECs still
+    get a number. Written to a temp file and renamed into place.
+    """
+    ec_codes = sorted(matrix)
+    ece_names = sorted(
+        set(ece_ids).union(e for info in matrix.values() for e in info["ece_ids"])
+    )
+    ece_number = {ece_id: j for j, ece_id in enumerate(ece_names)}
+
+    rows = [sorted(ece_number[e] for e in matrix[c]["ece_ids"]) for c in ec_codes]
+    cols = [[] for _ in ece_names]
+    for i, row in enumerate(rows):
+        for j in row:
+            cols[j].append(i)  # ECs are visited in order: columns stay sorted
+
+    sections = [
+        *_indptr_indices(rows),
+        *_indptr_indices(cols),
+    ]
+    ec_offsets, ec_blob = _name_table(ec_codes)
+    ece_offsets, ece_blob = _name_table(ece_names)
+    sections += [ec_offsets, ece_offsets, ec_blob, ece_blob]
+
+    layout = []
+    pos = HEADER_SIZE
+    for data in sections:
+        pos += -pos % ALIGN
+        layout += [pos, len(data)]
+        pos += len(data)
+    nnz = sum(len(row) for row in rows)
+
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, len(ec_codes), len(ece_names), nnz))
+        f.write(SECTIONS.pack(*layout))
+        for offset, data in zip(layout[::2], sections):
+            f.write(b"\0" * (offset - f.tell()))
+            f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+    return {"ecs": len(ec_codes), "eces": len(ece_names), "edges": nnz}
+
+
+class CsrMatrix:
+    """Read-only EC x ECE matrix over an mmap of ec_ece_matrix.csr.
+
+    Arrays are memoryviews into the mapping (no copy, no parse); the
+    file's pages are loaded by the OS as lookups touch them. Lookups
+    return copies; anyone slicing the section views directly must drop
+    those slices before close().
+    """
+
+    def __init__(self, path: Path = CSR_FILE):
+        self.path = Path(path)
+        with open(self.path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.n_ecs, self.n_eces, self.nnz = HEADER.unpack_from(
+            self._mm
+        )
+        if magic != MAGIC or version != VERSION:
+            self._mm.close()
+            raise ValueError(f"{self.path}: not a version {VERSION} EC-ECE CSR file")
+        layout = SECTIONS.unpack_from(self._mm, HEADER.size)
+        self._views = []
+        self.sections = [
+            self._section(offset, size, i < EC_NAMES)
+            for i, (offset, size) in enumerate(zip(layout[::2], layout[1::2]))
+        ]
+        self.ec_indptr = self.sections[EC_INDPTR]
+        self.ec_indices = self.sections[EC_INDICES]
+        self.ece_indptr = self.sections[ECE_INDPTR]
+        self.ece_indices = self.sections[ECE_INDICES]
+
+    def _section(self, offset: int, size: int, u32: bool):
+        view = memoryview(self._mm)[offset : offset + size]
+        self._views.append(view)
+        if not u32:
+            return view
+        if LITTLE_ENDIAN:
+            cast = view.cast("I")
+            self._views.append(cast)
+            return cast
+        arr = array("I", view.tobytes())  # Big-endian hosts pay one copy
+        arr.byteswap()
+        return arr
+
+    def close(self):
+        for view in reversed(self._views):
+            view.release()
+        self._views.clear()
+        self._mm.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # -- names -----------------------------------------------------------
+
+    def _name(self, offsets_section: int, blob_section: int, i: int) -> str:
+        offsets = self.sections[offsets_section]
+        blob = self.sections[blob_section]
+        return bytes(blob[offsets[i] : offsets[i + 1]]).decode("utf-8")
+
+    def _find(self, offsets_section: int, blob_section: int, n: int, name: str):
+        """Binary search over a sorted name table; None if absent."""
+        lo, hi = 0, n
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._name(offsets_section, blob_section, mid) < name:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < n and self._name(offsets_section, blob_section, lo) == name:
+            return lo
+        return None
+
+    def ec_code(self, i: int) -> str:
+        return self._name(EC_NAME_OFFSETS, EC_NAMES, i)
+
+    def ece_id(self, j: int) -> str:
+        return self._name(ECE_NAME_OFFSETS, ECE_NAMES, j)
+
+    def ec_index(self, ec_code: str) -> int | None:
+        return self._find(EC_NAME_OFFSETS, EC_NAMES, self.n_ecs, ec_code)
+
+    def ece_index(self, ece_id: str) -> int | None:
+        return self._find(ECE_NAME_OFFSETS, ECE_NAMES, self.n_eces, ece_id)
+
+    # -- relationships ---------------------------------------------------
+
+    def row(self, i: int) -> array:
+        """ECE numbers of EC number i (ascending).
+
+        A copy: views into the mapping would keep close() from unmapping it.
+        """
+        return array("I", self.ec_indices[self.ec_indptr[i] : self.ec_indptr[i + 1]])
+
+    def col(self, j: int) -> array:
+        """EC numbers of ECE number j (ascending); a copy, like row()."""
+        return array(
+            "I", self.ece_indices[self.ece_indptr[j] : self.ece_indptr[j + 1]]
+        )
+
+    def eces_for(self, ec_code: str) -> list[str]:
+        i = self.ec_index(ec_code)
+        return [] if i is None else [self.ece_id(j) for j in self.row(i)]
+
+    def ecs_for(self, ece_id: str) -> list[str]:
+        j = self.ece_index(ece_id)
+        return [] if j is None else [self.ec_code(i) for i in self.col(j)]
+
+    def common_eces(self, *ec_codes: str) -> list[str]:
+        """Certifiers that certify every one of `ec_codes`."""
+        found = _intersect(self.row, [self.ec_index(c) for c in ec_codes])
+        return [self.ece_id(j) for j in found]
+
+    def common_ecs(self, *ece_ids: str) -> list[str]:
+        """ECs certified by every one of `ece_ids`."""
+        found = _intersect(self.col, [self.ece_index(e) for e in ece_ids])
+        return [self.ec_code(i) for i in found]
+
+
+def _intersect(vector, numbers: list) -> list[int]:
+    """Sorted intersection of vector(n) over `numbers`, smallest first."""
+    if not numbers or None in numbers:
+        return []
+    vectors = sorted((vector(n) for n in numbers), key=len)
+    common = set(vectors[0])
+    for other in vectors[1:]:
+        common.intersection_update(other)
+        if not common:
+            break
+    return sorted(common)
+
+
+def build_from_json(
+    matrix_file: Path = MATRIX_FILE,
+    ece_file: Path = ECE_REGISTRY_FILE,
+    path: Path = CSR_FILE,
+) -> dict:
+    """Convert the current JSON matrix (e.g. without rebuilding registries)."""
+    matrix = dict(iter_json(matrix_file, "matrix"))
+    ece_ids = [ece["id"] for ece in iter_json(ece_file, "registry")]
+    return write_csr(matrix, ece_ids, path)
+
+
+def main():
+    command = sys.argv[1] if len(sys.argv) > 1 else "stats"
+    args = sys.argv[2:]
+
+    if command == "build":
+        counts = build_from_json()
+        print(f"✅ Saved {CSR_FILE} ({CSR_FILE.stat().st_size / 1024:.0f} KB)")
+        for name, n in counts.items():
+            print(f"   {name}: {n:,}")
+        return
+
+    start = time.perf_counter()
+    with CsrMatrix() as csr:
+        opened = (time.perf_counter() - start) * 1000
+        if command == "stats":
+            print(f"{csr.path} ({csr.path.stat().st_size / 1024:.0f} KB)")
+            print(f"   ECs: {csr.n_ecs:,}  ECEs: {csr.n_eces:,}  edges: {csr.nnz:,}")
+            print(f"   opened in {opened:.2f} ms")
+            return
+        if command == "eces" and len(args) == 1:
+            result = csr.eces_for(args[0].upper())
+        elif command == "ecs" and len(args) == 1:
+            result = csr.ecs_for(args[0].upper())
+        elif command == "common" and args:
+            result = csr.common_eces(*(a.upper() for a in args))
+        else:
+            print(__doc__)
+            sys.exit(1)
+        elapsed = (time.perf_counter() - start) * 1000
+    print(" ".join(result))
+    print(f"{len(result)} results in {elapsed:.2f} ms (open + lookup)")
+
+
+if __name__ == "__main__":
+    main()
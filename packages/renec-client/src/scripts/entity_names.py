@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Entity name normalization shared by the ECE, CCAP and matrix builders.
+
+The same few hundred certifier names recur across thousands of EC
+relationships, so patterns are compiled once and results are memoized on
+the raw name in bounded LRU caches.
+"""
+
+import re
+from functools import lru_cache
+
+NORMALIZE_CACHE_SIZE = 8192
+
+# Legal-form suffixes dropped from normalized keys
+SUFFIX_RE = re.compile(r"\s*(s\.?a\.?\s*de\s*c\.?v\.?|s\.?c\.?|a\.?c\.?)\s*$", re.I)
+WHITESPACE_RE = re.compile(r"\s+")
+PUNCTUATION_RE = re.compile(r"[.,;:]+")
+
+# Legal entity types, checked in order
+ENTITY_TYPE_PATTERNS = (
+    ("SA de CV", re.compile(r"s\.?a\.?\s*de\s*c\.?v\.?", re.I)),
+    ("SC", re.compile(r"s\.?c\.?", re.I)),
+    ("AC", re.compile(r"a\.?c\.?", re.I)),
+)
+
+
+@lru_cache(maxsize=NORMALIZE_CACHE_SIZE)
+def normalize_name(name: str) -> str:
+    """Normalize entity names for deduplication."""
+    if not name:
+        return ""
+    # Lowercase, strip whitespace
+    n = name.lower().strip()
+    # Remove common suffixes/variations
+    n = SUFFIX_RE.sub("", n)
+    # Remove extra whitespace
+    n = WHITESPACE_RE.sub(" ", n)
+    # Remove punctuation except essential
+    n = PUNCTUATION_RE.sub("", n)
+    return n.strip()
+
+
+@lru_cache(maxsize=NORMALIZE_CACHE_SIZE)
+def entity_type(name: str) -> str:
+    """Legal entity type detected in a raw name, or "Unknown"."""
+    for label, pattern in ENTITY_TYPE_PATTERNS:
+        if pattern.search(name):
+            return label
+    return "Unknown"
+
+
+def extract_entity_info(name: str) -> dict:
+    """Extract additional info from entity name if available."""
+    return {
+        "original_name": name,
+        "normalized": normalize_name(name),
+        "entity_type": entity_type(name),
+    }
+
+
+def cache_info() -> dict:
+    """Hit/miss counters of both caches, for benchmarks and logs."""
+    return {
+        "normalize_name": normalize_name.cache_info()._asdict(),
+        "entity_type": entity_type.cache_info()._asdict(),
+    }
+
+
+def clear_caches():
+    normalize_name.cache_clear()
+    entity_type.cache_clear()
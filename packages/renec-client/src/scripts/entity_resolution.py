@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Fuzzy entity resolution for registry keys.
+
+Exact normalize_name keys leave accent, typo and abbreviation variants of the
+same entity apart ("universidad autònoma de chiapas" vs "universidad autónoma
+de chiapas"). Comparing every pair of names is quadratic, so keys are first
+grouped into blocks by phonetic token prefixes; only keys sharing a block are
+scored, and blocks larger than MAX_BLOCK_SIZE (keys made of very common words
+like "universidad") are skipped.
+
+Whole-string similarity is a poor signal here: sibling institutions differ by
+a single word ("... del estado de sinaloa" / "... de sonora") and would score
+above any useful threshold. The scorer instead pairs up the tokens the two
+names do NOT share and only accepts the match if every such pair is a typo
+(character similarity >= TOKEN_SIMILARITY) or an abbreviation (prefix).
+"""
+
+import unicodedata
+from collections import Counter, defaultdict
+from difflib import SequenceMatcher
+from itertools import combinations
+
+MAX_BLOCK_SIZE = 64  # Keys sharing one blocking key before it is ignored
+BLOCK_PREFIX = 4  # Phonetic prefix length used as blocking key
+TOKEN_SIMILARITY = 0.85  # Minimum ratio for two differing tokens to be a typo
+MAX_TOKEN_EDITS = 2  # Differing tokens allowed per name
+# Tokens of this length that prefix a longer token count as abbreviations
+# ("univ", "inst", "tec"); longer prefixes are usually other words
+# ("tecám" / "tecamachalco" are different cities)
+ABBREVIATION_LENGTHS = (3, 4)
+
+STOPWORDS = frozenset(
+    "a al c de del e el en la las lo los para por s sa cv sc ac y".split()
+)
+
+
+def fold(text: str) -> str:
+    """Lowercase, strip accents and turn punctuation into spaces."""
+    decomposed = unicodedata.normalize("NFKD", text.lower())
+    stripped = "".join(c for c in decomposed if not unicodedata.combining(c))
+    return "".join(c if c.isalnum() else " " for c in stripped)
+
+
+def tokens(key: str) -> tuple:
+    return tuple(t for t in fold(key).split() if t not in STOPWORDS)
+
+
+def phonetic(token: str) -> str:
+    """Rough Spanish phonetic code: letters that sound alike map together."""
+    t = token.replace("ll", "y").replace("qu", "k").replace("h", "")
+    t = t.replace("ce", "se").replace("ci", "si").replace("z", "s")
+    t = t.replace("v", "b").replace("c", "k").replace("j", "g")
+    out = []
+    for ch in t:
+        if not out or out[-1] != ch:
+            out.append(ch)
+    return "".join(out)
+
+
+def blocking_keys(toks: tuple) -> set:
+    """Phonetic token prefixes, qualified by token count.
+
+    similarity() only ever matches keys with the same number of tokens, so
+    keys of different lengths never need to share a block.
+    """
+    return {(len(toks), phonetic(t)[:BLOCK_PREFIX]) for t in toks}
+
+
+def _token_match(a: str, b: str) -> float:
+    """Similarity of two differing tokens, 0.0 if they must not be merged."""
+    if a.isdigit() or b.isdigit():
+        return 0.0
+    short, long = sorted((a, b), key=len)
+    if len(short) in ABBREVIATION_LENGTHS and long.startswith(short):
+        return TOKEN_SIMILARITY
+    ratio = SequenceMatcher(None, a, b).ratio()
+    return ratio if ratio >= TOKEN_SIMILARITY else 0.0
+
+
+def similarity(a: tuple, b: tuple) -> float:
+    """Token-level similarity of two keys, 0.0 when they are distinct entities."""
+    if not a or len(a) != len(b):
+        return 0.0
+    if len(set(a) & set(b)) < len(a) - MAX_TOKEN_EDITS:
+        return 0.0
+    only_a = sorted((Counter(a) - Counter(b)).elements())
+    only_b = sorted((Counter(b) - Counter(a)).elements())
+    if not only_a and not only_b:
+        return 1.0
+    if len(only_a) != len(only_b) or len(only_a) > MAX_TOKEN_EDITS:
+        return 0.0
+
+    total = 0.0
+    remaining = list(only_b)
+    for token in only_a:
+        best, best_score = None, 0.0
+        for candidate in remaining:
+            score = _token_match(token, candidate)
+            if score > best_score:
+                best, best_score = candidate, score
+        if best is None:
+            return 0.0
+        remaining.remove(best)
+        total += best_score
+
+    shared = max(len(a), len(b)) - len(only_a)
+    return round((shared + total) / max(len(a), len(b)), 3)
+
+
+class _UnionFind:
+    def __init__(self):
+        self.parent = {}
+
+    def find(self, x):
+        self.parent.setdefault(x, x)
+        while self.parent[x] != x:
+            self.parent[x] = self.parent[self.parent[x]]
+            x = self.parent[x]
+        return x
+
+    def union(self, a, b):
+        self.parent[self.find(a)] = self.find(b)
+
+
+def resolve(keys) -> list:
+    """Group near-duplicate keys.
+
+    Returns one dict per cluster of two or more keys, mapping each member
+    key to the best similarity score that linked it into the cluster.
+    """
+    toks = {key: tokens(key) for key in keys}
+
+    blocks = defaultdict(list)
+    for key, key_tokens in toks.items():
+        for block in blocking_keys(key_tokens):
+            blocks[block].append(key)
+
+    # Oversized blocks are skipped; a key with no other block is compared
+    # against its smallest one only, so no block is ever scored all-pairs
+    usable = {b for b, members in blocks.items() if len(members) <= MAX_BLOCK_SIZE}
+    candidates = set()
+    for block in usable:
+        for a, b in combinations(sorted(blocks[block]), 2):
+            candidates.add((a, b))
+    for key, key_tokens in toks.items():
+        own = blocking_keys(key_tokens)
+        if own and not own & usable:
+            smallest = min(own, key=lambda b: len(blocks[b]))
+            for other in blocks[smallest][:MAX_BLOCK_SIZE]:
+                if other != key:
+                    candidates.add(tuple(sorted((key, other))))
+
+    links = _UnionFind()
+    scores = {}
+    for a, b in candidates:
+        score = similarity(toks[a], toks[b])
+        if score:
+            links.union(a, b)
+            scores[a] = max(scores.get(a, 0.0), score)
+            scores[b] = max(scores.get(b, 0.0), score)
+
+    clusters = defaultdict(dict)
+    for key in scores:
+        clusters[links.find(key)][key] = scores[key]
+    return sorted(clusters.values(), key=lambda c: sorted(c))
@@ -12,6 +12,8 @@ import * as path from 'path';
 
 // Output directory
 const OUTPUT_DIR = path.join(__dirname, '../../data/extracted');
+// Overridable, e.g. to point at mock_conocer.py
+const SPA_URL = process.env.CONOCER_SPA_URL ?? 'https://conocer.gob.mx/conocer/';
 
 // Ensure output directory exists
 if (!fs.existsSync(OUTPUT_DIR)) {
@@ -106,7 +108,7 @@ async function cleanup() {
 async function extractAllECs(): Promise<void> {
   console.log('\n📊 PHASE 1: Extracting ALL EC Standards...\n');
 
-  await page.goto('https://conocer.gob.mx/conocer/#/renec', { waitUntil: 'networkidle' });
+  await page.goto(`${SPA_URL}#/renec`, { waitUntil: 'networkidle' });
 
   // Wait for table to load
   await page.waitForSelector('[role="gridcell"]', { timeout: 30000 });
@@ -198,7 +200,7 @@ async function extractECDetails(maxItems?: number): Promise<void> {
 
     try {
       // Navigate to RENEC page first
-      await page.goto('https://conocer.gob.mx/conocer/#/renec', { waitUntil: 'networkidle' });
+      await page.goto(`${SPA_URL}#/renec`, { waitUntil: 'networkidle' });
       await page.waitForSelector('[role="gridcell"]', { timeout: 15000 });
       await page.waitForTimeout(1000);
 
@@ -336,7 +338,7 @@ async function extractECDetails(maxItems?: number): Promise<void> {
 async function extractProductiveSectors(): Promise<void> {
   console.log('\n📊 PHASE 3: Extracting Productive Sectors...\n');
 
-  await page.goto('https://conocer.gob.mx/conocer/#/sectoresProductivos', { waitUntil: 'networkidle' });
+  await page.goto(`${SPA_URL}#/sectoresProductivos`, { waitUntil: 'networkidle' });
   await page.waitForTimeout(3000);
 
   // Extract sector names from paragraphs
@@ -369,7 +371,7 @@ async function extractProductiveSectors(): Promise<void> {
 async function extractOccupationalSectors(): Promise<void> {
   console.log('\n📊 PHASE 4: Extracting Occupational Sectors...\n');
 
-  await page.goto('https://conocer.gob.mx/conocer/#/sectoresOrganizacionales', { waitUntil: 'networkidle' });
+  await page.goto(`${SPA_URL}#/sectoresOrganizacionales`, { waitUntil: 'networkidle' });
   await page.waitForTimeout(3000);
 
   // Find occupation sector cards
@@ -9,6 +9,9 @@ import * as fs from "fs";
 import * as path from "path";
 
 const OUTPUT_DIR = "./data/extracted";
+// Overridable, e.g. to point at mock_conocer.py
+const API_BASE =
+  process.env.CONOCER_API_BASE ?? "https://conocer.gob.mx/CONOCERBACKCITAS";
 const DELAY_MS = 100;
 
 interface Committee {
@@ -77,7 +80,7 @@ async function extractCommittees(): Promise<Committee[]> {
   let consecutiveNotFound = 0;
 
   for (let id = 1; id <= maxId; id++) {
-    const url = `https://conocer.gob.mx/CONOCERBACKCITAS/comites/${id}`;
+    const url = `${API_BASE}/comites/${id}`;
     const data = await fetchJSON<{
       responseStatus: number;
       results: Committee;
@@ -114,8 +117,7 @@ async function extractCommittees(): Promise<Committee[]> {
 async function extractAllECStandards(): Promise<ECStandard[]> {
   console.log("📋 Fetching all EC standards from API...");
 
-  const url =
-    "https://conocer.gob.mx/CONOCERBACKCITAS/sectoresProductivos/getEstandaresAll";
+  const url = `${API_BASE}/sectoresProductivos/getEstandaresAll`;
   const data = await fetchJSON<ECStandard[]>(url);
 
   if (!data) {
@@ -262,8 +264,8 @@ function saveData(
         ...stats,
         extractedAt: new Date().toISOString(),
         apiEndpoints: [
-          "https://conocer.gob.mx/CONOCERBACKCITAS/sectoresProductivos/getEstandaresAll",
-          "https://conocer.gob.mx/CONOCERBACKCITAS/comites/{id}",
+          `${API_BASE}/sectoresProductivos/getEstandaresAll`,
+          `${API_BASE}/comites/{id}`,
         ],
       },
       null,
@@ -2,25 +2,59 @@
 """
 Batch EC Certifier Extractor
 Extracts certifiers for all EC standards using Playwright.
-Uses fresh page per EC for reliability.
+ECs are spread over a pool of warm pages, each in its own browser context
+that is recycled after a fixed number of ECs to bound Chromium memory.
+
+Usage:
+  python extract_certifiers_batch.py                # DOM scraping
+  python extract_certifiers_batch.py --intercept    # Capture the SPA's JSON XHRs
+  python extract_certifiers_batch.py --workers 6 --recycle-after 100
+  python extract_certifiers_batch.py --worker w1    # Sharded, see harvest_shards.py
+  python extract_certifiers_batch.py --merge        # Fold shard journals in
 """
 
+import argparse
 import asyncio
 import json
-import time
+import unicodedata
 from datetime import datetime
 from pathlib import Path
 
 from playwright.async_api import async_playwright
 
+from checkpoint_journal import CheckpointJournal
+from conocer_http import API_BASE as BACKEND_BASE
+from conocer_http import RENEC_URL
+from harvest_shards import add_worker_arguments, merge_shards, worker_from_args
+from harvest_store import CERTIFIERS, certifiers_output, open_store
+from json_sanitize import parse_json
+from page_readiness import (
+    LatencyStats,
+    StepTimer,
+    click_and_wait_for_response,
+    wait_for_angular_stable,
+    wait_for_detail,
+)
+from run_status import WRITE_INTERVAL, StatusWriter
+
 # Configuration
 OUTPUT_DIR = Path(__file__).parent.parent.parent / "data" / "extracted"
 CHECKPOINT_FILE = OUTPUT_DIR / "certifiers_checkpoint.json"
 OUTPUT_FILE = OUTPUT_DIR / "ec_certifiers_all.json"
 BATCH_SAVE_SIZE = 20
+WORKERS = 4  # Parallel warm pages
+RECYCLE_AFTER = 50  # ECs per browser context before it is recycled
+MAX_RETRIES = 2
+
+API_BASE = f"{BACKEND_BASE}/sectoresProductivos"
+INTERCEPT_ENDPOINTS = ("getDescEstandar", "getDatosGeneralesComite")
+INTERCEPT_TIMEOUT = 15  # Seconds to wait for an intercepted response
 
 OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
 
+# Per-EC results are appended here; CHECKPOINT_FILE is rebuilt from it
+journal = CheckpointJournal(CHECKPOINT_FILE, fsync_every=BATCH_SAVE_SIZE)
+
 EXTRACT_SCRIPT = """
 () => {
     const result = {
@@ -70,42 +104,22 @@ def load_ec_codes() -> list[str]:
 
 
 def load_checkpoint() -> dict:
-    """Load checkpoint."""
-    if CHECKPOINT_FILE.exists():
-        with open(CHECKPOINT_FILE, "r", encoding="utf-8") as f:
-            return json.load(f)
-    return {"processed": [], "failed": [], "data": {}}
+    """Load checkpoint snapshot plus journal, folding the journal in."""
+    checkpoint = journal.load()
+    if journal.journal_file.exists():
+        journal.compact(checkpoint)
+    return checkpoint
 
 
 def save_checkpoint(checkpoint: dict):
-    """Save checkpoint."""
-    checkpoint["last_updated"] = datetime.now().isoformat()
-    with open(CHECKPOINT_FILE, "w", encoding="utf-8") as f:
-        json.dump(checkpoint, f, ensure_ascii=False)
+    """Materialize the full checkpoint JSON (end of run)."""
+    journal.compact(checkpoint)
 
 
 def save_final(checkpoint: dict):
     """Save final output."""
-    total_certs = sum(len(v.get("certifiers", [])) for v in checkpoint["data"].values())
-    total_courses = sum(len(v.get("courses", [])) for v in checkpoint["data"].values())
-
-    # Build unique certifier list
-    all_certifiers = set()
-    for ec_data in checkpoint["data"].values():
-        all_certifiers.update(ec_data.get("certifiers", []))
-
-    output = {
-        "extraction_date": datetime.now().isoformat(),
-        "summary": {
-            "ecs_processed": len(checkpoint["data"]),
-            "ecs_failed": len(checkpoint["failed"]),
-            "total_certifier_relationships": total_certs,
-            "total_course_relationships": total_courses,
-            "unique_certifiers": len(all_certifiers),
-        },
-        "failed_ecs": checkpoint["failed"],
-        "ec_details": checkpoint["data"],
-    }
+    output, all_certifiers = certifiers_output(checkpoint)
+    total_certs = output["summary"]["total_certifier_relationships"]
 
     with open(OUTPUT_FILE, "w", encoding="utf-8") as f:
         json.dump(output, f, indent=2, ensure_ascii=False)
@@ -113,7 +127,7 @@ def save_final(checkpoint: dict):
     # Also save unique certifiers list
     certifiers_file = OUTPUT_DIR / "unique_certifiers.json"
     with open(certifiers_file, "w", encoding="utf-8") as f:
-        json.dump(sorted(all_certifiers), f, indent=2, ensure_ascii=False)
+        json.dump(all_certifiers, f, indent=2, ensure_ascii=False)
 
     print(f"\n✅ Saved to {OUTPUT_FILE}")
     print(f"   ECs processed: {len(checkpoint['data'])}")
@@ -121,46 +135,304 @@ def save_final(checkpoint: dict):
     print(f"   Unique certifiers: {len(all_certifiers)}")
 
 
-async def process_ec(browser, ec_code: str, retry: int = 0) -> dict | None:
-    """Process a single EC with fresh page."""
-    page = await browser.new_page()
-    try:
-        await page.goto(
-            "https://conocer.gob.mx/conocer/#/renec",
-            wait_until="networkidle",
-            timeout=60000,
-        )
-        await page.wait_for_timeout(3000)
+async def scrape_ec(page, ec_code: str) -> dict:
+    """Search for an EC on a warm RENEC page and scrape its detail view."""
+    timer = StepTimer()
 
+    async with timer.step("search_view"):
+        # Hash navigation back to the search view; the SPA itself stays loaded
+        await page.evaluate("() => { window.location.hash = '#/renec'; }")
         await page.wait_for_selector("input", timeout=30000)
+        await wait_for_angular_stable(page)
+
+    async with timer.step("search"):
         search = page.locator("input").first
         await search.fill(ec_code)
-        await page.wait_for_timeout(1000)
         await search.press("Enter")
-        await page.wait_for_timeout(3000)
-
         result = page.get_by_text(ec_code, exact=False).first
-        await result.click(timeout=10000)
-        await page.wait_for_timeout(3000)
+        await result.wait_for(state="visible", timeout=10000)
 
+    async with timer.step("detail"):
+        await click_and_wait_for_response(page, result, "getDescEstandar")
+        if not await wait_for_detail(page, ec_code):
+            raise TimeoutError(f"{ec_code} detail view did not render")
+
+    async with timer.step("extract"):
         data = await page.evaluate(EXTRACT_SCRIPT)
-        data["ec_code"] = ec_code
-        data["extraction_time"] = datetime.now().isoformat()
 
-        return data
+    data["ec_code"] = ec_code
+    data["extraction_time"] = datetime.now().isoformat()
+    data["timings_ms"] = timer.steps
+
+    return data
+
+
+# In-page fetch so requests carry the SPA's origin, cookies and session
+FETCH_SCRIPT = """
+async ({url, method, body}) => {
+    const response = await fetch(url, {
+        method,
+        body: body === null ? undefined : body,
+        credentials: 'include',
+        headers: {
+            'Accept': 'application/json, text/plain, */*',
+            'Content-Type': 'application/json'
+        }
+    });
+    return response.status;
+}
+"""
+
+# Payload list keys (accent-free, lowercase) -> checkpoint record field
+PAYLOAD_LIST_FIELDS = (
+    ("certificador", "certifiers"),
+    ("entidadcertificadora", "certifiers"),
+    ("curso", "courses"),
+    ("ocupacion", "occupations"),
+    ("integrante", "committee_members"),
+)
+PAYLOAD_NAME_KEYS = (
+    "nombre",
+    "razonSocial",
+    "nombreEntidad",
+    "nombreCurso",
+    "descripcion",
+    "ocupacion",
+    "titulo",
+)
+
+
+def _plain_key(key: str) -> str:
+    key = unicodedata.normalize("NFKD", key).encode("ascii", "ignore").decode()
+    return key.lower()
+
+
+def _item_name(item) -> str:
+    """Display text of a list entry, as the grid cell would show it."""
+    if isinstance(item, str):
+        return item.strip()
+    if isinstance(item, dict):
+        for key in PAYLOAD_NAME_KEYS:
+            if isinstance(item.get(key), str) and item[key].strip():
+                return item[key].strip()
+        for value in item.values():
+            if isinstance(value, str) and value.strip():
+                return value.strip()
+    return ""
+
+
+def _walk_payload(node, record: dict, refs: dict):
+    if isinstance(node, dict):
+        for key, value in node.items():
+            plain = _plain_key(key)
+            if plain == "idcomite" and value is not None:
+                refs.setdefault("id_comite", value)
+            elif plain == "titulo" and isinstance(value, str):
+                refs.setdefault("titulo", value.strip())
+            if isinstance(value, list):
+                field = next((f for k, f in PAYLOAD_LIST_FIELDS if k in plain), None)
+                if field:
+                    names = [n for n in map(_item_name, value) if n]
+                    record[field].extend(n for n in names if n not in record[field])
+                    continue
+            _walk_payload(value, record, refs)
+    elif isinstance(node, list):
+        for item in node:
+            _walk_payload(item, record, refs)
+
+
+def record_from_payloads(ec_code: str, *payloads) -> tuple[dict, dict]:
+    """Map intercepted JSON payloads onto the DOM extractor's record shape."""
+    record = {
+        "title": "",
+        "certifiers": [],
+        "courses": [],
+        "occupations": [],
+        "committee_members": [],
+    }
+    refs = {}
+    for payload in payloads:
+        if payload:
+            _walk_payload(payload, record, refs)
+
+    title = refs.get("titulo", "")
+    if title and not title.startswith(ec_code):
+        title = f"{ec_code}-{title}"
+    record["title"] = title
+    return record, refs
+
+
+class XhrCapture:
+    """Collects the JSON bodies of the SPA's backend XHRs as they complete.
+
+    Listens on page "response" events, so it sees both the SPA's own calls
+    and the ones replayed through FETCH_SCRIPT. The first request the SPA
+    makes to each endpoint is kept as a template (method + body) so replays
+    look exactly like the real thing.
+    """
+
+    def __init__(self, page):
+        self.page = page
+        self.templates = {}
+        self._payloads = {}
+        self._waiters = {}
+        page.on("response", self.on_response)
+
+    @staticmethod
+    def _match(url: str) -> tuple[str, str] | None:
+        for endpoint in INTERCEPT_ENDPOINTS:
+            if endpoint in url:
+                key = url.split("?")[0].rstrip("/").rsplit("/", 1)[-1]
+                return endpoint, key
+        return None
+
+    async def on_response(self, response):
+        match = self._match(response.url)
+        if not match:
+            return
+        endpoint, key = match
+        try:
+            data = parse_json(await response.body())
+        except Exception:
+            data = None
+
+        request = response.request
+        if response.ok and endpoint not in self.templates:
+            self.templates[endpoint] = (request.method, request.post_data, key)
+
+        self._payloads[match] = data
+        waiter = self._waiters.pop(match, None)
+        if waiter and not waiter.done():
+            waiter.set_result(data)
+
+    def _request_for(self, endpoint: str, key: str) -> tuple[str, str | None]:
+        method, body, template_key = self.templates.get(endpoint, ("POST", None, ""))
+        if body and template_key:
+            body = body.replace(template_key, key)
+        return method, body
+
+    async def fetch(self, endpoint: str, key: str):
+        """Replay an endpoint call in-page and return its intercepted JSON."""
+        match = (endpoint, str(key))
+        if match in self._payloads:
+            return self._payloads.pop(match)
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters[match] = waiter
+        method, body = self._request_for(endpoint, str(key))
+        try:
+            await self.page.evaluate(
+                FETCH_SCRIPT,
+                {"url": f"{API_BASE}/{endpoint}/{key}", "method": method, "body": body},
+            )
+            return await asyncio.wait_for(waiter, INTERCEPT_TIMEOUT)
+        finally:
+            self._waiters.pop(match, None)
+            self._payloads.pop(match, None)
+
+
+async def process_ec_intercept(capture: XhrCapture, ec_code: str) -> dict | None:
+    """Build an EC record from getDescEstandar/getDatosGeneralesComite JSON."""
+    try:
+        desc = await capture.fetch("getDescEstandar", ec_code)
+        comite = None
+        _, refs = record_from_payloads(ec_code, desc)
+        if refs.get("id_comite") is not None:
+            comite = await capture.fetch("getDatosGeneralesComite", refs["id_comite"])
+    except Exception:
+        return None
+
+    data, _ = record_from_payloads(ec_code, desc, comite)
+    if not (data["title"] or data["certifiers"]):
+        return None
 
-    except Exception as e:
-        if retry < 2:
-            await page.close()
-            await asyncio.sleep(2)
-            return await process_ec(browser, ec_code, retry + 1)
+    data["ec_code"] = ec_code
+    data["source"] = "xhr"
+    data["extraction_time"] = datetime.now().isoformat()
+    return data
+
+
+class PageWorker:
+    """A warm RENEC page in its own browser context.
+
+    The context is torn down and reopened every `recycle_after` ECs (and
+    after a failed scrape) so long runs don't accumulate Chromium memory or
+    a wedged SPA state.
+    """
+
+    def __init__(self, browser, worker_id: int, recycle_after: int, intercept: bool):
+        self.browser = browser
+        self.worker_id = worker_id
+        self.recycle_after = recycle_after
+        self.intercept = intercept
+        self.context = None
+        self.page = None
+        self.capture = None
+        self.served = 0
+
+    async def open(self):
+        self.context = await self.browser.new_context()
+        self.page = await self.context.new_page()
+        # The capture listens even in DOM mode fallbacks, learning the SPA's
+        # own request shape for later replays.
+        self.capture = XhrCapture(self.page) if self.intercept else None
+        await self.page.goto(RENEC_URL, wait_until="networkidle", timeout=60000)
+        await self.page.wait_for_selector("input", timeout=30000)
+        self.served = 0
+
+    async def close(self):
+        if self.context:
+            try:
+                await self.context.close()
+            except Exception:
+                pass
+        self.context = self.page = self.capture = None
+
+    async def extract(self, ec_code: str) -> dict | None:
+        if self.served >= self.recycle_after:
+            await self.close()  # Reopened lazily below
+
+        for retry in range(MAX_RETRIES + 1):
+            try:
+                if self.page is None:
+                    await self.open()
+                self.served += 1
+
+                if self.capture and retry == 0:
+                    data = await process_ec_intercept(self.capture, ec_code)
+                    if data:
+                        return data
+
+                return await scrape_ec(self.page, ec_code)
+            except Exception:
+                await self.close()
+                if retry < MAX_RETRIES:
+                    await asyncio.sleep(2)
         return None
-    finally:
-        await page.close()
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--intercept",
+        action="store_true",
+        help="capture getDescEstandar/getDatosGeneralesComite JSON instead of DOM",
+    )
+    parser.add_argument("--workers", type=int, default=WORKERS)
+    parser.add_argument("--recycle-after", type=int, default=RECYCLE_AFTER)
+    add_worker_arguments(parser)
+    return parser.parse_args()
 
 
 async def main():
-    import sys
+    args = parse_args()
+    shard = worker_from_args(args, CHECKPOINT_FILE, fsync_every=BATCH_SAVE_SIZE)
+
+    if args.merge:
+        checkpoint, merged = merge_shards(journal, CERTIFIERS)
+        print(f"Merged {merged} shard records into {CHECKPOINT_FILE.name}")
+        save_final(checkpoint)
+        return
 
     print("=" * 60, flush=True)
     print("EC Certifiers Batch Extractor", flush=True)
@@ -169,50 +441,157 @@ async def main():
     ec_codes = load_ec_codes()
     print(f"Total ECs: {len(ec_codes)}", flush=True)
 
-    checkpoint = load_checkpoint()
+    # Read-only for shard workers: the others load it too
+    checkpoint = journal.load() if shard else load_checkpoint()
     processed = set(checkpoint["processed"])
     remaining = [c for c in ec_codes if c not in processed]
+    if shard:
+        shard.start(remaining)
 
     print(f"Done: {len(processed)}, Remaining: {len(remaining)}", flush=True)
 
     if not remaining:
         print("All done!")
-        save_final(checkpoint)
+        if not shard:
+            save_final(checkpoint)
         return
 
+    workers = max(1, min(args.workers, len(remaining)))
+    queue = asyncio.Queue()
+    for ec_code in remaining:
+        queue.put_nowait(ec_code)
+
+    def next_code() -> str | None:
+        if shard:
+            # Leased from the shared queue (or the static partition) instead
+            return shard.next()
+        try:
+            return queue.get_nowait()
+        except asyncio.QueueEmpty:
+            return None
+
+    done = 0
+    latency = LatencyStats()
+
+    # Shard workers journal into their own file; --merge fills the store
+    run_journal = shard.journal if shard else journal
+    store = None if shard else open_store()
+    run_id = store.start_run(CERTIFIERS) if store else None
+
+    status = StatusWriter(
+        shard.checkpoint_file if shard else CHECKPOINT_FILE,
+        CERTIFIERS,
+        total=len(ec_codes),
+        processed=len(checkpoint["processed"]),
+        failed=len(checkpoint["failed"]),
+        remaining=len(remaining),
+        counts={
+            "certifier_relationships": sum(
+                len(d.get("certifiers", [])) for d in checkpoint["data"].values()
+            ),
+            "ecs_with_certifiers": sum(
+                1 for d in checkpoint["data"].values() if d.get("certifiers")
+            ),
+        },
+    )
+    status.beat(force=True)
+
+    def record_result(ec_code: str, data: dict | None, worker_id: int):
+        # Runs on the event loop between awaits, so the checkpoint and the
+        # journal are never observed half-updated by another worker.
+        nonlocal done
+        done += 1
+        prefix = f"[{done}/{len(remaining)}] w{worker_id} {ec_code}"
+
+        # Step timings feed the latency summary only, never the outputs
+        timings = data.pop("timings_ms", {}) if data else {}
+        ok = bool(data and (data.get("certifiers") or data.get("title")))
+        if store:
+            store.upsert_ec_detail(CERTIFIERS, ec_code, data if ok else None)
+
+        if ok:
+            latency.add(timings)
+            run_journal.append(ec_code, data)
+            checkpoint["data"][ec_code] = data
+            checkpoint["processed"].append(ec_code)
+            certs = len(data.get("certifiers", []))
+            print(f"{prefix}: {certs} certifiers ✓", flush=True)
+        else:
+            run_journal.append(ec_code, None)
+            checkpoint["failed"].append(ec_code)
+            print(f"{prefix}: FAILED", flush=True)
+        if shard:
+            shard.done(ec_code, ok)
+        certs = len(data.get("certifiers", [])) if ok else 0
+        status.record(
+            ok,
+            certifier_relationships=certs,
+            ecs_with_certifiers=1 if certs else 0,
+        )
+
+        if done % BATCH_SAVE_SIZE == 0:
+            run_journal.sync()
+            if store:
+                store.commit()
+            rate = status.rate_per_min()
+            eta = status.remaining / rate if rate > 0 else 0
+            print(f"💾 Checkpoint | {rate:.1f}/min | ETA: {eta:.0f} min", flush=True)
+            if latency.summary():
+                print(f"   Step latency: {latency.summary()}", flush=True)
+
+    async def heartbeat():
+        # Keeps the sidecar fresh while every worker is stuck on slow pages
+        while True:
+            await asyncio.sleep(WRITE_INTERVAL)
+            status.beat()
+
+    async def run_worker(worker: PageWorker):
+        try:
+            while (ec_code := next_code()) is not None:
+                data = await worker.extract(ec_code)
+                record_result(ec_code, data, worker.worker_id)
+        finally:
+            await worker.close()
+
     async with async_playwright() as p:
         browser = await p.chromium.launch(headless=True)
 
-        start = time.time()
-
-        for i, ec_code in enumerate(remaining):
-            data = await process_ec(browser, ec_code)
+        mode = "XHR intercept" if args.intercept else "DOM"
+        print(
+            f"{workers} workers ({mode}), recycling contexts every "
+            f"{args.recycle_after} ECs",
+            flush=True,
+        )
 
-            if data and (data.get("certifiers") or data.get("title")):
-                checkpoint["data"][ec_code] = data
-                checkpoint["processed"].append(ec_code)
-                certs = len(data.get("certifiers", []))
-                print(
-                    f"[{i + 1}/{len(remaining)}] {ec_code}: {certs} certifiers ✓",
-                    flush=True,
-                )
-            else:
-                checkpoint["failed"].append(ec_code)
-                print(f"[{i + 1}/{len(remaining)}] {ec_code}: FAILED", flush=True)
-
-            if (i + 1) % BATCH_SAVE_SIZE == 0:
-                save_checkpoint(checkpoint)
-                elapsed = time.time() - start
-                rate = (i + 1) / elapsed * 60
-                eta = (len(remaining) - i - 1) / rate if rate > 0 else 0
-                print(
-                    f"💾 Checkpoint | {rate:.1f}/min | ETA: {eta:.0f} min", flush=True
+        beating = asyncio.create_task(heartbeat())
+        try:
+            await asyncio.gather(
+                *(
+                    run_worker(
+                        PageWorker(browser, i + 1, args.recycle_after, args.intercept)
+                    )
+                    for i in range(workers)
                 )
+            )
+        finally:
+            beating.cancel()
 
         await browser.close()
 
+    if shard:
+        # The shard journal is the result; --merge writes checkpoint and output
+        shard.close()
+        status.finish()
+        print(f"\nWorker {shard.worker} done: {done} ECs", flush=True)
+        return
+
+    if store:
+        store.finish_run(run_id, len(checkpoint["processed"]), len(checkpoint["failed"]))
+        store.close()
+
     save_checkpoint(checkpoint)
     save_final(checkpoint)
+    status.finish()
     print(
         f"\nDone! {len(checkpoint['processed'])} success, {len(checkpoint['failed'])} failed"
     )
@@ -1,102 +1,296 @@
 #!/usr/bin/env python3
 """
 Robust committee extraction from CONOCER API
-Handles JSON with control characters and saves progressively
+Handles JSON with control characters and saves progressively.
+IDs are scanned concurrently under a global rate limit (see committee_scan.py).
+
+Usage:
+  python extract_committees.py                       # Sweep IDs 1..MAX_ID
+  python extract_committees.py --discover            # Probe around known IDs
+  python extract_committees.py --refresh [--limit N] # Re-fetch known, stalest first
 """
 
+import argparse
+import http.client
 import json
 import os
-import re
 import time
-import urllib.request
+from functools import partial
+
+from committee_discovery import discover, load_seeds
+from committee_scan import CONCURRENCY, RATE_PER_SECOND, run_scan
+from conocer_http import HTTPError, get_client
+from harvest_store import open_store
+from json_stream import iter_json
+from rate_limit import TRANSIENT_STATUSES
+from refresh_state import COMMITTEE, NOT_FOUND_STATUSES, NOT_MODIFIED, RefreshState
 
 OUTPUT_DIR = "./data/extracted"
 OUTPUT_FILE = os.path.join(OUTPUT_DIR, "committees_complete.json")
 PROGRESS_FILE = os.path.join(OUTPUT_DIR, "extraction_progress.json")
+STANDARDS_FILE = os.path.join(OUTPUT_DIR, "ec_standards_api.json")
+MAX_ID = 750
 
 
-def clean_json_string(s):
-    """Remove control characters that break JSON parsing"""
-    # Remove control characters except newline and tab
-    return re.sub(r"[\x00-\x08\x0b\x0c\x0e-\x1f]", "", s)
-
-
-def fetch_committee(id):
-    """Fetch single committee with robust error handling"""
-    url = f"https://conocer.gob.mx/CONOCERBACKCITAS/comites/{id}"
+def fetch_committee(id, state: RefreshState | None = None):
+    """Fetch single committee with robust error handling
 
+    Overloads (429/5xx), timeouts and dropped connections propagate so
+    the scanner retries the ID instead of recording it as missing; any
+    other failure skips the ID. With a refresh `state`, the request
+    skips the response cache, is conditional when validators are known,
+    and the outcome (changed, 304, gone) is recorded there; only a 404/409,
+    as HTTP status or envelope responseStatus, counts as gone.
+    """
+    headers = state.request_headers(COMMITTEE, id) if state else None
     try:
-        req = urllib.request.Request(
-            url, headers={"Accept": "application/json", "User-Agent": "Mozilla/5.0"}
+        response = get_client().get(
+            f"comites/{id}", headers=headers, use_cache=state is None
         )
-        with urllib.request.urlopen(req, timeout=15) as response:
-            raw = response.read().decode("utf-8", errors="replace")
-            cleaned = clean_json_string(raw)
-            data = json.loads(cleaned)
-
-            if data.get("responseStatus") == 200 and data.get("results"):
-                result = data["results"]
-                result["id"] = id
-                return result
+    except HTTPError as e:
+        if e.code in TRANSIENT_STATUSES:
+            raise
+        if state and e.code == NOT_MODIFIED:
+            state.not_modified(COMMITTEE, id)
+        elif state and e.code in NOT_FOUND_STATUSES:
+            state.remove(COMMITTEE, id)
+        return None
+    except (TimeoutError, ConnectionError, http.client.HTTPException):
+        raise  # Retried by the scanner
+    except Exception as e:
+        # DNS/TLS failures, undecodable bodies: skip the ID, keep sweeping
+        print(f"  Error ID {id}: {type(e).__name__}")
+        return None
+
+    try:
+        data = response.json()
+
+        if data.get("responseStatus") == 200 and data.get("results"):
+            result = data["results"]
+            result["id"] = id
+            if state:
+                state.observe(COMMITTEE, id, result, response.headers)
+            return result
+        # Only an explicit not-found retires a known committee; an empty or
+        # unexpected envelope leaves it in place, unanswered
+        if state and data.get("responseStatus") in NOT_FOUND_STATUSES:
+            state.remove(COMMITTEE, id)
     except Exception as e:
-        pass  # Silently skip errors
+        pass  # Silently skip malformed payloads
 
     return None
 
 
-def save_progress(committees, last_id, total_scanned):
-    """Save current progress"""
-    os.makedirs(OUTPUT_DIR, exist_ok=True)
+def is_cached(id, state: RefreshState | None = None):
+    """Cached committees never reach the server, so they skip the rate limit
 
-    # Save committees
-    with open(OUTPUT_FILE, "w", encoding="utf-8") as f:
-        json.dump(committees, f, ensure_ascii=False, indent=2)
+    Never true while refreshing: those requests bypass the cache.
+    """
+    return get_client().cached("GET", f"comites/{id}", use_cache=state is None)
 
-    # Save progress info
-    with open(PROGRESS_FILE, "w") as f:
+
+def save_committees(committees):
+    """Save committees (in ID order, whatever order the scan finished in)"""
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    with open(OUTPUT_FILE, "w", encoding="utf-8") as f:
         json.dump(
-            {
-                "last_id": last_id,
-                "total_scanned": total_scanned,
-                "committees_found": len(committees),
-                "timestamp": time.strftime("%Y-%m-%d %H:%M:%S"),
-            },
+            sorted(committees, key=lambda c: c["id"]),
             f,
+            ensure_ascii=False,
             indent=2,
         )
 
 
+def load_progress() -> dict:
+    if not os.path.exists(PROGRESS_FILE):
+        return {}
+    with open(PROGRESS_FILE, "r") as f:
+        return json.load(f)
+
+
+def save_progress(committees, last_id, total_scanned, **extra):
+    """Save current progress
+
+    last_id only ever marks the end of a contiguous scanned range (the
+    resume point of extract_committees_resume.py); other keys, such as the
+    discovery bound, are kept across runs.
+    """
+    save_committees(committees)
+
+    # Save progress info
+    progress = load_progress()
+    progress.update(
+        {
+            "last_id": last_id,
+            "total_scanned": total_scanned,
+            "committees_found": len(committees),
+            "timestamp": time.strftime("%Y-%m-%d %H:%M:%S"),
+            **extra,
+        }
+    )
+    with open(PROGRESS_FILE, "w") as f:
+        json.dump(progress, f, indent=2)
+
+
+def refresh(limit: int | None):
+    """Re-fetch known committees, stalest first, and log what changed.
+
+    Only known IDs are requested (conditionally, when validators are
+    known); new committees are found by --discover or a full sweep.
+    """
+    state = RefreshState(OUTPUT_DIR)
+    committees = {c["id"]: c for c in iter_json(OUTPUT_FILE)}
+    state.seed(COMMITTEE, committees)
+    ids = state.stalest(COMMITTEE, [int(k) for k in state.known(COMMITTEE)], limit)
+    print(
+        f"Refreshing {len(ids)} of {len(committees)} committees, stalest first "
+        f"({CONCURRENCY} concurrent, {RATE_PER_SECOND:g} req/s)..."
+    )
+    print()
+
+    store = open_store()
+
+    def on_found(committee):
+        if state.outcome(COMMITTEE, committee["id"]) == "unchanged":
+            return
+        committees[committee["id"]] = committee
+        if store:
+            store.upsert_committee(committee)
+
+    def on_progress(progress):
+        print(f"  Refreshed {progress.scanned}/{len(ids)}")
+
+    progress = run_scan(
+        ids,
+        partial(fetch_committee, state=state),
+        on_found=on_found,
+        on_progress=on_progress,
+        cached=partial(is_cached, state=state),
+    )
+    for id in state.changes(COMMITTEE)["removed"]:
+        committees.pop(id, None)
+        if store:
+            store.delete_committee(id)
+    if store:
+        store.close()
+
+    changes = state.changes(COMMITTEE)
+    if changes["changed"] or changes["removed"]:
+        save_committees(list(committees.values()))
+    state.save("committees")
+
+    print()
+    print("=" * 60)
+    print("REFRESH COMPLETE")
+    print(f"  Committees: {state.summary(COMMITTEE)}")
+    if progress.failed:
+        print(f"  Unanswered (kept as is): {len(progress.failed)}")
+    print(f"  Change log: {state.changes_file}")
+    print("=" * 60)
+
+
 def main():
+    parser = argparse.ArgumentParser(description="CONOCER committee extraction")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument(
+        "--discover",
+        action="store_true",
+        help="seed from known committee IDs and probe outward instead of "
+        f"sweeping 1..{MAX_ID}",
+    )
+    mode.add_argument(
+        "--refresh",
+        action="store_true",
+        help="re-fetch known committees only, stalest first, with a change log",
+    )
+    parser.add_argument(
+        "--limit", type=int, help="with --refresh: re-fetch only the N stalest"
+    )
+    args = parser.parse_args()
+
+    if args.refresh:
+        print("=" * 60)
+        print("CONOCER Committee Refresh")
+        print("=" * 60)
+        refresh(args.limit)
+        return
+
     print("=" * 60)
     print("CONOCER Committee Extraction")
     print("=" * 60)
 
     committees = []
-    max_id = 750
-    save_interval = 50
-
-    print(f"Scanning IDs 1 to {max_id}...")
+    seeds = load_seeds(OUTPUT_FILE, STANDARDS_FILE) if args.discover else set()
+    previous = {}
+    # Discovery skips IDs, so it never moves the contiguous resume point
+    swept_to = load_progress().get("last_id", 0)
+    if seeds:
+        print(
+            f"Discovering IDs from {len(seeds)} known committees "
+            f"({CONCURRENCY} concurrent, {RATE_PER_SECOND:g} req/s)..."
+        )
+        previous = {c["id"]: c for c in iter_json(OUTPUT_FILE)}
+    else:
+        if args.discover:
+            print("No known committee IDs to seed discovery; sweeping instead")
+        print(
+            f"Scanning IDs 1 to {MAX_ID} "
+            f"({CONCURRENCY} concurrent, {RATE_PER_SECOND:g} req/s)..."
+        )
     print()
 
-    for id in range(1, max_id + 1):
-        committee = fetch_committee(id)
-
-        if committee:
-            committees.append(committee)
+    store = open_store()
 
-        # Progress update
-        if id % 50 == 0:
-            print(f"  Scanned {id}/{max_id} - Found {len(committees)} committees")
+    def on_found(committee):
+        committees.append(committee)
+        if store:
+            store.upsert_committee(committee)
 
-        # Save periodically
-        if id % save_interval == 0:
-            save_progress(committees, id, id)
+    def on_progress(progress):
+        print(f"  Scanned {progress.scanned} - Found {len(committees)} committees")
+        if seeds:
+            # Keep unrefreshed committees until the run completes
+            merged = dict(previous)
+            merged.update((c["id"], c) for c in committees)
+            save_progress(list(merged.values()), swept_to, progress.scanned)
+        else:
+            save_progress(committees, progress.last_id, progress.scanned)
+        if store:
+            store.commit()
 
-        # Small delay to be nice to the server
-        time.sleep(0.08)
+    if seeds:
+        result = discover(
+            seeds, fetch_committee, on_found, on_progress, cached=is_cached
+        )
+        # Keep the previous copy of known committees that got no answer
+        committees.extend(previous[id] for id in result.failed if id in previous)
+        last_id, scanned, failed = swept_to, len(result.scanned), result.failed
+        extra = {"discovered_upper_bound": result.upper_bound}
+        print(
+            f"\nDiscovery: {scanned} IDs requested in {result.rounds} rounds, "
+            f"highest live ID {result.upper_bound}"
+        )
+    else:
+        progress = run_scan(
+            range(1, MAX_ID + 1),
+            fetch_committee,
+            on_found=on_found,
+            on_progress=on_progress,
+            cached=is_cached,
+        )
+        # last_id stops before any ID that never got an answer
+        last_id, scanned, failed = progress.last_id, progress.scanned, progress.failed
+        extra = {}
+    if store:
+        store.close()
 
-    # Final save
-    save_progress(committees, max_id, max_id)
+    save_progress(committees, last_id, scanned, **extra)
+    if failed:
+        print(f"\n⚠️  {len(failed)} IDs unanswered (server overloaded)")
+        if seeds:
+            print("   Their previous records were kept; run --discover again")
+        else:
+            print("   Run extract_committees_resume.py to retry them")
 
     print()
     print("=" * 60)
@@ -108,7 +302,7 @@ def main():
     # Show sample
     if committees:
         print("\nSample committee data:")
-        sample = committees[0]
+        sample = min(committees, key=lambda c: c["id"])
         print(f"  Name: {sample.get('nombre', 'N/A')}")
         print(f"  President: {sample.get('presidente', 'N/A')}")
         print(f"  ECs associated: {len(sample.get('estandaresAsociados', []))}")
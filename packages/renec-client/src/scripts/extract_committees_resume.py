@@ -1,14 +1,18 @@
 #!/usr/bin/env python3
 """
 Resume CONOCER Committee Extraction from last checkpoint
+IDs are scanned concurrently under a global rate limit (see committee_scan.py).
 """
 
+import http.client
 import json
 import os
-import re
 import time
-import urllib.error
-import urllib.request
+
+from committee_scan import CONCURRENCY, RATE_PER_SECOND, run_scan
+from conocer_http import HTTPError, get_client
+from harvest_store import open_store
+from rate_limit import TRANSIENT_STATUSES
 
 DATA_DIR = "data/extracted"
 OUTPUT_FILE = f"{DATA_DIR}/committees_complete.json"
@@ -16,36 +20,23 @@ PROGRESS_FILE = f"{DATA_DIR}/extraction_progress.json"
 MAX_ID = 800  # Extended range
 
 
-def clean_json_string(s):
-    """Remove control characters that break JSON parsing"""
-    return re.sub(r"[\x00-\x08\x0b\x0c\x0e-\x1f]", "", s)
-
-
 def fetch_committee(id):
     """Fetch a single committee by ID"""
-    url = f"https://conocer.gob.mx/CONOCERBACKCITAS/comites/{id}"
-    req = urllib.request.Request(
-        url,
-        headers={
-            "Accept": "application/json",
-            "Content-Type": "application/json",
-            "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36",
-        },
-    )
-
     try:
-        with urllib.request.urlopen(req, timeout=15) as response:
-            raw = response.read().decode("utf-8", errors="replace")
-            cleaned = clean_json_string(raw)
-            data = json.loads(cleaned)
-
-            if data.get("responseStatus") == 200 and data.get("results"):
-                result = data["results"]
-                result["id"] = id
-                return result
-    except urllib.error.HTTPError as e:
+        response = get_client().get(f"comites/{id}")
+        data = response.json()
+
+        if data.get("responseStatus") == 200 and data.get("results"):
+            result = data["results"]
+            result["id"] = id
+            return result
+    except HTTPError as e:
+        if e.code in TRANSIENT_STATUSES:
+            raise  # Retried by the scanner, not a missing committee
         if e.code not in [404, 409]:
             print(f"  HTTP {e.code} for ID {id}")
+    except (TimeoutError, ConnectionError, http.client.HTTPException):
+        raise  # Retried by the scanner
     except Exception as e:
         print(f"  Error ID {id}: {type(e).__name__}")
 
@@ -71,10 +62,20 @@ def load_existing():
     return committees, start_id
 
 
+def is_cached(id):
+    """Cached committees never reach the server, so they skip the rate limit"""
+    return get_client().cached("GET", f"comites/{id}")
+
+
 def save_progress(committees, last_id, total_scanned):
     """Save current state"""
     with open(OUTPUT_FILE, "w") as f:
-        json.dump(committees, f, indent=2, ensure_ascii=False)
+        json.dump(
+            sorted(committees, key=lambda c: c["id"]),
+            f,
+            indent=2,
+            ensure_ascii=False,
+        )
 
     with open(PROGRESS_FILE, "w") as f:
         json.dump(
@@ -100,33 +101,50 @@ def main():
         print(f"Extraction already complete up to ID {MAX_ID}")
         return
 
-    print(f"Scanning IDs {start_id} to {MAX_ID}...")
+    print(
+        f"Scanning IDs {start_id} to {MAX_ID} "
+        f"({CONCURRENCY} concurrent, {RATE_PER_SECOND:g} req/s)..."
+    )
     print()
 
-    total_scanned = start_id - 1
+    known_ids = {c["id"] for c in committees}
     new_found = 0
-
-    for id in range(start_id, MAX_ID + 1):
-        committee = fetch_committee(id)
-
-        if committee:
+    store = open_store()
+
+    def on_found(committee):
+        nonlocal new_found
+        if store:
+            store.upsert_committee(committee)
+        if committee["id"] not in known_ids:
+            known_ids.add(committee["id"])
             committees.append(committee)
             new_found += 1
 
-        total_scanned = id
-
-        # Save every 50 IDs
-        if id % 50 == 0:
-            save_progress(committees, id, id)
-            print(
-                f"  Scanned {id}/{MAX_ID} - Total: {len(committees)} committees (+{new_found} new)"
-            )
-
-        # Rate limit
-        time.sleep(0.15)
+    def on_progress(progress):
+        save_progress(committees, progress.last_id, progress.last_id)
+        if store:
+            store.commit()
+        print(
+            f"  Scanned {progress.scanned}/{progress.total} "
+            f"(contiguous to ID {progress.last_id}) - "
+            f"Total: {len(committees)} committees (+{new_found} new)"
+        )
 
-    # Final save
-    save_progress(committees, MAX_ID, MAX_ID)
+    progress = run_scan(
+        range(start_id, MAX_ID + 1),
+        fetch_committee,
+        on_found=on_found,
+        on_progress=on_progress,
+        cached=is_cached,
+    )
+    if store:
+        store.close()
+
+    # Final save (last_id stops before any ID that never got an answer)
+    save_progress(committees, progress.last_id, progress.last_id)
+    if progress.failed:
+        print(f"\n⚠️  {len(progress.failed)} IDs unanswered (server overloaded)")
+        print("   Run this script again to retry them")
 
     print()
     print("=" * 60)
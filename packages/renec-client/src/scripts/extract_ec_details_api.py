@@ -3,50 +3,62 @@
 EC Details API Extractor
 Attempts to extract EC certifier data using direct API calls.
 Falls back to Playwright DOM extraction if API fails.
+
+Usage:
+  python extract_ec_details_api.py                      # Fetch ECs not yet processed
+  python extract_ec_details_api.py --refresh [--limit N] # Re-fetch all, stalest first
+  python extract_ec_details_api.py --worker w1          # Sharded, see harvest_shards.py
+  python extract_ec_details_api.py --merge              # Fold shard journals in
 """
 
+import argparse
 import json
 import os
-import re
-import time
-import urllib.error
-import urllib.request
+import threading
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 from pathlib import Path
 
+from checkpoint_journal import CheckpointJournal
+from conocer_http import HTTPError, get_client
+from harvest_shards import add_worker_arguments, merge_shards, worker_from_args
+from harvest_store import API, open_store
+from rate_limit import TRANSIENT_STATUSES, AdaptiveLimiter, TransientError
+from refresh_state import EC, NOT_MODIFIED, RefreshState
+from run_status import StatusWriter
+
 # Configuration
 OUTPUT_DIR = Path(__file__).parent.parent.parent / "data" / "extracted"
 CHECKPOINT_FILE = OUTPUT_DIR / "ec_details_api_checkpoint.json"
+BODY_VARIANTS_FILE = OUTPUT_DIR / "ec_details_api_body_variants.json"
 OUTPUT_FILE = OUTPUT_DIR / "ec_certifiers.json"
 BATCH_SIZE = 50
-MAX_WORKERS = 5  # Parallel requests
-REQUEST_DELAY = 0.5  # Seconds between requests
+MAX_WORKERS = 5  # Parallel requests (upper bound for the adaptive limiter)
+MAX_ATTEMPTS = 3  # Tries per EC while the server is overloaded
 
-# API endpoints discovered from the SPA
-API_BASE = "https://conocer.gob.mx/CONOCERBACKCITAS"
+# API endpoints discovered from the SPA (relative to conocer_http.API_BASE)
 ENDPOINTS = {
-    "desc_estandar": f"{API_BASE}/sectoresProductivos/getDescEstandar/",
-    "datos_comite": f"{API_BASE}/sectoresProductivos/getDatosGeneralesComite/",
-    "all_standards": f"{API_BASE}/sectoresProductivos/getEstandaresAll",
+    "desc_estandar": "sectoresProductivos/getDescEstandar/",
+    "datos_comite": "sectoresProductivos/getDatosGeneralesComite/",
+    "all_standards": "sectoresProductivos/getEstandaresAll",
+    "search": "sectoresProductivos/search",
 }
 
-# Headers to mimic browser
-HEADERS = {
-    "Accept": "application/json, text/plain, */*",
-    "Accept-Language": "es-MX,es;q=0.9,en;q=0.8",
-    "Content-Type": "application/json",
-    "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36",
-    "Origin": "https://conocer.gob.mx",
-    "Referer": "https://conocer.gob.mx/conocer/",
+# Requests mimic the SPA's XHR headers
+HEADER_PROFILE = "browser"
+
+# POST body shapes accepted by one or another backend deployment, in probe order
+BODY_VARIANTS = {
+    "none": lambda ec_code: None,
+    "empty": lambda ec_code: b"",
+    "empty_json": lambda ec_code: b"{}",
+    "codigo_json": lambda ec_code: json.dumps({"codigo": ec_code}).encode("utf-8"),
 }
 
 OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
 
-
-def clean_json_response(text: str) -> str:
-    """Remove control characters that may break JSON parsing."""
-    return re.sub(r"[\x00-\x1f\x7f-\x9f]", "", text)
+# Per-EC results are appended here; CHECKPOINT_FILE is rebuilt from it
+journal = CheckpointJournal(CHECKPOINT_FILE, fsync_every=BATCH_SIZE)
 
 
 def load_ec_codes() -> list[str]:
@@ -69,48 +81,131 @@ def load_ec_codes() -> list[str]:
 
 
 def load_checkpoint() -> dict:
-    """Load checkpoint."""
-    if CHECKPOINT_FILE.exists():
-        with open(CHECKPOINT_FILE, "r", encoding="utf-8") as f:
-            return json.load(f)
-    return {"processed": [], "failed": [], "data": {}}
+    """Load checkpoint snapshot plus journal, folding the journal in."""
+    checkpoint = journal.load()
+    if journal.journal_file.exists():
+        journal.compact(checkpoint)
+    return checkpoint
 
 
 def save_checkpoint(checkpoint: dict):
-    """Save checkpoint."""
-    checkpoint["last_updated"] = datetime.now().isoformat()
-    with open(CHECKPOINT_FILE, "w", encoding="utf-8") as f:
-        json.dump(checkpoint, f, ensure_ascii=False)
+    """Materialize the full checkpoint JSON (end of run)."""
+    journal.compact(checkpoint)
 
 
-def fetch_ec_detail_api(ec_code: str) -> dict | None:
-    """Try to fetch EC details via direct API call."""
-    url = f"{ENDPOINTS['desc_estandar']}{ec_code}"
+def save_output(checkpoint: dict):
+    """Write the consolidated output file."""
+    with open(OUTPUT_FILE, "w", encoding="utf-8") as f:
+        json.dump(
+            {
+                "extraction_date": datetime.now().isoformat(),
+                "total": len(checkpoint["data"]),
+                "failed": checkpoint["failed"],
+                "ec_certifiers": checkpoint["data"],
+            },
+            f,
+            indent=2,
+            ensure_ascii=False,
+        )
 
-    # Try different request body formats
-    bodies = [
-        None,  # No body
-        b"",  # Empty body
-        b"{}",  # Empty JSON
-        json.dumps({"codigo": ec_code}).encode("utf-8"),
-    ]
 
-    for body in bodies:
+class BodyVariantCache:
+    """Remembers which POST body variant each endpoint accepts.
+
+    Persisted next to the checkpoint so later runs skip straight to the
+    working variant; probing the others only happens when it stops working.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._variants = {}
+        if path.exists():
+            with open(path, "r", encoding="utf-8") as f:
+                self._variants = json.load(f)
+
+    def preferred(self, endpoint: str) -> str | None:
+        entry = self._variants.get(endpoint)
+        return entry["variant"] if entry else None
+
+    def order(self, endpoint: str) -> list[str]:
+        """Variant names to try, the learned one first."""
+        preferred = self.preferred(endpoint)
+        names = list(BODY_VARIANTS)
+        if preferred in BODY_VARIANTS:
+            names.remove(preferred)
+            names.insert(0, preferred)
+        return names
+
+    def record(self, endpoint: str, variant: str):
+        with self._lock:
+            if self.preferred(endpoint) == variant:
+                return
+            self._variants[endpoint] = {
+                "variant": variant,
+                "learned_at": datetime.now().isoformat(),
+            }
+            with open(self.path, "w", encoding="utf-8") as f:
+                json.dump(self._variants, f, indent=2)
+
+
+body_variants = BodyVariantCache(BODY_VARIANTS_FILE)
+
+# Replaces the old fixed per-request sleep. A plain 500 from getDescEstandar
+# means "wrong body variant", not overload, so it doesn't slow the run down.
+limiter = AdaptiveLimiter(
+    maximum=MAX_WORKERS, transient_statuses=TRANSIENT_STATUSES - {500}
+)
+
+
+def fetch_ec_detail_api(
+    ec_code: str, state: RefreshState | None = None
+) -> dict | None:
+    """Try to fetch EC details via direct API call.
+
+    With a refresh `state`, the request skips the response cache, is
+    conditional when validators are known, and the outcome (changed,
+    unchanged, 304) is recorded there.
+    """
+    url = f"{ENDPOINTS['desc_estandar']}{ec_code}"
+    preferred = body_variants.preferred("desc_estandar")
+    headers = state.request_headers(EC, ec_code) if state else None
+
+    # Try the learned body format first, then probe the others
+    for variant in body_variants.order("desc_estandar"):
+        body = BODY_VARIANTS[variant](ec_code)
         try:
-            req = urllib.request.Request(url, data=body, method="POST", headers=HEADERS)
-
-            with urllib.request.urlopen(req, timeout=30) as response:
-                if response.status == 200:
-                    data = response.read().decode("utf-8")
-                    data = clean_json_response(data)
-                    result = json.loads(data)
-
-                    # Check if we got valid data
-                    if isinstance(result, dict) and result:
-                        return result
-                    elif isinstance(result, list) and result:
-                        return {"items": result}
-        except urllib.error.HTTPError as e:
+            response = limiter.call(
+                get_client().post,
+                url,
+                body=body,
+                headers=headers,
+                profile=HEADER_PROFILE,
+                use_cache=state is None,
+            )
+
+            if response.status == 200:
+                result = response.json()
+
+                # Check if we got valid data
+                if isinstance(result, list) and result:
+                    result = {"items": result}
+                if isinstance(result, dict) and result:
+                    body_variants.record("desc_estandar", variant)
+                    if state:
+                        state.observe(EC, ec_code, result, response.headers)
+                    return result
+
+                # The known-good variant answered cleanly: the EC simply
+                # has no data, other body shapes won't change that.
+                if variant == preferred:
+                    return None
+        except TransientError:
+            raise  # Overloaded: other body variants won't help either
+        except HTTPError as e:
+            if state and e.code == NOT_MODIFIED:
+                state.not_modified(EC, ec_code)
+                return None
             if e.code != 500:  # Ignore 500 errors, try next body
                 pass
         except Exception as e:
@@ -121,29 +216,32 @@ def fetch_ec_detail_api(ec_code: str) -> dict | None:
 
 def fetch_ec_via_search_api(ec_code: str) -> dict | None:
     """Try to fetch EC via search endpoint."""
-    url = "https://conocer.gob.mx/CONOCERBACKCITAS/sectoresProductivos/search"
-
     try:
         body = json.dumps({"query": ec_code}).encode("utf-8")
-        req = urllib.request.Request(url, data=body, method="POST", headers=HEADERS)
+        response = limiter.call(
+            get_client().post, ENDPOINTS["search"], body=body, profile=HEADER_PROFILE
+        )
 
-        with urllib.request.urlopen(req, timeout=30) as response:
-            if response.status == 200:
-                data = response.read().decode("utf-8")
-                data = clean_json_response(data)
-                return json.loads(data)
+        if response.status == 200:
+            return response.json()
     except:
         pass
 
     return None
 
 
-def process_ec(ec_code: str) -> tuple[str, dict | None]:
+def process_ec(
+    ec_code: str, state: RefreshState | None = None
+) -> tuple[str, dict | None]:
     """Process a single EC code."""
-    time.sleep(REQUEST_DELAY)  # Rate limiting
-
-    # Try direct API first
-    result = fetch_ec_detail_api(ec_code)
+    # Try direct API first; the limiter paces and backs off between attempts
+    result = None
+    for attempt in range(MAX_ATTEMPTS):
+        try:
+            result = fetch_ec_detail_api(ec_code, state)
+            break
+        except TransientError as e:
+            print(f"  {ec_code}: server overloaded ({e}), attempt {attempt + 1}")
 
     if result:
         return (
@@ -162,6 +260,29 @@ def process_ec(ec_code: str) -> tuple[str, dict | None]:
 
 def main():
     """Main extraction process."""
+    parser = argparse.ArgumentParser(description="EC details API extractor")
+    parser.add_argument(
+        "--refresh",
+        action="store_true",
+        help="re-fetch processed ECs too, stalest first, with a change log",
+    )
+    parser.add_argument(
+        "--limit", type=int, help="with --refresh: re-fetch only the N stalest"
+    )
+    add_worker_arguments(parser)
+    args = parser.parse_args()
+    sharded = args.worker or args.shard or args.queue or args.merge
+    if args.refresh and sharded:
+        parser.error("--refresh cannot be combined with sharded harvesting")
+    shard = worker_from_args(args, CHECKPOINT_FILE, fsync_every=BATCH_SIZE)
+
+    if args.merge:
+        checkpoint, merged = merge_shards(journal, API)
+        save_output(checkpoint)
+        print(f"Merged {merged} shard records into {CHECKPOINT_FILE.name}")
+        print(f"  Output: {OUTPUT_FILE}")
+        return
+
     print("=" * 60)
     print("EC Details API Extractor")
     print("=" * 60)
@@ -170,10 +291,27 @@ def main():
     ec_codes = load_ec_codes()
     print(f"Found {len(ec_codes)} EC codes")
 
-    # Load checkpoint
-    checkpoint = load_checkpoint()
+    # Load checkpoint (read-only for shard workers: others load it too)
+    checkpoint = journal.load() if shard else load_checkpoint()
     processed = set(checkpoint["processed"])
-    remaining = [c for c in ec_codes if c not in processed]
+    state = None
+    dropped = []
+    if args.refresh:
+        state = RefreshState(OUTPUT_DIR)
+        state.seed(EC, {code: r["data"] for code, r in checkpoint["data"].items()})
+        # ECs gone from the standards catalog drop out of the checkpoint
+        current = set(ec_codes)
+        dropped = [
+            code
+            for code in state.known(EC)
+            if code not in current and state.remove(EC, code)
+        ]
+        remaining = state.stalest(EC, ec_codes, args.limit)
+        print(f"Refreshing {len(remaining)} ECs, stalest first")
+    else:
+        remaining = [c for c in ec_codes if c not in processed]
+        if shard:
+            shard.start(remaining)
 
     print(f"Already processed: {len(processed)}, Remaining: {len(remaining)}")
 
@@ -181,24 +319,26 @@ def main():
         print("All done!")
         return
 
-    # Test first few to see if API works
-    print("\nTesting API access with first 5 ECs...")
-    test_results = []
-    for ec_code in remaining[:5]:
-        print(f"  Testing {ec_code}...", end=" ")
-        code, result = process_ec(ec_code)
-        if result:
-            print("✓ API works!")
-            test_results.append(result)
-        else:
-            print("✗ API failed")
-
-    if not test_results:
-        print("\n⚠️  Direct API access not working.")
-        print("The CONOCER API requires browser context/cookies.")
-        print("Use the Playwright-based extractor instead:")
-        print("  python extract_ec_details_playwright.py")
-        return
+    # Test first few to see if API works. Shard workers skip this: the
+    # codes may be outside their shard, and N workers would probe N times
+    if not shard:
+        print("\nTesting API access with first 5 ECs...")
+        test_results = []
+        for ec_code in remaining[:5]:
+            print(f"  Testing {ec_code}...", end=" ")
+            code, result = process_ec(ec_code)
+            if result:
+                print("✓ API works!")
+                test_results.append(result)
+            else:
+                print("✗ API failed")
+
+        if not test_results:
+            print("\n⚠️  Direct API access not working.")
+            print("The CONOCER API requires browser context/cookies.")
+            print("Use the Playwright-based extractor instead:")
+            print("  python extract_ec_details_playwright.py")
+            return
 
     # If API works, continue with parallel extraction
     print(
@@ -207,49 +347,107 @@ def main():
 
     success_count = 0
     fail_count = 0
+    unchanged_count = 0
+
+    # Shard workers journal into their own file; --merge fills the store
+    run_journal = shard.journal if shard else journal
+    store = None if shard else open_store()
+    run_id = store.start_run(API) if store else None
+
+    for ec_code in dropped:
+        checkpoint["data"].pop(ec_code, None)
+        if ec_code in processed:
+            checkpoint["processed"].remove(ec_code)
+        if store:
+            store.delete_ec_detail(API, ec_code)
+
+    status = StatusWriter(
+        shard.checkpoint_file if shard else CHECKPOINT_FILE,
+        API,
+        total=len(ec_codes),
+        processed=len(checkpoint["processed"]),
+        failed=len(checkpoint["failed"]),
+        remaining=len(remaining),
+    )
+    status.beat(force=True)
 
-    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
-        futures = {executor.submit(process_ec, code): code for code in remaining}
-
-        for i, future in enumerate(as_completed(futures)):
-            ec_code, result = future.result()
+    # Shard workers lease a few batches' worth at a time; others take it all
+    if shard:
+        batches = iter(lambda: shard.take(MAX_WORKERS * 4), [])
+    else:
+        batches = [remaining]
 
-            if result:
-                checkpoint["data"][ec_code] = result
-                checkpoint["processed"].append(ec_code)
-                success_count += 1
-            else:
-                checkpoint["failed"].append(ec_code)
-                fail_count += 1
-
-            # Progress update
-            if (i + 1) % BATCH_SIZE == 0:
-                save_checkpoint(checkpoint)
-                print(
-                    f"Progress: {i + 1}/{len(remaining)} | Success: {success_count} | Failed: {fail_count}"
-                )
+    i = -1
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        for batch in batches:
+            futures = {
+                executor.submit(process_ec, code, state): code for code in batch
+            }
+            for future in as_completed(futures):
+                i += 1
+                ec_code, result = future.result()
+                outcome = state.outcome(EC, ec_code) if state else None
+
+                if outcome == "unchanged":
+                    # Same content (or 304): nothing to rewrite
+                    unchanged_count += 1
+                    status.record(True)
+                elif state and not result and ec_code in checkpoint["data"]:
+                    # No answer this time: keep the record we already have
+                    fail_count += 1
+                    status.record(False)
+                else:
+                    run_journal.append(ec_code, result)
+                    if store:
+                        store.upsert_ec_detail(API, ec_code, result)
+                    if result:
+                        if ec_code not in checkpoint["data"]:
+                            checkpoint["processed"].append(ec_code)
+                        checkpoint["data"][ec_code] = result
+                        success_count += 1
+                    else:
+                        checkpoint["failed"].append(ec_code)
+                        fail_count += 1
+                    status.record(bool(result))
+                if shard:
+                    shard.done(ec_code, bool(result))
+
+                # Progress update
+                if (i + 1) % BATCH_SIZE == 0:
+                    run_journal.sync()
+                    if store:
+                        store.commit()
+                    print(
+                        f"Progress: {i + 1}/{len(remaining)} | Success: {success_count} | Failed: {fail_count}"
+                    )
+
+    if shard:
+        # The shard journal is the result; --merge writes checkpoint and output
+        shard.close()
+        status.finish()
+        print(f"Worker {shard.worker}: {success_count} ok, {fail_count} failed")
+        return
 
     # Save final results
     save_checkpoint(checkpoint)
+    status.finish()
+    if state:
+        state.save("ec_details")
+    if store:
+        store.finish_run(run_id, success_count, fail_count)
+        store.close()
 
     # Save consolidated output
-    with open(OUTPUT_FILE, "w", encoding="utf-8") as f:
-        json.dump(
-            {
-                "extraction_date": datetime.now().isoformat(),
-                "total": len(checkpoint["data"]),
-                "failed": checkpoint["failed"],
-                "ec_certifiers": checkpoint["data"],
-            },
-            f,
-            indent=2,
-            ensure_ascii=False,
-        )
+    save_output(checkpoint)
 
     print("\n" + "=" * 60)
     print("Extraction Complete!")
     print(f"  Success: {success_count}")
     print(f"  Failed: {fail_count}")
+    if state:
+        print(f"  Unchanged: {unchanged_count}")
+        print(f"  ECs: {state.summary(EC)}")
+        print(f"  Change log: {state.changes_file}")
     print(f"  Output: {OUTPUT_FILE}")
     print("=" * 60)
 
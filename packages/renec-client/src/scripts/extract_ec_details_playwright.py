@@ -5,8 +5,14 @@ Extracts certifiers, training courses, and other details for each EC standard
 by navigating the CONOCER SPA and extracting data from the DOM.
 
 Uses progressive saving to prevent data loss.
+
+Usage:
+  python extract_ec_details_playwright.py               # ECs not yet processed
+  python extract_ec_details_playwright.py --worker w1   # Sharded, see harvest_shards.py
+  python extract_ec_details_playwright.py --merge       # Fold shard journals in
 """
 
+import argparse
 import asyncio
 import json
 import os
@@ -18,13 +24,27 @@ from pathlib import Path
 try:
     from playwright.async_api import TimeoutError as PlaywrightTimeout
     from playwright.async_api import async_playwright
+except ImportError:
     print(
         "Playwright not installed. Install with: pip install playwright && playwright install chromium"
     )
     exit(1)
 
+from checkpoint_journal import CheckpointJournal
+from conocer_http import RENEC_URL
+from harvest_shards import add_worker_arguments, merge_shards, worker_from_args
+from harvest_store import PLAYWRIGHT, open_store
+from page_readiness import (
+    LatencyStats,
+    StepTimer,
+    click_and_wait_for_response,
+    wait_for_angular_stable,
+    wait_for_detail,
+)
+from run_status import StatusWriter
+
 # Configuration
-BASE_URL = "https://conocer.gob.mx/conocer/#/renec"
+BASE_URL = RENEC_URL
 OUTPUT_DIR = Path(__file__).parent.parent.parent / "data" / "extracted"
 CHECKPOINT_FILE = OUTPUT_DIR / "ec_details_checkpoint.json"
 OUTPUT_FILE = OUTPUT_DIR / "ec_details_full.json"
@@ -35,6 +55,9 @@ MAX_RETRIES = 3
 # Ensure output directory exists
 OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
 
+# Per-EC results are appended here; CHECKPOINT_FILE is rebuilt from it
+journal = CheckpointJournal(CHECKPOINT_FILE, fsync_every=BATCH_SIZE, indent=2)
+
 
 def load_ec_codes() -> list[str]:
     """Load EC codes from the extracted standards file."""
@@ -57,18 +80,16 @@ def load_ec_codes() -> list[str]:
 
 
 def load_checkpoint() -> dict:
-    """Load checkpoint data if exists."""
-    if CHECKPOINT_FILE.exists():
-        with open(CHECKPOINT_FILE, "r", encoding="utf-8") as f:
-            return json.load(f)
-    return {"processed": [], "failed": [], "data": {}, "last_updated": None}
+    """Load checkpoint snapshot plus journal, folding the journal in."""
+    checkpoint = journal.load()
+    if journal.journal_file.exists():
+        journal.compact(checkpoint)
+    return checkpoint
 
 
 def save_checkpoint(checkpoint: dict):
-    """Save checkpoint data."""
-    checkpoint["last_updated"] = datetime.now().isoformat()
-    with open(CHECKPOINT_FILE, "w", encoding="utf-8") as f:
-        json.dump(checkpoint, f, indent=2, ensure_ascii=False)
+    """Materialize the full checkpoint JSON (end of run)."""
+    journal.compact(checkpoint)
 
 
 def save_final_output(checkpoint: dict):
@@ -147,28 +168,32 @@ async def extract_ec_data(page) -> dict:
     return await page.evaluate(extraction_script)
 
 
-async def navigate_to_ec(page, ec_code: str) -> bool:
+async def navigate_to_ec(page, ec_code: str, timer: StepTimer) -> bool:
     """Navigate to an EC's detail page via search."""
     try:
         # Go to RENEC main page
-        await page.goto(BASE_URL, wait_until="networkidle", timeout=TIMEOUT)
-        await page.wait_for_timeout(2000)  # Wait for Angular to initialize
+        async with timer.step("load"):
+            await page.goto(BASE_URL, wait_until="networkidle", timeout=TIMEOUT)
+            await wait_for_angular_stable(page)
 
         # Find and fill the search input
-        search_input = page.locator(
-            'input[type="text"], input[placeholder*="Buscar"], input[placeholder*="buscar"]'
-        ).first
-        await search_input.fill(ec_code)
-        await page.wait_for_timeout(1000)
-
-        # Press Enter or click search button
-        await search_input.press("Enter")
-        await page.wait_for_timeout(2000)
-
-        # Click on the search result that matches our EC code
-        result_link = page.locator(f'text="{ec_code}"').first
-        await result_link.click(timeout=5000)
-        await page.wait_for_timeout(3000)  # Wait for detail page to load
+        async with timer.step("search"):
+            search_input = page.locator(
+                'input[type="text"], input[placeholder*="Buscar"], input[placeholder*="buscar"]'
+            ).first
+            await search_input.fill(ec_code)
+            await search_input.press("Enter")
+
+            # Wait for the search result that matches our EC code
+            result_link = page.locator(f'text="{ec_code}"').first
+            await result_link.wait_for(state="visible", timeout=5000)
+
+        # Open it and wait for the detail data to arrive and render
+        async with timer.step("detail"):
+            await click_and_wait_for_response(page, result_link, "getDescEstandar")
+            if not await wait_for_detail(page, ec_code):
+                print(f"  Detail view for {ec_code} did not render")
+                return False
 
         return True
     except Exception as e:
@@ -190,9 +215,12 @@ async def expand_sections(page):
                 button = expand_buttons.nth(i)
                 if await button.is_visible():
                     await button.click()
-                    await page.wait_for_timeout(500)
             except:
                 pass
+
+        # One wait for all expansions to finish rendering
+        if count:
+            await wait_for_angular_stable(page)
     except:
         pass
 
@@ -201,9 +229,10 @@ async def process_ec(page, ec_code: str, retry: int = 0) -> dict | None:
     """Process a single EC code and extract its data."""
     try:
         print(f"  Processing {ec_code}...")
+        timer = StepTimer()
 
         # Navigate to EC detail
-        if not await navigate_to_ec(page, ec_code):
+        if not await navigate_to_ec(page, ec_code, timer):
             if retry < MAX_RETRIES:
                 print(f"  Retrying {ec_code} ({retry + 1}/{MAX_RETRIES})...")
                 await page.wait_for_timeout(2000)
@@ -211,11 +240,12 @@ async def process_ec(page, ec_code: str, retry: int = 0) -> dict | None:
             return None
 
         # Expand all sections
-        await expand_sections(page)
-        await page.wait_for_timeout(1000)
+        async with timer.step("expand"):
+            await expand_sections(page)
 
         # Extract data
-        data = await extract_ec_data(page)
+        async with timer.step("extract"):
+            data = await extract_ec_data(page)
 
         if data.get("error"):
             print(f"  Extraction error: {data['error']}")
@@ -226,6 +256,7 @@ async def process_ec(page, ec_code: str, retry: int = 0) -> dict | None:
         # Add metadata
         data["ec_code"] = ec_code
         data["extraction_time"] = datetime.now().isoformat()
+        data["timings_ms"] = timer.steps
 
         print(
             f"  ✓ {ec_code}: {len(data.get('certifiers', []))} certifiers, {len(data.get('courses', []))} courses"
@@ -241,6 +272,17 @@ async def process_ec(page, ec_code: str, retry: int = 0) -> dict | None:
 
 async def main():
     """Main extraction loop."""
+    parser = argparse.ArgumentParser(description="EC details Playwright extractor")
+    add_worker_arguments(parser)
+    args = parser.parse_args()
+    shard = worker_from_args(args, CHECKPOINT_FILE, fsync_every=BATCH_SIZE)
+
+    if args.merge:
+        checkpoint, merged = merge_shards(journal, PLAYWRIGHT)
+        print(f"Merged {merged} shard records into {CHECKPOINT_FILE.name}")
+        save_final_output(checkpoint)
+        return
+
     print("=" * 60)
     print("EC Details Extractor - Playwright Edition")
     print("=" * 60)
@@ -249,19 +291,37 @@ async def main():
     ec_codes = load_ec_codes()
     print(f"Loaded {len(ec_codes)} EC codes to process")
 
-    # Load checkpoint
-    checkpoint = load_checkpoint()
+    # Load checkpoint (read-only for shard workers: others load it too)
+    checkpoint = journal.load() if shard else load_checkpoint()
     processed = set(checkpoint["processed"])
 
     # Filter out already processed
     remaining = [code for code in ec_codes if code not in processed]
     print(f"Already processed: {len(processed)}, Remaining: {len(remaining)}")
+    if shard:
+        shard.start(remaining)
 
     if not remaining:
         print("All ECs already processed!")
-        save_final_output(checkpoint)
+        if not shard:
+            save_final_output(checkpoint)
         return
 
+    # Shard workers journal into their own file; --merge fills the store
+    run_journal = shard.journal if shard else journal
+    store = None if shard else open_store()
+    run_id = store.start_run(PLAYWRIGHT) if store else None
+
+    status = StatusWriter(
+        shard.checkpoint_file if shard else CHECKPOINT_FILE,
+        PLAYWRIGHT,
+        total=len(ec_codes),
+        processed=len(checkpoint["processed"]),
+        failed=len(checkpoint["failed"]),
+        remaining=len(remaining),
+    )
+    status.beat(force=True)
+
     # Start extraction
     async with async_playwright() as p:
         browser = await p.chromium.launch(headless=True)
@@ -273,29 +333,42 @@ async def main():
 
         batch_count = 0
         start_time = time.time()
+        latency = LatencyStats()
 
-        for i, ec_code in enumerate(remaining):
+        for i, ec_code in enumerate(shard if shard else remaining):
             print(f"\n[{i + 1}/{len(remaining)}] Processing {ec_code}")
 
             data = await process_ec(page, ec_code)
-
+            if data:
+                # Step timings feed the latency summary only, never the outputs
+                latency.add(data.pop("timings_ms"))
+
+            run_journal.append(ec_code, data)
+            if shard:
+                shard.done(ec_code, bool(data))
+            if store:
+                store.upsert_ec_detail(PLAYWRIGHT, ec_code, data)
             if data:
                 checkpoint["data"][ec_code] = data
                 checkpoint["processed"].append(ec_code)
             else:
                 checkpoint["failed"].append(ec_code)
+            status.record(bool(data))
 
             batch_count += 1
 
             # Save checkpoint every batch
             if batch_count >= BATCH_SIZE:
-                save_checkpoint(checkpoint)
+                run_journal.sync()
+                if store:
+                    store.commit()
                 elapsed = time.time() - start_time
                 rate = (i + 1) / elapsed * 60  # ECs per minute
                 remaining_time = (len(remaining) - i - 1) / rate if rate > 0 else 0
                 print(f"\n💾 Checkpoint saved. Progress: {i + 1}/{len(remaining)}")
                 print(f"\n💾 Checkpoint saved. Progress: {i+1}/{len(remaining)}")
                 print(f"   Rate: {rate:.1f} ECs/min, ETA: {remaining_time:.0f} min")
+                print(f"   Step latency: {latency.summary()}")
                 batch_count = 0
 
             # Small delay between requests
@@ -303,9 +376,20 @@ async def main():
 
         await browser.close()
 
+    if shard:
+        # The shard journal is the result; --merge writes checkpoint and output
+        shard.close()
+        status.finish()
+        print(f"\nWorker {shard.worker} done")
+        return
+
     # Final save
     save_checkpoint(checkpoint)
     save_final_output(checkpoint)
+    status.finish()
+    if store:
+        store.finish_run(run_id, len(checkpoint["processed"]), len(checkpoint["failed"]))
+        store.close()
 
     print("\n" + "=" * 60)
     print("Extraction Complete!")
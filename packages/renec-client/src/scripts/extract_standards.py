@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+EC standards catalog extraction from the CONOCER API.
+
+Fetches sectoresProductivos/getEstandaresAll through the shared client and
+writes ec_standards_api.json, the list every EC extractor works from. The
+file is only rewritten when the catalog changed, so an unchanged catalog
+leaves downstream pipeline stages (see harvest_pipeline.py) with nothing
+to redo.
+
+Usage:
+  python extract_standards.py
+"""
+
+import json
+import sys
+from pathlib import Path
+
+from checkpoint_journal import write_json_atomic
+from conocer_http import get_client
+from harvest_store import open_store
+from rate_limit import AdaptiveLimiter, TransientError
+
+OUTPUT_DIR = Path(__file__).parent.parent.parent / "data" / "extracted"
+OUTPUT_FILE = OUTPUT_DIR / "ec_standards_api.json"
+MAX_ATTEMPTS = 3  # Tries while the server is overloaded
+
+limiter = AdaptiveLimiter(maximum=1)
+
+
+def fetch_standards() -> list[dict]:
+    """The full standards catalog (raises after MAX_ATTEMPTS overloads)."""
+    for attempt in range(MAX_ATTEMPTS):
+        try:
+            response = limiter.call(
+                get_client().get, "sectoresProductivos/getEstandaresAll"
+            )
+            break
+        except TransientError as e:
+            print(f"  Server overloaded ({e}), attempt {attempt + 1}")
+            if attempt == MAX_ATTEMPTS - 1:
+                raise
+    data = response.json()
+    # Some deployments wrap the list like comites/{id} does
+    if isinstance(data, dict):
+        data = data.get("results") or []
+    return [std for std in data if std.get("codigo") or std.get("clave")]
+
+
+def main():
+    print("=" * 60)
+    print("EC Standards Catalog Extraction")
+    print("=" * 60)
+
+    standards = fetch_standards()
+    if not standards:
+        print("❌ Empty catalog; keeping the existing file")
+        sys.exit(1)
+    print(f"Fetched {len(standards)} EC standards")
+
+    previous = None
+    if OUTPUT_FILE.exists():
+        with open(OUTPUT_FILE, "r", encoding="utf-8") as f:
+            previous = json.load(f)
+    if standards == previous:
+        print(f"Unchanged: {OUTPUT_FILE}")
+        return
+
+    OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+    write_json_atomic(OUTPUT_FILE, standards, indent=2)
+
+    store = open_store()
+    if store:
+        with store:
+            for std in standards:
+                store.upsert_standard(std)
+
+    old_codes = {s.get("codigo") or s.get("clave") for s in previous or []}
+    new_codes = {s.get("codigo") or s.get("clave") for s in standards}
+    print(f"✅ Saved to {OUTPUT_FILE}")
+    print(f"   Added: {len(new_codes - old_codes)}")
+    print(f"   Removed: {len(old_codes - new_codes)}")
+
+
+if __name__ == "__main__":
+    main()
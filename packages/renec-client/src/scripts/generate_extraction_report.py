@@ -9,6 +9,11 @@ import json
 from datetime import datetime
 from pathlib import Path
 
+from checkpoint_journal import CheckpointJournal
+from harvest_store import CERTIFIERS, open_store
+from json_stream import iter_json, iter_object
+from stats_engine import Degrees
+
 OUTPUT_DIR = Path(__file__).parent.parent.parent / "data" / "extracted"
 
 
@@ -21,52 +26,107 @@ def load_json(filename: str) -> dict | list | None:
     return None
 
 
+def load_header(filename: str, big_key: str) -> dict | None:
+    """Top-level members of a JSON output file, skipping (streaming past) big_key."""
+    filepath = OUTPUT_DIR / filename
+    if not filepath.exists():
+        return None
+    return {
+        key: value
+        for key, value in iter_object(filepath, stream=(big_key,))
+        if key != big_key
+    }
+
+
 def format_number(n: int) -> str:
     """Format number with commas."""
     return f"{n:,}"
 
 
+def detail_stats(records) -> dict:
+    """Relationship counts over streamed (ec_code, data) records."""
+    stats = {"ecs": 0, "certifiers": 0, "courses": 0, "ecs_with_certifiers": 0}
+    for _, data in records:
+        stats["ecs"] += 1
+        stats["certifiers"] += len(data.get("certifiers", []))
+        stats["courses"] += len(data.get("courses", []))
+        if data.get("certifiers"):
+            stats["ecs_with_certifiers"] += 1
+    return stats
+
+
+def coverage_rows(groups: list[dict]) -> str:
+    """Table rows for registry_stats.json by_sector/by_committee entries."""
+    rows = ""
+    for group in groups:
+        name = group["name"][:57] + "..." if len(group["name"]) > 60 else group["name"]
+        rows += (
+            f"| {name} | {format_number(group['ecs'])} "
+            f"| {format_number(group['ecs_with_certifiers'])} "
+            f"| {group['coverage_pct']}% "
+            f"| {format_number(group['unique_certifiers'])} |\n"
+        )
+    return rows
+
+
 def generate_report() -> str:
     """Generate comprehensive extraction report."""
-    # Load all data sources
-    ec_standards = load_json("ec_standards_api.json") or []
-    committees = load_json("committees_complete.json") or []
-    ec_certifiers = load_json("ec_certifiers_all.json")
-    checkpoint = load_json("certifiers_checkpoint.json")
-    ece_registry = load_json("master_ece_registry.json")
-    ccap_registry = load_json("master_ccap_registry.json")
-    registry_stats = load_json("registry_stats.json")
-    ec_ece_matrix = load_json("ec_ece_matrix.json")
-
-    # Use checkpoint if final file not available
-    if not ec_certifiers and checkpoint:
-        ec_details = checkpoint.get("data", {})
-        failed_ecs = checkpoint.get("failed", [])
-        processed_count = len(checkpoint.get("processed", []))
-    elif ec_certifiers:
-        ec_details = ec_certifiers.get("ec_details", {})
-        failed_ecs = ec_certifiers.get("failed_ecs", [])
-        processed_count = len(ec_details)
+    # Stream all data sources (harvest store first, when enabled); only
+    # counts and small samples are kept
+    store = open_store()
+    certifiers_file = OUTPUT_DIR / "ec_certifiers_all.json"
+    if store:
+        with store:
+            standards = store.standards()
+            committees = store.committees()
+            details = detail_stats(store.iter_ec_details(CERTIFIERS))
+            failed_ecs = store.failed_ecs(CERTIFIERS)
+        processed_count = details["ecs"]
     else:
-        ec_details = {}
-        failed_ecs = []
-        processed_count = 0
+        standards = iter_json(OUTPUT_DIR / "ec_standards_api.json")
+        committees = iter_json(OUTPUT_DIR / "committees_complete.json")
+        if certifiers_file.exists():
+            details = detail_stats(iter_json(certifiers_file, "ec_details"))
+            failed_ecs = list(iter_json(certifiers_file, "failed_ecs"))
+            processed_count = details["ecs"]
+        else:
+            # Use checkpoint if final file not available
+            journal = CheckpointJournal(OUTPUT_DIR / "certifiers_checkpoint.json")
+            index = journal.load_index()
+            details = detail_stats(journal.iter_data())
+            failed_ecs = index["failed"]
+            processed_count = len(index["processed"])
+
+    standards_count = 0
+    standards_sample = []
+    for std in standards:
+        standards_count += 1
+        if len(standards_sample) < 10:
+            standards_sample.append(std)
+
+    committees_count = 0
+    ec_counts = []  # ECs per committee
+    for c in committees:
+        committees_count += 1
+        if isinstance(c.get("ec_codes"), list):
+            ec_counts.append(len(c["ec_codes"]))
+
+    ece_registry = load_header("master_ece_registry.json", "registry")
+    ccap_registry = load_header("master_ccap_registry.json", "registry")
+    registry_stats = load_json("registry_stats.json")
+    ec_ece_matrix = load_header("ec_ece_matrix.json", "matrix")
 
     # Calculate stats
-    total_cert_relationships = sum(
-        len(d.get("certifiers", [])) for d in ec_details.values()
-    )
-    total_course_relationships = sum(
-        len(d.get("courses", [])) for d in ec_details.values()
-    )
-    ecs_with_certifiers = sum(1 for d in ec_details.values() if d.get("certifiers"))
+    total_cert_relationships = details["certifiers"]
+    total_course_relationships = details["courses"]
+    ecs_with_certifiers = details["ecs_with_certifiers"]
 
     now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
 
     report = f"""# CONOCER/RENEC Data Extraction Report
 
 **Generated**: {now}
-**Status**: {"✅ Complete" if processed_count >= len(ec_standards) else f"🔄 In Progress ({processed_count}/{len(ec_standards)})"}
+**Status**: {"✅ Complete" if processed_count >= standards_count else f"🔄 In Progress ({processed_count}/{standards_count})"}
 
 ---
 
@@ -78,8 +138,8 @@ This report summarizes the comprehensive data extraction from the Mexican CONOCE
 
 | Metric | Value |
 |--------|-------|
-| EC Standards Catalogued | {format_number(len(ec_standards))} |
-| Committees Extracted | {format_number(len(committees))} |
+| EC Standards Catalogued | {format_number(standards_count)} |
+| Committees Extracted | {format_number(committees_count)} |
 | ECs Processed for Details | {format_number(processed_count)} |
 | Unique Certifiers (ECEs) | {format_number(ece_registry["total_count"] if ece_registry else 0)} |
 | Unique Courses/CCAPs | {format_number(ccap_registry["total_count"] if ccap_registry else 0)} |
@@ -90,7 +150,7 @@ This report summarizes the comprehensive data extraction from the Mexican CONOCE
 
 ## 1. EC Standards (Estándares de Competencia)
 
-**Total**: {format_number(len(ec_standards))} standards extracted from API
+**Total**: {format_number(standards_count)} standards extracted from API
 
 EC Standards define the competencies that can be certified. Each standard specifies:
 - Required knowledge and skills
@@ -101,17 +161,17 @@ EC Standards define the competencies that can be certified. Each standard specif
 """
 
     # Add sample standards
-    if ec_standards:
+    if standards_sample:
         report += "\n| Code | Title |\n|------|-------|\n"
-        for std in ec_standards[:10]:
+        for std in standards_sample:
             code = std.get("codigo") or std.get("clave", "N/A")
             title = std.get("titulo") or std.get("nombre", "N/A")
             if len(title) > 60:
                 title = title[:57] + "..."
             report += f"| {code} | {title} |\n"
-        if len(ec_standards) > 10:
+        if standards_count > 10:
             report += (
-                f"\n*...and {format_number(len(ec_standards) - 10)} more standards*\n"
+                f"\n*...and {format_number(standards_count - 10)} more standards*\n"
             )
 
     report += f"""
@@ -120,30 +180,35 @@ EC Standards define the competencies that can be certified. Each standard specif
 
 ## 2. Committees (Comités de Gestión por Competencias)
 
-**Total**: {format_number(len(committees))} committees extracted
+**Total**: {format_number(committees_count)} committees extracted
 
 Committees are industry groups that develop and maintain EC standards for their sector.
 
 ### Committee Statistics
 """
 
-    if committees:
-        # Count ECs per committee
-        ec_counts = [
-            len(c.get("ec_codes", []))
-            for c in committees
-            if isinstance(c.get("ec_codes"), list)
-        ]
-        if ec_counts:
-            report += f"""
+    if ec_counts:
+        committee_ecs = Degrees(ec_counts)
+        report += f"""
 | Metric | Value |
 |--------|-------|
-| Total Committees | {format_number(len(committees))} |
-| Avg ECs per Committee | {sum(ec_counts) / len(ec_counts):.1f} |
-| Max ECs per Committee | {max(ec_counts)} |
-| Committees with 10+ ECs | {sum(1 for c in ec_counts if c >= 10)} |
+| Total Committees | {format_number(committees_count)} |
+| Avg ECs per Committee | {committee_ecs.mean(1)} |
+| Median ECs per Committee | {committee_ecs.percentiles((50,))["p50"]:g} |
+| Max ECs per Committee | {committee_ecs.max()} |
+| Committees with 10+ ECs | {committee_ecs.at_least(10)} |
 """
 
+    by_committee = (registry_stats or {}).get("by_committee", [])
+    if by_committee:
+        report += """
+### Certifier Coverage by Committee (15 largest)
+
+| Committee | ECs | With ECEs | Coverage | Distinct ECEs |
+|-----------|-----|-----------|----------|---------------|
+"""
+        report += coverage_rows(by_committee[:15])
+
     report += f"""
 
 ---
@@ -168,7 +233,43 @@ ECEs are authorized organizations that can evaluate and certify individuals agai
 | ECEs with 1 EC only | {format_number(ece_stats.get("certifiers_with_1_ec", 0))} |
 | ECEs with 5+ ECs | {format_number(ece_stats.get("certifiers_with_5plus_ecs", 0))} |
 | ECEs with 10+ ECs | {format_number(ece_stats.get("certifiers_with_10plus_ecs", 0))} |
+"""
+        percentiles = ece_stats.get("ec_count_percentiles", {})
+        if percentiles:
+            report += (
+                "| ECs per ECE (p25/p50/p75/p90/p99) | "
+                + " / ".join(f"{v:g}" for v in percentiles.values())
+                + " |\n"
+            )
+        histogram = ece_stats.get("ec_count_histogram", [])
+        if histogram:
+            report += "\n### ECs per ECE\n\n| ECs | ECEs |\n|-----|------|\n"
+            for row in histogram:
+                report += f"| {row['range']} | {format_number(row['count'])} |\n"
+
+        ec_stats = registry_stats.get("ec_certifier_stats", {})
+        if ec_stats:
+            report += f"""
+### ECEs per EC
 
+| Metric | Value |
+|--------|-------|
+| Avg ECEs per EC | {ec_stats["avg_certifiers_per_ec"]} |
+| Max ECEs per EC | {ec_stats["max_certifiers_per_ec"]} |
+| ECs with 10+ ECEs | {format_number(ec_stats["ecs_with_10plus_certifiers"])} |
+"""
+
+        by_sector = registry_stats.get("by_sector", [])
+        if by_sector:
+            report += """
+### Certifier Coverage by Sector
+
+| Sector | ECs | With ECEs | Coverage | Distinct ECEs |
+|--------|-----|-----------|----------|---------------|
+"""
+            report += coverage_rows(by_sector)
+
+        report += """
 ### Top Certifiers by EC Coverage
 """
         top_certs = registry_stats.get("top_20_certifiers", [])[:15]
@@ -229,47 +330,67 @@ All extracted data is stored in `data/extracted/`:
 
 | File | Description | Records |
 |------|-------------|---------|
-| `ec_standards_api.json` | All EC standards from API | {format_number(len(ec_standards))} |
-| `committees_complete.json` | All committees with EC mappings | {format_number(len(committees))} |
+| `ec_standards_api.json` | All EC standards from API | {format_number(standards_count)} |
+| `committees_complete.json` | All committees with EC mappings | {format_number(committees_count)} |
 | `ec_certifiers_all.json` | EC detail extraction results | {format_number(processed_count)} |
 | `master_ece_registry.json` | Deduplicated ECE registry | {format_number(ece_registry["total_count"] if ece_registry else 0)} |
 | `master_ccap_registry.json` | Deduplicated CCAP registry | {format_number(ccap_registry["total_count"] if ccap_registry else 0)} |
-| `ec_ece_matrix.json` | EC-to-ECE relationship matrix | {format_number(len(ec_ece_matrix.get("matrix", {})) if ec_ece_matrix else 0)} |
+| `ec_ece_matrix.json` | EC-to-ECE relationship matrix | {format_number(ec_ece_matrix.get("total_ecs", 0) if ec_ece_matrix else 0)} |
+| `ec_ece_matrix.csr` | Same matrix as memory-mappable CSR arrays (`ec_ece_csr.py`) | - |
 | `registry_stats.json` | Computed statistics | - |
+| `registry_index.sqlite3` | Name/title token index and EC-ECE adjacency | - |
 
 ---
 
 ## 7. Usage Notes
 
+Lookups go through `registry_index.sqlite3`, a token index over the
+registries (built by `registry_index.py build`, or by the `index` stage of
+`harvest_pipeline.py`). Queries take milliseconds and load nothing else.
+
+```bash
+cd src/scripts
+python registry_index.py certifiers EC0217.01   # Certifiers for an EC
+python registry_index.py ece conalep            # Certifiers by name (prefix on last word)
+python registry_index.py ecs ECE-00001          # ECs a certifier covers
+python registry_index.py ec "seguridad indus"   # ECs by title words or code prefix
+```
+
 ### Finding Certifiers for an EC
 
 ```python
-import json
+from registry_index import RegistryIndex
 
-# Load the matrix
-with open('ec_ece_matrix.json') as f:
-    matrix = json.load(f)['matrix']
-
-# Look up certifiers for EC0217.01
-ec_info = matrix.get('EC0217.01')
-print(f"ECE IDs: {{ec_info['ece_ids']}}")
-print(f"Count: {{ec_info['ece_count']}}")
+with RegistryIndex() as index:
+    eces = index.certifiers_for('EC0217.01')
+    print(f"Count: {{len(eces)}}")
+    print(f"ECE IDs: {{[ece['id'] for ece in eces[:10]]}}")
 ```
 
 ### Finding ECs for a Certifier
 
 ```python
-import json
+from registry_index import RegistryIndex
+
+with RegistryIndex() as index:
+    # Name tokens, accent-insensitive; the last one also matches as a prefix
+    for ece in index.search_eces('CONALEP'):
+        ec_codes = [ec['code'] for ec in index.ecs_for(ece['id'])]
+        print(f"{{ece['name']}}: {{ece['ec_count']}} ECs")
+        print(f"EC codes: {{ec_codes[:10]}}...")
+```
+
+### Bulk Relationship Queries
 
-# Load ECE registry
-with open('master_ece_registry.json') as f:
-    registry = json.load(f)['registry']
+For jobs that intersect many EC/ECE sets, `ec_ece_csr.py` maps the
+matrix's integer arrays directly (no parsing):
+
+```python
+from ec_ece_csr import CsrMatrix
 
-# Find certifier by name (partial match)
-for ece in registry:
-    if 'CONALEP' in ece['canonical_name'].upper():
-        print(f"{{ece['canonical_name']}}: {{ece['ec_count']}} ECs")
-        print(f"EC codes: {{ece['ec_codes'][:10]}}...")
+with CsrMatrix() as csr:
+    shared = csr.common_eces('EC0217.01', 'EC0301')   # Certify both
+    print(f"{{len(shared)}} certifiers: {{shared[:10]}}")
 ```
 
 ---
@@ -0,0 +1,385 @@
+#!/usr/bin/env python3
+"""
+Harvest pipeline: every CONOCER/RENEC stage as one DAG.
+
+Each stage is a script with declared input and output files under
+data/extracted/. A stage depends on the stages producing its inputs and
+is skipped when its inputs and outputs still have the content hashes
+recorded after its last successful run (pipeline_state.json), so an
+unchanged catalog or certifier file means no registry rebuild and no new
+report. Stages whose dependencies are met run concurrently (the committee
+scan alongside the EC detail extraction); each one logs to
+pipeline_<stage>.log.
+
+  standards ──┬── committees ───────────────────┐
+              └── certifiers ── registries ──┬── report
+                                             └── index
+
+Stages that talk to conocer.gob.mx (standards, committees, certifiers) have
+nothing local to compare against the network, so they always run (nightly
+runs retry what failed last time); the local stages after them are still
+skipped when those runs leave their outputs unchanged. --offline leaves all
+three out.
+
+Usage:
+  python harvest_pipeline.py                      # Everything, as needed
+  python harvest_pipeline.py report --offline     # Rebuild from local data only
+  python harvest_pipeline.py --force registries   # Rerun a stage regardless
+  python harvest_pipeline.py --workers 8          # Sharded EC extraction
+  python harvest_pipeline.py --dry-run            # Show what would run
+"""
+
+import argparse
+import hashlib
+import json
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime
+from pathlib import Path
+
+from checkpoint_journal import write_json_atomic
+
+PACKAGE_DIR = Path(__file__).parent.parent.parent
+OUTPUT_DIR = PACKAGE_DIR / "data" / "extracted"
+SCRIPTS_DIR = Path(__file__).parent
+STATE_FILE = OUTPUT_DIR / "pipeline_state.json"
+HASH_CHUNK = 1 << 20
+
+# Outcomes
+RAN = "ran"
+SKIPPED = "unchanged"
+OFFLINE = "offline"
+FAILED = "failed"
+BLOCKED = "blocked"
+
+
+class Stage:
+    """One pipeline step: a script plus the files it reads and writes."""
+
+    def __init__(
+        self,
+        name: str,
+        args: list[str],
+        inputs: tuple[str, ...] = (),
+        outputs: tuple[str, ...] = (),
+        network: bool = False,
+    ):
+        self.name = name
+        self.args = args
+        self.inputs = inputs
+        self.outputs = outputs
+        self.network = network
+        self.deps: set[str] = set()
+
+    def command(self) -> list[str]:
+        return [sys.executable, str(SCRIPTS_DIR / self.args[0]), *self.args[1:]]
+
+
+def build_stages(workers: int = 0) -> dict[str, Stage]:
+    """The harvest DAG; dependencies follow from inputs and outputs.
+
+    With workers > 1 the EC details come from a sharded harvest
+    (harvest_shards.py) instead of a single extractor process.
+    """
+    certifiers = ["extract_certifiers_batch.py"]
+    if workers > 1:
+        certifiers = ["harvest_shards.py", "run", "certifiers"]
+        certifiers += ["--workers", str(workers)]
+    stages = [
+        Stage(
+            "standards",
+            ["extract_standards.py"],
+            outputs=("ec_standards_api.json",),
+            network=True,
+        ),
+        Stage(
+            "committees",
+            ["extract_committees.py", "--discover"],
+            inputs=("ec_standards_api.json",),
+            outputs=("committees_complete.json",),
+            network=True,
+        ),
+        Stage(
+            "certifiers",
+            certifiers,
+            inputs=("ec_standards_api.json",),
+            outputs=("ec_certifiers_all.json", "unique_certifiers.json"),
+            network=True,
+        ),
+        Stage(
+            "registries",
+            ["build_master_registries.py", "--incremental"],
+            inputs=("ec_certifiers_all.json", "ec_standards_api.json"),
+            outputs=(
+                "master_ece_registry.json",
+                "master_ccap_registry.json",
+                "ec_ece_matrix.json",
+                "ec_ece_matrix.csr",
+                "registry_stats.json",
+            ),
+        ),
+        Stage(
+            "report",
+            ["generate_extraction_report.py"],
+            inputs=(
+                "ec_standards_api.json",
+                "committees_complete.json",
+                "ec_certifiers_all.json",
+                "master_ece_registry.json",
+                "master_ccap_registry.json",
+                "ec_ece_matrix.json",
+                "registry_stats.json",
+            ),
+            outputs=("CONOCER_EXTRACTION_REPORT.md",),
+        ),
+        Stage(
+            "index",
+            ["registry_index.py", "build"],
+            inputs=("master_ece_registry.json", "ec_ece_matrix.json"),
+            outputs=("registry_index.sqlite3",),
+        ),
+    ]
+    producers = {out: s.name for s in stages for out in s.outputs}
+    for stage in stages:
+        stage.deps = {producers[i] for i in stage.inputs if i in producers}
+    return {s.name: s for s in stages}
+
+
+def with_ancestors(stages: dict[str, Stage], targets) -> list[str]:
+    """`targets` and everything they depend on, in topological order."""
+    order, seen = [], set()
+
+    def visit(name: str):
+        if name in seen:
+            return
+        seen.add(name)
+        for dep in sorted(stages[name].deps):
+            visit(dep)
+        order.append(name)
+
+    for name in targets:
+        visit(name)
+    return order
+
+
+class FileHashes:
+    """Content hashes of data files, reusing known ones by size and mtime."""
+
+    def __init__(self, known: dict | None = None):
+        self.known = dict(known or {})
+        self._lock = threading.Lock()
+
+    def digest(self, name: str) -> str | None:
+        path = OUTPUT_DIR / name
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            return None
+        with self._lock:
+            entry = self.known.get(name)
+        if entry and entry["size"] == stat.st_size and entry["mtime_ns"] == (
+            stat.st_mtime_ns
+        ):
+            return entry["sha1"]
+        h = hashlib.sha1()
+        with open(path, "rb") as f:
+            while chunk := f.read(HASH_CHUNK):
+                h.update(chunk)
+        with self._lock:
+            self.known[name] = {
+                "size": stat.st_size,
+                "mtime_ns": stat.st_mtime_ns,
+                "sha1": h.hexdigest(),
+            }
+        return h.hexdigest()
+
+    def snapshot(self, names) -> dict:
+        return {name: self.digest(name) for name in names}
+
+
+class PipelineState:
+    """Per-stage input/output hashes of the last successful run."""
+
+    def __init__(self, path: Path = STATE_FILE):
+        self.path = path
+        data = {}
+        if path.exists():
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        self.stages = data.get("stages", {})
+        self.hashes = FileHashes(data.get("files"))
+        self._lock = threading.Lock()
+
+    def up_to_date(self, stage: Stage) -> bool:
+        """Whether inputs and outputs are exactly as after the last run."""
+        last = self.stages.get(stage.name)
+        if not last or not stage.inputs:
+            return False
+        current = self.hashes.snapshot(stage.inputs + stage.outputs)
+        if None in current.values():
+            return False
+        return current == {**last["inputs"], **last["outputs"]}
+
+    def record(self, stage: Stage, inputs: dict, seconds: float):
+        outputs = self.hashes.snapshot(stage.outputs)
+        with self._lock:
+            self.stages[stage.name] = {
+                "inputs": inputs,
+                "outputs": outputs,
+                "finished_at": datetime.now().isoformat(),
+                "seconds": round(seconds, 1),
+            }
+            self.save()
+
+    def save(self):
+        write_json_atomic(
+            self.path,
+            {"stages": self.stages, "files": self.hashes.known},
+            indent=2,
+        )
+
+
+def run_stage(stage: Stage, state: PipelineState) -> str:
+    """Run one stage to completion, logging to pipeline_<stage>.log."""
+    # Hash inputs before the run: a change made meanwhile reruns it next time
+    inputs = state.hashes.snapshot(stage.inputs)
+    log_file = OUTPUT_DIR / f"pipeline_{stage.name}.log"
+    start = time.time()
+    with open(log_file, "w", encoding="utf-8") as log:
+        returncode = subprocess.call(
+            stage.command(),
+            cwd=PACKAGE_DIR,  # extract_committees.py writes to ./data/extracted
+            stdout=log,
+            stderr=subprocess.STDOUT,
+        )
+    if returncode != 0:
+        print(f"❌ {stage.name} failed (exit {returncode}), see {log_file.name}")
+        return FAILED
+    state.record(stage, inputs, time.time() - start)
+    print(f"✅ {stage.name} done in {(time.time() - start) / 60:.1f} min", flush=True)
+    return RAN
+
+
+def run_pipeline(
+    targets=None,
+    force=(),
+    offline: bool = False,
+    workers: int = 0,
+    jobs: int = 4,
+    dry_run: bool = False,
+) -> dict[str, str]:
+    """Run `targets` (default: all stages) and their dependencies.
+
+    Returns each stage's outcome. A stage runs as soon as all of its
+    dependencies finished without failing; dependents of a failed stage
+    are blocked.
+    """
+    stages = build_stages(workers)
+    order = with_ancestors(stages, targets or list(stages))
+    state = PipelineState()
+    outcomes: dict[str, str] = {}
+    force = set(stages) if "all" in force else set(force)
+
+    def decide(name: str) -> str | None:
+        """Outcome known without running, or None if the stage must run."""
+        stage = stages[name]
+        if any(outcomes[d] in (FAILED, BLOCKED) for d in stage.deps):
+            return BLOCKED
+        if stage.network and offline:
+            return OFFLINE
+        if name in force or stage.network:
+            return None  # Local hashes say nothing about what changed upstream
+        # Checked only now: upstream stages may just have rewritten inputs
+        return SKIPPED if state.up_to_date(stage) else None
+
+    if dry_run:
+        for name in order:
+            outcome = decide(name) or RAN
+            outcomes[name] = outcome
+            if outcome == RAN:
+                label = "would run"
+            elif outcome == SKIPPED and RAN in (outcomes[d] for d in stages[name].deps):
+                label = "unchanged unless upstream output changes"
+            else:
+                label = outcome
+            print(f"   {name:<11} {label}")
+        return outcomes
+
+    pending = list(order)
+    running = {}
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as executor:
+        while pending or running:
+            for name in list(pending):
+                if all(d in outcomes for d in stages[name].deps):
+                    pending.remove(name)
+                    outcome = decide(name)
+                    if outcome:
+                        outcomes[name] = outcome
+                        print(f"⏭️  {name}: {outcome}", flush=True)
+                        continue
+                    print(f"▶️  {name}: {' '.join(stages[name].args)}", flush=True)
+                    future = executor.submit(run_stage, stages[name], state)
+                    running[future] = name
+            if not running:
+                continue
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                outcomes[running.pop(future)] = future.result()
+    return outcomes
+
+
+def main():
+    stage_names = list(build_stages())
+    parser = argparse.ArgumentParser(description="CONOCER/RENEC harvest pipeline")
+    parser.add_argument(
+        "targets",
+        nargs="*",
+        help=f"stages to bring up to date with their dependencies: "
+        f"{', '.join(stage_names)} (default: all)",
+    )
+    parser.add_argument(
+        "--force",
+        action="append",
+        default=[],
+        choices=stage_names + ["all"],
+        help="run this stage even if its inputs are unchanged (repeatable)",
+    )
+    parser.add_argument(
+        "--offline", action="store_true", help="skip the stages that hit CONOCER"
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=0,
+        help="extract EC details with N sharded worker processes",
+    )
+    parser.add_argument("--jobs", type=int, default=4, help="stages run at once")
+    parser.add_argument("--dry-run", action="store_true", help="only show the plan")
+    args = parser.parse_args()
+    unknown = [t for t in args.targets if t not in stage_names]
+    if unknown:
+        parser.error(f"unknown stage(s): {', '.join(unknown)}")
+
+    print("=" * 60)
+    print("CONOCER/RENEC Harvest Pipeline")
+    print("=" * 60)
+
+    start = time.time()
+    outcomes = run_pipeline(
+        args.targets, args.force, args.offline, args.workers, args.jobs, args.dry_run
+    )
+    if args.dry_run:
+        return
+
+    print(f"\nFinished in {(time.time() - start) / 60:.1f} min")
+    for name, outcome in outcomes.items():
+        print(f"   {name:<11} {outcome}")
+    if any(o in (FAILED, BLOCKED) for o in outcomes.values()):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,495 @@
+#!/usr/bin/env python3
+"""
+Sharded harvesting: several extractor processes over one EC code list.
+
+A single extractor process walks the sorted EC codes alone, and two of them
+would race on the same checkpoint. In sharded mode each worker process
+(extract_certifiers_batch.py, extract_ec_details_api.py or
+extract_ec_details_playwright.py started with --worker/--shard) reads the
+main checkpoint read-only and appends its results to its own journal,
+<checkpoint>.shard-<worker>.jsonl. A merge step (--merge) folds every shard
+journal into the main checkpoint and writes the usual outputs.
+
+Work is handed out in one of two ways:
+
+  - a lease queue (<checkpoint>.queue.sqlite3): workers lease a few codes at
+    a time; a lease that is not completed within LEASE_SECONDS (worker died)
+    goes back to the queue, and failed codes are retried by any worker up to
+    MAX_ATTEMPTS times. For workers on one box (or a local shared disk);
+  - a static partition (--shard K/N): worker K takes the codes whose CRC32
+    is K mod N. Needs no shared state, so it suits several machines; copy
+    their shard journals next to the checkpoint before merging.
+
+Usage:
+  python harvest_shards.py run certifiers --workers 8 [-- --intercept]
+  python harvest_shards.py merge api
+  python harvest_shards.py status playwright
+
+  # or by hand, e.g. on two machines
+  python extract_ec_details_api.py --shard 0/2   # machine A
+  python extract_ec_details_api.py --shard 1/2   # machine B
+  python extract_ec_details_api.py --merge       # after copying the journals
+"""
+
+import argparse
+import os
+import socket
+import sqlite3
+import subprocess
+import sys
+import time
+import zlib
+from contextlib import contextmanager
+from pathlib import Path
+
+from checkpoint_journal import CheckpointJournal, replay
+from harvest_store import API, CERTIFIERS, PLAYWRIGHT, open_store
+from json_stream import iter_jsonl
+from run_status import is_running, read_status, status_path
+
+OUTPUT_DIR = Path(__file__).parent.parent.parent / "data" / "extracted"
+SCRIPTS_DIR = Path(__file__).parent
+LEASE_SECONDS = 600  # Lease lifetime; renewed whenever the worker reports
+LEASE_BATCH = 5  # Codes leased per round trip to the queue
+MAX_ATTEMPTS = 3  # Leases per code before it is given up as failed
+POLL_INTERVAL = 10  # Seconds between coordinator progress lines
+
+# Extractor name (harvest_store) -> (script, checkpoint file name)
+EXTRACTORS = {
+    CERTIFIERS: ("extract_certifiers_batch.py", "certifiers_checkpoint.json"),
+    API: ("extract_ec_details_api.py", "ec_details_api_checkpoint.json"),
+    PLAYWRIGHT: ("extract_ec_details_playwright.py", "ec_details_checkpoint.json"),
+}
+
+PENDING = "pending"
+LEASED = "leased"
+DONE = "done"
+FAILED = "failed"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS items (
+    code TEXT PRIMARY KEY,
+    state TEXT NOT NULL,
+    worker TEXT,
+    expires REAL,
+    attempts INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS items_state ON items (state);
+"""
+
+
+def queue_file(checkpoint_file: Path) -> Path:
+    """Lease queue next to a checkpoint: <name>.queue.sqlite3."""
+    checkpoint_file = Path(checkpoint_file)
+    return checkpoint_file.with_name(checkpoint_file.stem + ".queue.sqlite3")
+
+
+def shard_checkpoint(checkpoint_file: Path, worker: str) -> Path:
+    """Per-worker checkpoint name; its journal is the .jsonl beside it."""
+    checkpoint_file = Path(checkpoint_file)
+    return checkpoint_file.with_name(f"{checkpoint_file.stem}.shard-{worker}.json")
+
+
+def shard_journals(checkpoint_file: Path) -> list[Path]:
+    checkpoint_file = Path(checkpoint_file)
+    return sorted(checkpoint_file.parent.glob(f"{checkpoint_file.stem}.shard-*.jsonl"))
+
+
+def shard_statuses(checkpoint_file: Path) -> dict[str, dict]:
+    """Status sidecars of the shard workers, by worker name."""
+    checkpoint_file = Path(checkpoint_file)
+    prefix = f"{checkpoint_file.stem}.shard-"
+    suffix = ".status.json"
+    statuses = {}
+    for path in sorted(checkpoint_file.parent.glob(f"{prefix}*{suffix}")):
+        worker = path.name[len(prefix) : -len(suffix)]
+        status = read_status(shard_checkpoint(checkpoint_file, worker))
+        if status:
+            statuses[worker] = status
+    return statuses
+
+
+def queue_counts(checkpoint_file: Path) -> dict | None:
+    """Lease queue counts by state, or None when there is no queue."""
+    path = queue_file(checkpoint_file)
+    if not path.exists():
+        return None
+    queue = WorkQueue(path)
+    try:
+        return queue.counts()
+    finally:
+        queue.close()
+
+
+def parse_shard(value: str) -> tuple[int, int]:
+    """argparse type for "K/N" (0 <= K < N)."""
+    try:
+        k, n = (int(part) for part in value.split("/"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected K/N, got {value!r}")
+    if not 0 <= k < n:
+        raise argparse.ArgumentTypeError(f"need 0 <= K < N, got {value!r}")
+    return k, n
+
+
+def partition(codes: list[str], k: int, n: int) -> list[str]:
+    """The codes of static shard k of n (stable across machines and runs)."""
+    return [c for c in codes if zlib.crc32(c.encode("utf-8")) % n == k]
+
+
+class WorkQueue:
+    """SQLite queue of EC codes handed out under expiring leases.
+
+    Safe to share between processes: every state change is one short
+    IMMEDIATE transaction.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        lease_seconds: float = LEASE_SECONDS,
+        max_attempts: int = MAX_ATTEMPTS,
+    ):
+        self.path = Path(path)
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.conn = sqlite3.connect(self.path, timeout=60, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    @contextmanager
+    def _transaction(self):
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield self.conn
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+        self.conn.execute("COMMIT")
+
+    def fill(self, codes) -> int:
+        """Add codes not queued yet; returns how many were new."""
+        with self._transaction() as conn:
+            before = conn.total_changes
+            conn.executemany(
+                "INSERT OR IGNORE INTO items (code, state) VALUES (?, ?)",
+                [(code, PENDING) for code in codes],
+            )
+            return conn.total_changes - before
+
+    def lease(self, worker: str, n: int = LEASE_BATCH) -> list[str]:
+        """Lease up to n codes: pending ones, or ones whose lease expired."""
+        now = time.time()
+        with self._transaction() as conn:
+            # Expired leases that used up their attempts are given up
+            conn.execute(
+                "UPDATE items SET state = ?, worker = NULL"
+                " WHERE state = ? AND expires < ? AND attempts >= ?",
+                (FAILED, LEASED, now, self.max_attempts),
+            )
+            rows = conn.execute(
+                "SELECT code FROM items"
+                " WHERE state = ? OR (state = ? AND expires < ?)"
+                " ORDER BY attempts, code LIMIT ?",
+                (PENDING, LEASED, now, n),
+            ).fetchall()
+            conn.executemany(
+                "UPDATE items SET state = ?, worker = ?, expires = ?,"
+                " attempts = attempts + 1 WHERE code = ?",
+                [(LEASED, worker, now + self.lease_seconds, code) for code, in rows],
+            )
+        return [code for code, in rows]
+
+    def complete(self, worker: str, code: str, ok: bool):
+        """Record a result; failures go back to the queue while attempts last."""
+        with self._transaction() as conn:
+            if ok:
+                conn.execute(
+                    "UPDATE items SET state = ?, worker = ? WHERE code = ?",
+                    (DONE, worker, code),
+                )
+            else:
+                # Only while we still hold it: a stolen lease is someone else's
+                conn.execute(
+                    "UPDATE items SET worker = NULL,"
+                    " state = CASE WHEN attempts < ? THEN ? ELSE ? END"
+                    " WHERE code = ? AND state = ? AND worker = ?",
+                    (self.max_attempts, PENDING, FAILED, code, LEASED, worker),
+                )
+            # Reporting in is proof of life: extend the worker's other leases
+            conn.execute(
+                "UPDATE items SET expires = ? WHERE state = ? AND worker = ?",
+                (time.time() + self.lease_seconds, LEASED, worker),
+            )
+
+    def release(self, worker: str | None = None) -> int:
+        """Put leased codes back (one worker's, or all when none is running)."""
+        query = "UPDATE items SET state = ?, worker = NULL WHERE state = ?"
+        params = [PENDING, LEASED]
+        if worker is not None:
+            query += " AND worker = ?"
+            params.append(worker)
+        with self._transaction() as conn:
+            return conn.execute(query, params).rowcount
+
+    def counts(self) -> dict:
+        rows = self.conn.execute(
+            "SELECT state, COUNT(*) FROM items GROUP BY state"
+        ).fetchall()
+        counts = {PENDING: 0, LEASED: 0, DONE: 0, FAILED: 0}
+        counts.update(rows)
+        return counts
+
+
+class ShardWorker:
+    """One worker process of a sharded harvest: its codes and its journal."""
+
+    def __init__(
+        self,
+        checkpoint_file: Path,
+        worker: str,
+        shard: tuple[int, int] | None = None,
+        queue_path: Path | None = None,
+        fsync_every: int = 20,
+    ):
+        self.worker = worker
+        self.shard = shard
+        self.checkpoint_file = shard_checkpoint(checkpoint_file, worker)
+        self.journal = CheckpointJournal(self.checkpoint_file, fsync_every)
+        self.queue = None
+        if shard is None:
+            self.queue = WorkQueue(queue_path or queue_file(checkpoint_file))
+        self._codes = []
+
+    def start(self, remaining: list[str]) -> int:
+        """Register the codes still to do; returns how many this worker sees."""
+        if self.queue is None:
+            self._codes = partition(remaining, *self.shard)
+            self._codes.reverse()  # next() pops from the end
+            return len(self._codes)
+        self.queue.fill(remaining)
+        counts = self.queue.counts()
+        return counts[PENDING] + counts[LEASED]
+
+    def take(self, n: int = LEASE_BATCH) -> list[str]:
+        """Up to n more codes; empty once the shard or queue is drained."""
+        if self.queue is not None:
+            return self.queue.lease(self.worker, n)
+        taken = self._codes[-n:][::-1]
+        del self._codes[-n:]
+        return taken
+
+    def next(self) -> str | None:
+        if not self._codes and self.queue is not None:
+            self._codes = self.take()[::-1]
+        return self._codes.pop() if self._codes else None
+
+    def __iter__(self):
+        return iter(self.next, None)
+
+    def done(self, ec_code: str, ok: bool):
+        if self.queue is not None:
+            self.queue.complete(self.worker, ec_code, ok)
+
+    def close(self):
+        """Close the journal and hand unstarted leased codes back."""
+        self.journal.close()
+        if self.queue is not None:
+            self.queue.release(self.worker)
+            self.queue.close()
+
+
+def add_worker_arguments(parser: argparse.ArgumentParser):
+    """--worker/--shard/--queue/--merge, shared by the EC extractors."""
+    group = parser.add_argument_group("sharded harvesting (see harvest_shards.py)")
+    group.add_argument(
+        "--worker",
+        help="run as a queue worker with this ID (journal: <checkpoint>.shard-ID)",
+    )
+    group.add_argument(
+        "--shard",
+        type=parse_shard,
+        metavar="K/N",
+        help="run as worker K of N over a static partition (no queue)",
+    )
+    group.add_argument("--queue", type=Path, help="lease queue file (default: shared)")
+    group.add_argument(
+        "--merge",
+        action="store_true",
+        help="fold the shard journals into the checkpoint and write the outputs",
+    )
+
+
+def worker_from_args(args, checkpoint_file: Path, fsync_every: int = 20):
+    """The ShardWorker requested on the command line, or None."""
+    if args.shard is not None:
+        k, n = args.shard
+        worker = args.worker or f"{k}-of-{n}"
+        return ShardWorker(
+            checkpoint_file, worker, shard=args.shard, fsync_every=fsync_every
+        )
+    if args.worker or args.queue:
+        worker = args.worker or f"{socket.gethostname()}-{os.getpid()}"
+        return ShardWorker(
+            checkpoint_file, worker, queue_path=args.queue, fsync_every=fsync_every
+        )
+    return None
+
+
+def merge_shards(journal: CheckpointJournal, extractor: str) -> tuple[dict, int]:
+    """Fold every shard journal into the main checkpoint (and the store).
+
+    Returns the merged checkpoint and the number of shard records applied.
+    The checkpoint is compacted before the shard journals are deleted, so a
+    crash in between only replays them again, which is harmless.
+    """
+    checkpoint = journal.load()
+    files = shard_journals(journal.checkpoint_file)
+    store = open_store()
+    merged = 0
+    for path in files:
+        records = list(iter_jsonl(path))
+        replay(checkpoint, records)
+        if store:
+            for record in records:
+                store.upsert_ec_detail(extractor, record["ec_code"], record.get("data"))
+        merged += len(records)
+    journal.compact(checkpoint)
+    if store:
+        store.close()
+
+    for path in files:
+        status_path(path.with_suffix(".json")).unlink(missing_ok=True)
+        path.unlink()
+    queue_path = queue_file(journal.checkpoint_file)
+    if queue_path.exists():
+        queue = WorkQueue(queue_path)
+        counts = queue.counts()
+        queue.close()
+        if not counts[PENDING] and not counts[LEASED]:
+            # Drained: the next harvest starts a fresh queue
+            for suffix in ("", "-wal", "-shm"):
+                Path(f"{queue_path}{suffix}").unlink(missing_ok=True)
+    return checkpoint, merged
+
+
+# -- coordinator ---------------------------------------------------------
+
+
+def run_workers(extractor: str, workers: int, extra_args: list[str]) -> dict:
+    """Run `workers` queue workers to completion, in rounds while work is left.
+
+    A round ends when every worker has exited; codes still leased by then
+    belonged to crashed workers and are released for the next round.
+    """
+    script, checkpoint_name = EXTRACTORS[extractor]
+    checkpoint_file = OUTPUT_DIR / checkpoint_name
+    queue_path = queue_file(checkpoint_file)
+    counts = {}
+
+    for round_no in range(1, MAX_ATTEMPTS + 1):
+        print(f"Round {round_no}: starting {workers} {extractor} workers", flush=True)
+        procs = []
+        for i in range(workers):
+            worker = f"w{i + 1}"
+            log = shard_checkpoint(checkpoint_file, worker).with_suffix(".log")
+            with open(log, "a", encoding="utf-8") as out:
+                procs.append(
+                    subprocess.Popen(
+                        [
+                            sys.executable,
+                            str(SCRIPTS_DIR / script),
+                            "--worker",
+                            worker,
+                            "--queue",
+                            str(queue_path),
+                            *extra_args,
+                        ],
+                        cwd=SCRIPTS_DIR,
+                        stdout=out,
+                        stderr=subprocess.STDOUT,
+                    )
+                )
+
+        while any(p.poll() is None for p in procs):
+            time.sleep(POLL_INTERVAL)
+            if queue_path.exists():
+                queue = WorkQueue(queue_path)
+                print(f"   {format_counts(queue.counts())}", flush=True)
+                queue.close()
+
+        failed = [i + 1 for i, p in enumerate(procs) if p.returncode != 0]
+        if failed:
+            print(f"⚠️  Workers exited with errors: {failed} (see their .log)")
+        if not queue_path.exists():
+            break
+        queue = WorkQueue(queue_path)
+        queue.release()
+        counts = queue.counts()
+        queue.close()
+        print(f"   {format_counts(counts)}", flush=True)
+        if not counts[PENDING]:
+            break
+    return counts
+
+
+def run_merge(extractor: str) -> int:
+    script, _ = EXTRACTORS[extractor]
+    return subprocess.call(
+        [sys.executable, str(SCRIPTS_DIR / script), "--merge"], cwd=SCRIPTS_DIR
+    )
+
+
+def format_counts(counts: dict) -> str:
+    return " | ".join(f"{state}: {counts.get(state, 0):,}" for state in counts)
+
+
+def print_status(extractor: str):
+    _, checkpoint_name = EXTRACTORS[extractor]
+    checkpoint_file = OUTPUT_DIR / checkpoint_name
+    counts = queue_counts(checkpoint_file)
+    if counts is not None:
+        print(f"Queue {queue_file(checkpoint_file).name}: {format_counts(counts)}")
+    else:
+        print("No lease queue")
+    for worker, status in shard_statuses(checkpoint_file).items():
+        state = "running" if is_running(status) else status.get("state")
+        print(
+            f"   worker {worker}: {state}, {status['processed']:,} processed, "
+            f"{status['failed']:,} failed (heartbeat {status['heartbeat']})"
+        )
+    journals = shard_journals(checkpoint_file)
+    print(f"Unmerged shard journals: {len(journals)}")
+    for path in journals:
+        records = sum(1 for _ in iter_jsonl(path))
+        print(f"   {path.name}: {records:,} records")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sharded EC harvesting")
+    parser.add_argument("command", choices=("run", "merge", "status"))
+    parser.add_argument("extractor", choices=sorted(EXTRACTORS))
+    parser.add_argument(
+        "--workers", type=int, default=os.cpu_count() or 4, help="worker processes"
+    )
+    # Everything after "--" is passed on to every worker
+    argv = sys.argv[1:]
+    split = argv.index("--") if "--" in argv else len(argv)
+    args = parser.parse_args(argv[:split])
+    extra = argv[split + 1 :]
+
+    if args.command == "status":
+        print_status(args.extractor)
+        return
+    if args.command == "run":
+        start = time.time()
+        run_workers(args.extractor, max(1, args.workers), extra)
+        print(f"Workers done in {(time.time() - start) / 60:.1f} min, merging...")
+    sys.exit(run_merge(args.extractor))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,429 @@
+#!/usr/bin/env python3
+"""
+SQLite harvest store for CONOCER/RENEC data.
+
+Optional drop-in for the whole-file JSON checkpoints and outputs in
+data/extracted/. Extractors write into it record by record; consumers
+(build_master_registries.py, generate_extraction_report.py,
+check_extraction_status.py) query it instead of re-parsing multi-megabyte
+JSON. The exporter regenerates today's JSON files for data/loader.ts.
+
+The store is used when HARVEST_DB is set or when the default database file
+already exists; otherwise every script keeps working purely on JSON.
+
+Usage:
+  python harvest_store.py import   # Create/refresh the DB from the JSON files
+  python harvest_store.py export   # Write the JSON files from the DB
+  python harvest_store.py stats    # Print table counts
+"""
+
+import json
+import os
+import sqlite3
+import sys
+from datetime import datetime
+from pathlib import Path
+
+OUTPUT_DIR = Path(__file__).parent.parent.parent / "data" / "extracted"
+DEFAULT_DB = OUTPUT_DIR / "harvest.sqlite3"
+
+# Extractor names used as ec_details.extractor
+CERTIFIERS = "certifiers"  # extract_certifiers_batch.py
+API = "api"  # extract_ec_details_api.py
+PLAYWRIGHT = "playwright"  # extract_ec_details_playwright.py
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS standards (
+    code TEXT PRIMARY KEY,
+    title TEXT,
+    committee TEXT,
+    sector TEXT,
+    payload TEXT NOT NULL,
+    updated_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS committees (
+    id INTEGER PRIMARY KEY,
+    clave TEXT,
+    name TEXT,
+    sector TEXT,
+    payload TEXT NOT NULL,
+    updated_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS ec_details (
+    extractor TEXT NOT NULL,
+    ec_code TEXT NOT NULL,
+    status TEXT NOT NULL,
+    payload TEXT,
+    updated_at TEXT NOT NULL,
+    PRIMARY KEY (extractor, ec_code)
+);
+CREATE TABLE IF NOT EXISTS certifiers (
+    ec_code TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    PRIMARY KEY (ec_code, position)
+);
+CREATE INDEX IF NOT EXISTS certifiers_name ON certifiers (name);
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    extractor TEXT NOT NULL,
+    started_at TEXT NOT NULL,
+    finished_at TEXT,
+    processed INTEGER NOT NULL DEFAULT 0,
+    failed INTEGER NOT NULL DEFAULT 0
+);
+"""
+
+
+def _now() -> str:
+    return datetime.now().isoformat()
+
+
+def _dumps(value) -> str:
+    return json.dumps(value, ensure_ascii=False)
+
+
+def store_path() -> Path:
+    return Path(os.environ.get("HARVEST_DB") or DEFAULT_DB)
+
+
+def open_store(create: bool = False):
+    """The harvest store if enabled (HARVEST_DB set or DB present), else None."""
+    path = store_path()
+    if not (create or os.environ.get("HARVEST_DB") or path.exists()):
+        return None
+    return HarvestStore(path)
+
+
+def certifiers_output(checkpoint: dict) -> tuple[dict, list[str]]:
+    """ec_certifiers_all.json payload and unique certifier list for a checkpoint."""
+    data = checkpoint["data"]
+    total_certs = sum(len(v.get("certifiers", [])) for v in data.values())
+    total_courses = sum(len(v.get("courses", [])) for v in data.values())
+
+    all_certifiers = set()
+    for ec_data in data.values():
+        all_certifiers.update(ec_data.get("certifiers", []))
+
+    output = {
+        "extraction_date": _now(),
+        "summary": {
+            "ecs_processed": len(data),
+            "ecs_failed": len(checkpoint["failed"]),
+            "total_certifier_relationships": total_certs,
+            "total_course_relationships": total_courses,
+            "unique_certifiers": len(all_certifiers),
+        },
+        "failed_ecs": checkpoint["failed"],
+        "ec_details": data,
+    }
+    return output, sorted(all_certifiers)
+
+
+class HarvestStore:
+    """Incrementally written SQLite store of harvested records."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(self.path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def commit(self):
+        self.conn.commit()
+
+    def close(self):
+        self.conn.commit()
+        self.conn.close()
+
+    # -- writers ---------------------------------------------------------
+
+    def upsert_standard(self, std: dict):
+        code = std.get("codigo") or std.get("clave")
+        if not code:
+            return
+        self.conn.execute(
+            """
+            INSERT INTO standards (code, title, committee, sector, payload, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT (code) DO UPDATE SET
+                title = excluded.title, committee = excluded.committee,
+                sector = excluded.sector, payload = excluded.payload,
+                updated_at = excluded.updated_at
+            """,
+            (
+                code,
+                std.get("titulo") or std.get("nombre"),
+                std.get("comite"),
+                std.get("secProductivo"),
+                _dumps(std),
+                _now(),
+            ),
+        )
+
+    def upsert_committee(self, committee: dict):
+        self.conn.execute(
+            """
+            INSERT INTO committees (id, clave, name, sector, payload, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT (id) DO UPDATE SET
+                clave = excluded.clave, name = excluded.name,
+                sector = excluded.sector, payload = excluded.payload,
+                updated_at = excluded.updated_at
+            """,
+            (
+                committee["id"],
+                committee.get("clave"),
+                committee.get("nombre"),
+                committee.get("sectorProductivoStr"),
+                _dumps(committee),
+                _now(),
+            ),
+        )
+
+    def upsert_ec_detail(self, extractor: str, ec_code: str, data: dict | None):
+        """Record one extractor result; data=None records a failure.
+
+        A failure never overwrites an earlier successful record.
+        """
+        if data is None:
+            self.conn.execute(
+                """
+                INSERT INTO ec_details (extractor, ec_code, status, payload, updated_at)
+                VALUES (?, ?, 'failed', NULL, ?)
+                ON CONFLICT (extractor, ec_code) DO NOTHING
+                """,
+                (extractor, ec_code, _now()),
+            )
+            return
+
+        self.conn.execute(
+            """
+            INSERT INTO ec_details (extractor, ec_code, status, payload, updated_at)
+            VALUES (?, ?, 'ok', ?, ?)
+            ON CONFLICT (extractor, ec_code) DO UPDATE SET
+                status = 'ok', payload = excluded.payload,
+                updated_at = excluded.updated_at
+            """,
+            (extractor, ec_code, _dumps(data), _now()),
+        )
+        if extractor == CERTIFIERS:
+            self.conn.execute("DELETE FROM certifiers WHERE ec_code = ?", (ec_code,))
+            self.conn.executemany(
+                "INSERT INTO certifiers (ec_code, position, name) VALUES (?, ?, ?)",
+                [(ec_code, i, n) for i, n in enumerate(data.get("certifiers", []))],
+            )
+
+    def delete_committee(self, committee_id: int):
+        """Drop a committee that no longer exists upstream."""
+        self.conn.execute("DELETE FROM committees WHERE id = ?", (committee_id,))
+
+    def delete_ec_detail(self, extractor: str, ec_code: str):
+        """Drop an EC that is no longer in the standards catalog."""
+        self.conn.execute(
+            "DELETE FROM ec_details WHERE extractor = ? AND ec_code = ?",
+            (extractor, ec_code),
+        )
+        if extractor == CERTIFIERS:
+            self.conn.execute("DELETE FROM certifiers WHERE ec_code = ?", (ec_code,))
+
+    def start_run(self, extractor: str) -> int:
+        cur = self.conn.execute(
+            "INSERT INTO runs (extractor, started_at) VALUES (?, ?)",
+            (extractor, _now()),
+        )
+        self.conn.commit()
+        return cur.lastrowid
+
+    def finish_run(self, run_id: int, processed: int, failed: int):
+        self.conn.execute(
+            "UPDATE runs SET finished_at = ?, processed = ?, failed = ? WHERE id = ?",
+            (_now(), processed, failed, run_id),
+        )
+        self.conn.commit()
+
+    # -- readers ---------------------------------------------------------
+
+    def count(self, table: str) -> int:
+        if table not in ("standards", "committees", "certifiers", "runs"):
+            raise ValueError(f"Unknown table: {table}")
+        return self.conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+    def standards(self) -> list[dict]:
+        rows = self.conn.execute("SELECT payload FROM standards ORDER BY rowid")
+        return [json.loads(p) for (p,) in rows]
+
+    def committees(self) -> list[dict]:
+        rows = self.conn.execute("SELECT payload FROM committees ORDER BY id")
+        return [json.loads(p) for (p,) in rows]
+
+    def iter_ec_details(self, extractor: str):
+        """Stream (ec_code, record) of successful results, in harvest order."""
+        rows = self.conn.execute(
+            """
+            SELECT ec_code, payload FROM ec_details
+            WHERE extractor = ? AND status = 'ok' ORDER BY rowid
+            """,
+            (extractor,),
+        )
+        for code, payload in rows:
+            yield code, json.loads(payload)
+
+    def ec_details(self, extractor: str) -> dict:
+        """{ec_code: record} of successful results, in harvest order."""
+        return dict(self.iter_ec_details(extractor))
+
+    def failed_ecs(self, extractor: str) -> list[str]:
+        rows = self.conn.execute(
+            """
+            SELECT ec_code FROM ec_details
+            WHERE extractor = ? AND status = 'failed' ORDER BY rowid
+            """,
+            (extractor,),
+        )
+        return [code for (code,) in rows]
+
+    def progress(self, extractor: str) -> dict:
+        """Processed/failed counts and last update for one extractor."""
+        processed, failed, last_updated = self.conn.execute(
+            """
+            SELECT COALESCE(SUM(status = 'ok'), 0),
+                   COALESCE(SUM(status = 'failed'), 0),
+                   MAX(updated_at)
+            FROM ec_details WHERE extractor = ?
+            """,
+            (extractor,),
+        ).fetchone()
+        return {"processed": processed, "failed": failed, "last_updated": last_updated}
+
+    def certifier_stats(self) -> dict:
+        total, ecs_with = self.conn.execute(
+            "SELECT COUNT(*), COUNT(DISTINCT ec_code) FROM certifiers"
+        ).fetchone()
+        return {"relationships": total, "ecs_with_certifiers": ecs_with}
+
+    def checkpoint(self, extractor: str) -> dict:
+        """Checkpoint-shaped view of one extractor's results."""
+        data = self.ec_details(extractor)
+        return {
+            "processed": list(data),
+            "failed": self.failed_ecs(extractor),
+            "data": data,
+            "last_updated": self.progress(extractor)["last_updated"],
+        }
+
+    # -- JSON import/export ----------------------------------------------
+
+    def import_json(self, output_dir: Path = OUTPUT_DIR) -> dict:
+        """Load today's JSON files into the store."""
+        counts = {}
+
+        standards_file = output_dir / "ec_standards_api.json"
+        if standards_file.exists():
+            with open(standards_file, "r", encoding="utf-8") as f:
+                standards = json.load(f)
+            for std in standards:
+                self.upsert_standard(std)
+            counts["standards"] = len(standards)
+
+        committees_file = output_dir / "committees_complete.json"
+        if committees_file.exists():
+            with open(committees_file, "r", encoding="utf-8") as f:
+                committees = json.load(f)
+            for committee in committees:
+                self.upsert_committee(committee)
+            counts["committees"] = len(committees)
+
+        # Local import keeps this module free of extractor dependencies
+        from checkpoint_journal import CheckpointJournal
+
+        for extractor, name in (
+            (CERTIFIERS, "certifiers_checkpoint.json"),
+            (API, "ec_details_api_checkpoint.json"),
+            (PLAYWRIGHT, "ec_details_checkpoint.json"),
+        ):
+            journal = CheckpointJournal(output_dir / name)
+            if not (journal.checkpoint_file.exists() or journal.journal_file.exists()):
+                continue
+            checkpoint = journal.load()
+            for ec_code in checkpoint["failed"]:
+                self.upsert_ec_detail(extractor, ec_code, None)
+            for ec_code, data in checkpoint["data"].items():
+                self.upsert_ec_detail(extractor, ec_code, data)
+            counts[f"ec_details[{extractor}]"] = len(checkpoint["data"])
+
+        self.commit()
+        return counts
+
+    def export_json(self, output_dir: Path = OUTPUT_DIR) -> list[Path]:
+        """Write the JSON files the TypeScript loader and scripts expect."""
+        written = []
+
+        def write(name: str, payload, indent: int | None = 2):
+            path = output_dir / name
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(payload, f, ensure_ascii=False, indent=indent)
+            written.append(path)
+
+        if self.count("standards"):
+            write("ec_standards_api.json", self.standards())
+
+        if self.count("committees"):
+            committees = self.committees()
+            write("committees_complete.json", committees)
+            ec_codes = {
+                ec["codigo"]
+                for c in committees
+                for ec in c.get("estandaresAsociados") or []
+                if ec.get("codigo")
+            }
+            write("ec_codes_from_committees.json", sorted(ec_codes))
+
+        checkpoint = self.checkpoint(CERTIFIERS)
+        if checkpoint["processed"] or checkpoint["failed"]:
+            write("certifiers_checkpoint.json", checkpoint, indent=None)
+            output, unique = certifiers_output(checkpoint)
+            write("ec_certifiers_all.json", output)
+            write("unique_certifiers.json", unique)
+
+        return written
+
+
+def main():
+    command = sys.argv[1] if len(sys.argv) > 1 else "stats"
+
+    with HarvestStore(store_path()) as store:
+        if command == "import":
+            counts = store.import_json()
+            print(f"✅ Imported into {store.path}")
+            for name, n in counts.items():
+                print(f"   {name}: {n:,}")
+        elif command == "export":
+            for path in store.export_json():
+                print(f"✅ Wrote {path}")
+        elif command == "stats":
+            print(f"Harvest store: {store.path}")
+            for table in ("standards", "committees", "certifiers", "runs"):
+                print(f"   {table}: {store.count(table):,}")
+            for extractor in (CERTIFIERS, API, PLAYWRIGHT):
+                progress = store.progress(extractor)
+                if progress["processed"] or progress["failed"]:
+                    print(
+                        f"   ec_details[{extractor}]: {progress['processed']:,} ok, "
+                        f"{progress['failed']:,} failed"
+                    )
+        else:
+            print(__doc__)
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+"""
+Control-character sanitizer for CONOCER backend JSON.
+
+The backend occasionally embeds raw control characters in string values,
+which json.loads rejects. Every extractor used to run its own regex over the
+whole decoded body (with different character classes). This module is the
+single implementation, working on the raw bytes before decoding:
+
+  - C0 controls and DEL are deleted with bytes.translate, which costs about
+    a memcpy (a regex scan just to detect them is ~4x slower);
+  - C1 controls (U+0080-U+009F) are two bytes in UTF-8 (\\xc2 \\x80-\\x9f);
+    they are only searched for in the few bodies containing a \\xc2 byte.
+
+Tab, newline and carriage return are kept; json.loads(strict=False)
+accepts them inside strings.
+"""
+
+import json
+import re
+
+# C0 controls except \t \n \r, plus DEL
+CONTROL_BYTES = bytes([*range(0x00, 0x09), 0x0B, 0x0C, *range(0x0E, 0x20), 0x7F])
+C1_LEAD_BYTE = b"\xc2"  # UTF-8 lead byte of U+0080-U+00BF
+_C1_UTF8 = re.compile(rb"\xc2[\x80-\x9f]")
+
+
+def sanitize(body: bytes) -> bytes:
+    """`body` without C0 controls (other than \\t \\n \\r), DEL and C1 controls."""
+    cleaned = body.translate(None, CONTROL_BYTES)
+    if C1_LEAD_BYTE in cleaned:
+        cleaned = _C1_UTF8.sub(b"", cleaned)
+    return cleaned
+
+
+def clean_text(body: bytes | str) -> str:
+    """Sanitized, decoded text of a response body."""
+    if isinstance(body, str):
+        body = body.encode("utf-8", errors="surrogatepass")
+    return sanitize(body).decode("utf-8", errors="replace")
+
+
+def parse_json(body: bytes | str):
+    """json.loads of a sanitized response body."""
+    return json.loads(clean_text(body), strict=False)
@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+Streaming readers for the extracted JSON files.
+
+ec_certifiers_all.json, certifiers_checkpoint.json and
+committees_complete.json are single JSON documents, and json.load pulls
+each one fully into memory just so callers can walk one list or object
+inside it. These readers parse the file in chunks and yield one record at a
+time, so memory stays flat as the dataset grows:
+
+  iter_json(path)                      # items of a top-level array
+  iter_json(path, "ec_details")        # (key, value) pairs of a nested object
+  iter_object(path, stream=("data",))  # top-level members, "data" streamed
+  iter_jsonl(path)                     # one record per JSON line
+  iter_records(path, *keys)            # iter_jsonl or iter_json by suffix
+
+Only the records themselves are materialized (with json's own decoder), so
+parsing stays in C for the bulk of the input.
+"""
+
+import json
+import re
+from pathlib import Path
+
+CHUNK_SIZE = 1 << 16  # Characters read per refill
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+
+
+class _Parser:
+    """Cursor over a JSON text file that decodes one value at a time."""
+
+    def __init__(self, f, chunk_size: int = CHUNK_SIZE):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.decoder = json.JSONDecoder()
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+
+    def _more(self, size: int) -> bool:
+        """Append up to `size` characters, dropping what was consumed."""
+        data = self.f.read(size)
+        if not data:
+            self.eof = True
+            return False
+        self.buf = self.buf[self.pos :] + data
+        self.pos = 0
+        return True
+
+    def _error(self, message: str):
+        return json.JSONDecodeError(message, self.buf, self.pos)
+
+    def peek(self) -> str:
+        """Next non-whitespace character ("" at end of input)."""
+        while True:
+            self.pos = _WHITESPACE.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._more(self.chunk_size):
+                return ""
+
+    def expect(self, char: str):
+        if self.peek() != char:
+            raise self._error(f"Expecting {char!r}")
+        self.pos += 1
+
+    def value(self):
+        """Decode the complete value at the cursor."""
+        self.peek()
+        size = self.chunk_size
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buf, self.pos)
+                # A value ending exactly at the buffer edge may be a cut-off
+                # number or literal; only trust it once more input is seen
+                if end < len(self.buf) or self.eof:
+                    self.pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            # Grow reads geometrically so large values aren't re-parsed
+            # once per chunk
+            self._more(size)
+            size *= 2
+
+    def keys(self):
+        """Walk the object at the cursor, yielding each key.
+
+        The cursor is left on the key's value, which the caller must consume
+        (value() or items()) before asking for the next key.
+        """
+        self.expect("{")
+        if self.peek() == "}":
+            self.pos += 1
+            return
+        while True:
+            key = self.value()
+            self.expect(":")
+            yield key
+            separator = self.peek()
+            self.pos += 1
+            if separator == "}":
+                return
+            if separator != ",":
+                self.pos -= 1
+                raise self._error("Expecting ',' delimiter")
+
+    def items(self):
+        """Stream the container at the cursor.
+
+        Arrays yield their values, objects (key, value) pairs; any other
+        value (e.g. null) is consumed and yields nothing.
+        """
+        opener = self.peek()
+        if opener == "{":
+            for key in self.keys():
+                yield key, self.value()
+            return
+        if opener != "[":
+            self.value()
+            return
+
+        self.pos += 1
+        if self.peek() == "]":
+            self.pos += 1
+            return
+        while True:
+            yield self.value()
+            separator = self.peek()
+            self.pos += 1
+            if separator == "]":
+                return
+            if separator != ",":
+                self.pos -= 1
+                raise self._error("Expecting ',' delimiter")
+
+    def find(self, key: str) -> bool:
+        """Move the cursor onto `key`'s value in the object at the cursor."""
+        if self.peek() != "{":
+            return False
+        for name in self.keys():
+            if name == key:
+                return True
+            self.value()
+        return False
+
+
+def iter_json(path: Path, *keys: str):
+    """Stream the array or object found under `keys` in a JSON file.
+
+    Arrays yield their items, objects yield (key, value) pairs. Yields
+    nothing if the file or any key along the path is missing.
+    """
+    path = Path(path)
+    if not path.exists():
+        return
+    with open(path, "r", encoding="utf-8") as f:
+        parser = _Parser(f)
+        for key in keys:
+            if not parser.find(key):
+                return
+        yield from parser.items()
+
+
+def iter_object(path: Path, stream=()):
+    """Yield (key, value) for each top-level member of a JSON object.
+
+    Members named in `stream` are not decoded: their value is an iterator
+    over the array/object (as in iter_json), valid until the next member is
+    requested. Anything left unconsumed is skipped.
+    """
+    path = Path(path)
+    if not path.exists():
+        return
+    with open(path, "r", encoding="utf-8") as f:
+        parser = _Parser(f)
+        for key in parser.keys():
+            if key in stream:
+                items = parser.items()
+                yield key, items
+                for _ in items:
+                    pass
+            else:
+                yield key, parser.value()
+
+
+def iter_jsonl(path: Path):
+    """Yield one record per line; a torn final line from a crash is skipped."""
+    path = Path(path)
+    if not path.exists():
+        return
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                break
+
+
+def iter_records(path: Path, *keys: str):
+    """iter_jsonl for .jsonl files, iter_json(path, *keys) otherwise."""
+    if Path(path).suffix == ".jsonl":
+        return iter_jsonl(path)
+    return iter_json(path, *keys)
+
+
+def count_records(path: Path, *keys: str) -> int:
+    """Number of records iter_records would yield."""
+    return sum(1 for _ in iter_records(path, *keys))
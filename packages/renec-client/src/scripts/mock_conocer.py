@@ -0,0 +1,461 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the CONOCER backend and the RENEC SPA.
+
+Replays the fixtures in data/extracted/ so the extractors can be run,
+benchmarked and failure-tested without touching conocer.gob.mx:
+
+  GET  /CONOCERBACKCITAS/comites/{id}
+  GET  /CONOCERBACKCITAS/sectoresProductivos/getEstandaresAll
+  POST /CONOCERBACKCITAS/sectoresProductivos/getDescEstandar/{code}
+  POST /CONOCERBACKCITAS/sectoresProductivos/getDatosGeneralesComite/{id}
+  GET  /conocer/    minimal RENEC SPA (search at #/renec, detail at #/renec/{code})
+  GET  /__stats     request/fault counters
+
+Committees come from committees_complete.json, standards from
+ec_standards_api.json, and detail payloads are rebuilt from
+ec_certifiers_all.json in the shape the SPA's XHRs have.
+
+Faults are injected into API responses only: latency (mean +/- jitter),
+HTTP 500s, 429s with Retry-After, truncated (malformed) JSON and bodies
+with stray control bytes inside strings.
+
+Usage:
+  python mock_conocer.py [--port 8765] [--latency 50] [--jitter 20] \\
+      [--error-rate 0.05] [--throttle-rate 0.02] [--malformed-rate 0.01] \\
+      [--dirty-rate 0.05] [--seed 1]
+
+  # then point any extractor at it
+  export CONOCER_API_BASE=http://127.0.0.1:8765/CONOCERBACKCITAS
+  export CONOCER_SPA_URL=http://127.0.0.1:8765/conocer/
+"""
+
+import argparse
+import gzip
+import json
+import random
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import unquote, urlsplit
+
+OUTPUT_DIR = Path(__file__).parent.parent.parent / "data" / "extracted"
+API_PREFIX = "/CONOCERBACKCITAS/"
+SPA_PREFIX = "/conocer/"
+DEFAULT_PORT = 8765
+GZIP_MIN_SIZE = 1024  # Bodies at least this large are gzipped when accepted
+
+
+class Fixtures:
+    """Backend responses rebuilt from the extracted JSON files."""
+
+    def __init__(self, output_dir: Path = OUTPUT_DIR):
+        def load(name, default):
+            path = output_dir / name
+            if not path.exists():
+                return default
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+
+        self.standards = load("ec_standards_api.json", [])
+        self.committees = {c["id"]: c for c in load("committees_complete.json", [])}
+        self.details = load("ec_certifiers_all.json", {}).get("ec_details", {})
+        self.standards_by_code = {s.get("codigo"): s for s in self.standards}
+
+        self.committee_ids = {}
+        for committee_id, committee in sorted(self.committees.items()):
+            name = (committee.get("nombre") or "").strip().lower()
+            self.committee_ids.setdefault(name, committee_id)
+        # Committee members are per committee; take them from its first EC
+        self.members = {}
+        for code, detail in self.details.items():
+            committee_id = self._committee_id(code)
+            if committee_id is not None and detail.get("committee_members"):
+                self.members.setdefault(committee_id, detail["committee_members"])
+
+    def _committee_id(self, code: str):
+        std = self.standards_by_code.get(code) or {}
+        return self.committee_ids.get((std.get("comite") or "").strip().lower())
+
+    def committee(self, committee_id: int) -> dict | None:
+        committee = self.committees.get(committee_id)
+        if committee is None:
+            return None
+        results = {k: v for k, v in committee.items() if k != "id"}
+        return {"responseStatus": 200, "results": results}
+
+    def desc_estandar(self, code: str) -> dict | None:
+        std = self.standards_by_code.get(code)
+        detail = self.details.get(code)
+        if std is None and detail is None:
+            return None
+        std = std or {}
+        detail = detail or {}
+        title = detail.get("title") or std.get("titulo") or ""
+        if title.startswith(f"{code}-"):
+            title = title[len(code) + 1 :]
+        results = {
+            "codigo": code,
+            "titulo": title,
+            "nivel": std.get("nivel"),
+            "comite": std.get("comite"),
+            "idComite": self._committee_id(code),
+            "ocupaciones": [{"ocupacion": o} for o in detail.get("occupations", [])],
+            "certificadores": [{"nombre": n} for n in detail.get("certifiers", [])],
+            "cursos": [{"nombreCurso": n} for n in detail.get("courses", [])],
+        }
+        return {"responseStatus": 200, "results": results}
+
+    def datos_comite(self, committee_id: int) -> dict | None:
+        response = self.committee(committee_id)
+        if response is None:
+            return None
+        response["results"]["integrantes"] = [
+            {"nombre": n} for n in self.members.get(committee_id, [])
+        ]
+        return response
+
+
+class Faults:
+    """Random fault injection for API responses."""
+
+    def __init__(
+        self,
+        latency_ms: float = 0.0,
+        jitter_ms: float = 0.0,
+        error_rate: float = 0.0,
+        throttle_rate: float = 0.0,
+        malformed_rate: float = 0.0,
+        dirty_rate: float = 0.0,
+        seed: int | None = None,
+    ):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.rates = (
+            ("error", error_rate),
+            ("throttle", throttle_rate),
+            ("malformed", malformed_rate),
+            ("dirty", dirty_rate),
+        )
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def delay(self) -> float:
+        with self._lock:
+            ms = self._rng.gauss(self.latency_ms, self.jitter_ms)
+        return max(ms, 0.0) / 1000
+
+    def pick(self) -> str | None:
+        """Fault to inject into the next response, if any."""
+        with self._lock:
+            roll = self._rng.random()
+        for fault, rate in self.rates:
+            if roll < rate:
+                return fault
+            roll -= rate
+        return None
+
+    def dirty(self, body: bytes) -> bytes:
+        """Insert a control byte right after the first string value's quote."""
+        with self._lock:
+            marker = body.find(b'": "')
+            if marker < 0:
+                return body
+            pos = marker + 4
+            control = bytes([self._rng.choice((0x01, 0x0B, 0x1F))])
+        return body[:pos] + control + body[pos:]
+
+
+class MockHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, like the real backend
+    server_version = "MockConocer/1.0"
+
+    fixtures: Fixtures
+    faults: Faults
+    stats: Counter
+    stats_lock: threading.Lock
+
+    def log_message(self, format, *args):
+        pass  # Counters at /__stats instead of a line per request
+
+    def _count(self, name: str):
+        with self.stats_lock:
+            self.stats[name] += 1
+
+    def _send(self, status: int, body: bytes, content_type: str, headers=()):
+        if len(body) >= GZIP_MIN_SIZE and "gzip" in self.headers.get(
+            "Accept-Encoding", ""
+        ):
+            body = gzip.compress(body, compresslevel=1)
+            headers = (*headers, ("Content-Encoding", "gzip"))
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Access-Control-Allow-Origin", "*")
+        for name, value in headers:
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _json(self, status: int, payload, fault: str | None = None):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        if fault == "malformed":
+            body = body[: max(1, len(body) // 2)]
+        elif fault == "dirty":
+            body = self.faults.dirty(body)
+        self._send(status, body, "application/json; charset=utf-8")
+
+    def _read_body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        if length:
+            self.rfile.read(length)
+
+    def do_OPTIONS(self):
+        self._send(
+            204,
+            b"",
+            "text/plain",
+            (
+                ("Access-Control-Allow-Methods", "GET, POST, OPTIONS"),
+                ("Access-Control-Allow-Headers", "Content-Type"),
+            ),
+        )
+
+    def do_POST(self):
+        self._read_body()
+        self.do_GET()
+
+    def do_GET(self):
+        path = unquote(urlsplit(self.path).path)
+        if path == "/__stats":
+            with self.stats_lock:
+                stats = dict(self.stats)
+            return self._json(200, stats)
+        if path.startswith(SPA_PREFIX) or path == "/":
+            self._count("spa")
+            page = spa_page().encode("utf-8")
+            return self._send(200, page, "text/html; charset=utf-8")
+        if not path.startswith(API_PREFIX):
+            self._count("not_found")
+            return self._json(404, {"responseStatus": 404})
+        self._api(path[len(API_PREFIX) :].strip("/"))
+
+    def _api(self, route: str):
+        parts = route.split("/")
+        endpoint = parts[-2] if len(parts) > 1 else parts[0]
+        if parts[0] == "comites":
+            endpoint = "comites"
+        elif parts[-1] == "getEstandaresAll":
+            endpoint = "getEstandaresAll"
+        self._count(f"api:{endpoint}")
+
+        time.sleep(self.faults.delay())
+        fault = self.faults.pick()
+        if fault == "error":
+            self._count("fault:500")
+            return self._json(500, {"responseStatus": 500, "message": "mock error"})
+        if fault == "throttle":
+            self._count("fault:429")
+            self._send(
+                429,
+                b'{"responseStatus": 429}',
+                "application/json",
+                (("Retry-After", "1"),),
+            )
+            return
+        if fault:
+            self._count(f"fault:{fault}")
+
+        key = parts[-1]
+        if endpoint == "comites" and key.isdigit():
+            payload = self.fixtures.committee(int(key))
+        elif endpoint == "getEstandaresAll":
+            payload = self.fixtures.standards
+        elif endpoint == "getDescEstandar":
+            payload = self.fixtures.desc_estandar(key)
+        elif endpoint == "getDatosGeneralesComite" and key.isdigit():
+            payload = self.fixtures.datos_comite(int(key))
+        else:
+            payload = None
+
+        if payload is None:
+            return self._json(404, {"responseStatus": 404})
+        self._json(200, payload, fault)
+
+
+def spa_page() -> str:
+    """A minimal RENEC search/detail SPA with the DOM the extractors scrape."""
+    return """<!doctype html>
+<html lang="es">
+<head><meta charset="utf-8"><title>RENEC (mock)</title></head>
+<body>
+<div id="app"></div>
+<script>
+const API = new URL('../CONOCERBACKCITAS/sectoresProductivos/', location.href).href;
+let standards = null;
+
+function el(tag, attrs = {}, text = '') {
+    const node = document.createElement(tag);
+    for (const [k, v] of Object.entries(attrs)) node.setAttribute(k, v);
+    if (text) node.textContent = text;
+    return node;
+}
+
+async function post(endpoint, key, body) {
+    const response = await fetch(API + endpoint + '/' + encodeURIComponent(key), {
+        method: 'POST',
+        headers: {'Content-Type': 'application/json'},
+        body: JSON.stringify(body)
+    });
+    return response.ok ? (await response.json()).results : null;
+}
+
+function grid(header, items) {
+    const table = el('div', {role: 'grid'});
+    table.append(el('div', {role: 'columnheader'}, header));
+    for (const item of items) {
+        const row = el('div', {role: 'row'});
+        row.append(el('div', {role: 'gridcell'}, item));
+        table.append(row);
+    }
+    return table;
+}
+
+async function search(app) {
+    const input = el('input', {type: 'text', placeholder: 'Buscar estándar'});
+    const results = el('div', {id: 'results'});
+    app.append(input, results);
+    input.addEventListener('keydown', async (event) => {
+        if (event.key !== 'Enter') return;
+        if (!standards) {
+            standards = await (await fetch(API + 'getEstandaresAll')).json();
+        }
+        const q = input.value.trim().toLowerCase();
+        results.innerHTML = '';
+        standards
+            .filter(s => (s.codigo || '').toLowerCase().includes(q))
+            .slice(0, 20)
+            .forEach(s => {
+                const link = el('a', {href: '#/renec/' + encodeURIComponent(s.codigo)});
+                link.append(el('span', {}, s.codigo), ' ' + (s.titulo || ''));
+                const row = el('div');
+                row.append(link);
+                results.append(row);
+            });
+    });
+}
+
+async function detail(app, code) {
+    const desc = await post('getDescEstandar', code, {codigo: code});
+    if (!desc) return app.append(el('div', {}, 'Sin resultados'));
+    const names = (list, key) => (list || []).map(item => item[key]);
+    const sections = [el('p', {}, code + '-' + desc.titulo)];
+    sections.push(grid('Ocupaciones', names(desc.ocupaciones, 'ocupacion')));
+    sections.push(
+        grid('Organismos Certificadores', names(desc.certificadores, 'nombre'))
+    );
+    sections.push(grid('Cursos de Capacitación', names(desc.cursos, 'nombreCurso')));
+    if (desc.idComite !== null && desc.idComite !== undefined) {
+        const comite = await post('getDatosGeneralesComite', desc.idComite, {});
+        if (comite) {
+            const members = names(comite.integrantes, 'nombre');
+            sections.push(grid('Integrantes del Comité', members));
+        }
+    }
+    app.append(...sections);
+}
+
+async function route() {
+    const app = document.getElementById('app');
+    app.innerHTML = '';
+    const match = location.hash.match(/^#\\/renec\\/(.+)$/);
+    if (match) await detail(app, decodeURIComponent(match[1]));
+    else await search(app);
+}
+
+window.addEventListener('hashchange', route);
+route();
+</script>
+</body>
+</html>
+"""
+
+
+def make_server(
+    port: int = DEFAULT_PORT,
+    fixtures: Fixtures | None = None,
+    faults: Faults | None = None,
+    host: str = "127.0.0.1",
+) -> ThreadingHTTPServer:
+    """A mock server bound to (host, port); port 0 picks a free one.
+
+    The caller runs serve_forever() (e.g. on a thread); `server.stats`
+    holds the request/fault counters.
+    """
+    stats = Counter()
+    handler = type(
+        "BoundMockHandler",
+        (MockHandler,),
+        {
+            "fixtures": fixtures or Fixtures(),
+            "faults": faults or Faults(),
+            "stats": stats,
+            "stats_lock": threading.Lock(),
+        },
+    )
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    server.stats = stats
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local CONOCER mock server")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--latency", type=float, default=0.0, help="mean ms")
+    parser.add_argument("--jitter", type=float, default=0.0, help="ms std dev")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="HTTP 500s")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="HTTP 429s")
+    parser.add_argument(
+        "--malformed-rate", type=float, default=0.0, help="truncated JSON bodies"
+    )
+    parser.add_argument(
+        "--dirty-rate", type=float, default=0.0, help="bodies with control bytes"
+    )
+    parser.add_argument("--seed", type=int, help="fault RNG seed")
+    args = parser.parse_args()
+
+    fixtures = Fixtures()
+    faults = Faults(
+        args.latency,
+        args.jitter,
+        args.error_rate,
+        args.throttle_rate,
+        args.malformed_rate,
+        args.dirty_rate,
+        args.seed,
+    )
+    server = make_server(args.port, fixtures, faults)
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    print(f"Mock CONOCER on {base}")
+    print(
+        f"  {len(fixtures.committees)} committees, {len(fixtures.standards)} "
+        f"standards, {len(fixtures.details)} EC details"
+    )
+    print(f"  export CONOCER_API_BASE={base}{API_PREFIX.rstrip('/')}")
+    print(f"  export CONOCER_SPA_URL={base}{SPA_PREFIX}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print("\nRequests:")
+        for name, n in sorted(server.stats.items()):
+            print(f"  {name}: {n:,}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Readiness-driven waits for the Playwright extractors.
+
+Instead of fixed wait_for_timeout sleeps sized for the slowest page, each
+step waits on a concrete signal: a selector being populated, the matching
+backend response completing, or Angular reporting itself stable. Every
+step's latency is recorded so slow phases show up in the logs.
+"""
+
+import time
+from contextlib import asynccontextmanager
+
+# True once every Angular app on the page has no pending macrotasks/XHRs.
+# Pages without Angular testability hooks count as stable.
+ANGULAR_STABLE_SCRIPT = """
+() => {
+    const getAll = window.getAllAngularTestabilities;
+    if (typeof getAll !== 'function') return true;
+    const testabilities = getAll();
+    return !testabilities.length || testabilities.every(t => t.isStable());
+}
+"""
+
+# The detail view is up when its title names the EC and its grids rendered
+DETAIL_READY_SCRIPT = """
+(code) => {
+    const title = document.querySelector('p');
+    if (!title || !title.textContent.includes(code)) return false;
+    return document.querySelectorAll('[role="grid"], mat-table, table').length > 0;
+}
+"""
+
+ANGULAR_TIMEOUT = 10000
+RESPONSE_TIMEOUT = 15000
+DETAIL_TIMEOUT = 15000
+
+
+class StepTimer:
+    """Records how long each named step of one EC took, in milliseconds."""
+
+    def __init__(self):
+        self.steps = {}
+
+    @asynccontextmanager
+    async def step(self, name: str):
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.steps[name] = round((time.monotonic() - start) * 1000)
+
+
+class LatencyStats:
+    """Running per-step averages across ECs, for checkpoint log lines."""
+
+    def __init__(self):
+        self._totals = {}
+        self._counts = {}
+
+    def add(self, steps: dict):
+        for name, ms in steps.items():
+            self._totals[name] = self._totals.get(name, 0) + ms
+            self._counts[name] = self._counts.get(name, 0) + 1
+
+    def summary(self) -> str:
+        return " | ".join(
+            f"{name} {self._totals[name] / self._counts[name]:.0f}ms"
+            for name in self._totals
+        )
+
+
+async def _wait_function(page, script: str, arg=None, timeout: int = 0) -> bool:
+    """wait_for_function that reports a timeout instead of raising."""
+    try:
+        await page.wait_for_function(script, arg=arg, timeout=timeout, polling=100)
+        return True
+    except Exception:
+        return False
+
+
+async def wait_for_angular_stable(page, timeout: int = ANGULAR_TIMEOUT) -> bool:
+    return await _wait_function(page, ANGULAR_STABLE_SCRIPT, timeout=timeout)
+
+
+async def wait_for_detail(page, ec_code: str, timeout: int = DETAIL_TIMEOUT) -> bool:
+    """Wait for an EC's detail view to render, then for Angular to settle."""
+    ready = await _wait_function(page, DETAIL_READY_SCRIPT, ec_code, timeout)
+    await wait_for_angular_stable(page)
+    return ready
+
+
+async def click_and_wait_for_response(
+    page, locator, endpoint: str, timeout: int = RESPONSE_TIMEOUT
+):
+    """Click and wait for the backend call it triggers.
+
+    Returns the response, or None if the click worked but no matching
+    response arrived in time. Click failures still raise.
+    """
+    clicked = False
+    try:
+        async with page.expect_response(
+            lambda r: endpoint in r.url, timeout=timeout
+        ) as response_info:
+            await locator.click(timeout=10000)
+            clicked = True
+        response = await response_info.value
+        await response.finished()
+        return response
+    except Exception:
+        if not clicked:
+            raise
+        return None
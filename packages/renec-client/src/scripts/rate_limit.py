@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+Rate limiting primitives shared by the CONOCER extractors.
+"""
+
+import asyncio
+import http.client
+import threading
+import time
+
+
+class TokenBucket:
+    """Global token-bucket limiter for asyncio tasks.
+
+    Allows `rate` acquisitions per second on average, with bursts of at most
+    `capacity` tokens. The default capacity of 1 spaces requests evenly, which
+    matches the politeness of the old fixed-sleep loops.
+    """
+
+    def __init__(self, rate: float, capacity: float = 1.0):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = rate
+        self.capacity = max(1.0, capacity)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(
+            self.capacity, self._tokens + (now - self._updated) * self.rate
+        )
+        self._updated = now
+
+    async def acquire(self):
+        """Wait until a token is available and consume it."""
+        async with self._lock:
+            self._refill()
+            while self._tokens < 1:
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+                self._refill()
+            self._tokens -= 1
+
+
+# -- adaptive limiting -------------------------------------------------------
+
+TRANSIENT_STATUSES = frozenset({429, 500, 502, 503, 504})
+SLOW_LATENCY = 5.0  # Seconds; slower responses count as congestion
+DECREASE_EVERY = 1.0  # At most one multiplicative decrease per this many seconds
+BACKOFF_BASE = 1.0  # Seconds of pause after the first overload response
+MAX_BACKOFF = 60.0
+BREAKER_THRESHOLD = 8  # Consecutive overloads that open the circuit
+BREAKER_COOLDOWN = 30.0  # First pause when the circuit opens; doubles per reopen
+MAX_COOLDOWN = 600.0
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half-open"
+
+
+class TransientError(Exception):
+    """The server was overloaded or unreachable; the request should be retried.
+
+    Raised by AdaptiveLimiter.call so callers never mistake a throttled or
+    failed request for a missing record.
+    """
+
+
+def retry_after(exc: Exception) -> float | None:
+    """Seconds from a Retry-After header on an HTTPError, if present."""
+    headers = getattr(exc, "headers", None) or {}
+    value = headers.get("retry-after")
+    try:
+        return max(0.0, float(value)) if value is not None else None
+    except ValueError:
+        return None
+
+
+class AdaptiveLimiter:
+    """AIMD concurrency limiter with backoff and a circuit breaker.
+
+    Thread-safe; blocking callers (thread pools, executor threads) go through
+    call(). The concurrency window grows by about one slot per window of
+    healthy responses and halves on an overload: a transient HTTP status,
+    a timeout/connection error, or a response slower than `slow_latency`.
+    Each overload also pauses new requests with exponential backoff (or the
+    server's Retry-After). After `breaker_threshold` consecutive overloads
+    the circuit opens and the whole run waits out a cooldown, then sends a
+    single probe request before resuming.
+    """
+
+    def __init__(
+        self,
+        initial: int = 2,
+        minimum: int = 1,
+        maximum: int = 8,
+        slow_latency: float = SLOW_LATENCY,
+        transient_statuses=TRANSIENT_STATUSES,
+        breaker_threshold: int = BREAKER_THRESHOLD,
+        breaker_cooldown: float = BREAKER_COOLDOWN,
+    ):
+        self.minimum = minimum
+        self.maximum = maximum
+        self.limit = float(max(minimum, min(initial, maximum)))
+        self.slow_latency = slow_latency
+        self.transient_statuses = frozenset(transient_statuses)
+        self.breaker_threshold = breaker_threshold
+        self.breaker_cooldown = breaker_cooldown
+        self.state = CLOSED
+        self.in_flight = 0
+        self.consecutive_failures = 0
+        self.stats = {"ok": 0, "overloaded": 0, "circuit_opened": 0}
+        self._cooldown = breaker_cooldown
+        self._resume_at = 0.0
+        self._last_decrease = 0.0
+        self._probing = False
+        self._cond = threading.Condition()
+
+    def is_transient(self, exc: Exception) -> bool:
+        code = getattr(exc, "code", None)
+        if isinstance(code, int):
+            return code in self.transient_statuses
+        return isinstance(
+            exc, (TimeoutError, ConnectionError, http.client.HTTPException)
+        )
+
+    def acquire(self):
+        """Block until a slot is free and no backoff/circuit pause applies."""
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                if now < self._resume_at:
+                    self._cond.wait(self._resume_at - now)
+                    continue
+                if self.state == OPEN:
+                    self.state = HALF_OPEN
+                    print("   ↻ Circuit half-open: sending one probe", flush=True)
+                if self.state == HALF_OPEN:
+                    if self._probing or self.in_flight:
+                        self._cond.wait()
+                        continue
+                    self._probing = True
+                    break
+                if self.in_flight < int(self.limit):
+                    break
+                self._cond.wait()
+            self.in_flight += 1
+
+    def release(self, ok: bool, latency: float = 0.0, pause: float | None = None):
+        """Report a request's outcome; `pause` overrides the backoff delay."""
+        with self._cond:
+            self.in_flight -= 1
+            self._probing = False
+            now = time.monotonic()
+            if ok:
+                self.stats["ok"] += 1
+                self.consecutive_failures = 0
+                if self.state == HALF_OPEN:
+                    self.state = CLOSED
+                    self._cooldown = self.breaker_cooldown
+                    print("   ✓ Circuit closed: server healthy again", flush=True)
+                if latency > self.slow_latency:
+                    self._decrease(now)
+                else:
+                    self.limit = min(self.maximum, self.limit + 1 / self.limit)
+            else:
+                self.stats["overloaded"] += 1
+                self.consecutive_failures += 1
+                self._decrease(now)
+                delay = pause
+                if delay is None:
+                    delay = min(
+                        MAX_BACKOFF,
+                        BACKOFF_BASE * 2 ** (self.consecutive_failures - 1),
+                    )
+                # Requests already in flight when the circuit opened don't
+                # reopen it (and don't double the cooldown again)
+                if self.state == HALF_OPEN or (
+                    self.state == CLOSED
+                    and self.consecutive_failures >= self.breaker_threshold
+                ):
+                    delay = max(delay, self._cooldown)
+                    self.state = OPEN
+                    self.stats["circuit_opened"] += 1
+                    print(
+                        f"   ⚠️  Circuit open after {self.consecutive_failures} "
+                        f"consecutive failures: pausing {delay:.0f}s",
+                        flush=True,
+                    )
+                    self._cooldown = min(MAX_COOLDOWN, self._cooldown * 2)
+                self._resume_at = max(self._resume_at, now + delay)
+            self._cond.notify_all()
+
+    def _decrease(self, now: float):
+        # One halving per congestion event, not one per failed in-flight request
+        if now - self._last_decrease >= DECREASE_EVERY:
+            self.limit = max(self.minimum, self.limit / 2)
+            self._last_decrease = now
+
+    def call(self, fn, *args, **kwargs):
+        """Run fn under the limiter; overloads are re-raised as TransientError."""
+        self.acquire()
+        start = time.monotonic()
+        try:
+            result = fn(*args, **kwargs)
+        except Exception as e:
+            latency = time.monotonic() - start
+            if self.is_transient(e):
+                self.release(False, latency, retry_after(e))
+                raise TransientError(f"{type(e).__name__}: {e}") from e
+            # Any other error is still an answer from a responsive server
+            self.release(True, latency)
+            raise
+        self.release(True, time.monotonic() - start)
+        return result
@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+Per-record freshness state for incremental refreshes.
+
+Every committee and EC detail that is fetched gets an entry in
+refresh_state.json with a content hash, the ETag/Last-Modified validators
+the backend returned (if any) and when it was last fetched/changed. Refresh
+runs use it to:
+
+  - send If-None-Match / If-Modified-Since, so an unchanged record can come
+    back as an empty 304;
+  - re-fetch the stalest records first (optionally only the N stalest);
+  - tell changed records from unchanged ones, so unchanged data isn't
+    rewritten;
+  - append one line per run to refresh_changes.jsonl listing the
+    added/changed/removed committees and ECs.
+"""
+
+import hashlib
+import json
+import threading
+from datetime import datetime
+from pathlib import Path
+
+from checkpoint_journal import write_json_atomic
+
+STATE_VERSION = 1
+NOT_MODIFIED = 304
+NOT_FOUND_STATUSES = (404, 409)  # The record is gone upstream
+
+COMMITTEE = "committee"
+EC = "ec"
+
+# Fields that change on every fetch without the record itself changing
+VOLATILE_FIELDS = ("extraction_time",)
+
+
+def content_hash(record) -> str:
+    """Hash of a record, ignoring volatile top-level fields."""
+    if isinstance(record, dict):
+        record = {k: v for k, v in record.items() if k not in VOLATILE_FIELDS}
+    payload = json.dumps(record, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+def state_path(output_dir: Path) -> Path:
+    return Path(output_dir) / "refresh_state.json"
+
+
+def changes_path(output_dir: Path) -> Path:
+    return Path(output_dir) / "refresh_changes.jsonl"
+
+
+class RefreshState:
+    """Content hashes, validators and fetch times per record, plus what each
+    record fetched during this run turned out to be."""
+
+    def __init__(self, output_dir: Path):
+        self.path = state_path(output_dir)
+        self.changes_file = changes_path(output_dir)
+        self.kinds = {COMMITTEE: {}, EC: {}}
+        # kind -> {key: "added" | "changed" | "unchanged" | "removed"}
+        self.outcomes = {kind: {} for kind in self.kinds}
+        self._lock = threading.Lock()
+        if self.path.exists():
+            with open(self.path, "r", encoding="utf-8") as f:
+                saved = json.load(f)
+            if saved.get("version") == STATE_VERSION:
+                self.kinds.update(saved["kinds"])
+
+    @staticmethod
+    def _key(key) -> str:
+        return str(key)  # JSON object keys; committee IDs are ints
+
+    def seed(self, kind: str, records: dict, fetched_at: str = ""):
+        """Adopt already-harvested records the state doesn't know yet.
+
+        Seeded records count as fetched at `fetched_at` (default: never),
+        so the first refresh doesn't report the whole dataset as added.
+        """
+        with self._lock:
+            entries = self.kinds[kind]
+            for key, record in records.items():
+                if self._key(key) in entries:
+                    continue
+                entries[self._key(key)] = {
+                    "hash": content_hash(record),
+                    "etag": None,
+                    "last_modified": None,
+                    "fetched_at": fetched_at,
+                    "changed_at": fetched_at,
+                }
+
+    def known(self, kind: str) -> list:
+        """Keys of records that were live the last time they were fetched."""
+        return [k for k, e in self.kinds[kind].items() if not e.get("removed_at")]
+
+    def stalest(self, kind: str, keys, limit: int | None = None) -> list:
+        """`keys` ordered never-fetched first, then by oldest fetch."""
+        entries = self.kinds[kind]
+        ordered = sorted(
+            keys, key=lambda k: entries.get(self._key(k), {}).get("fetched_at", "")
+        )
+        return ordered[:limit] if limit is not None else ordered
+
+    def request_headers(self, kind: str, key) -> dict:
+        """Conditional request headers for the validators last seen for `key`."""
+        with self._lock:
+            entry = self.kinds[kind].get(self._key(key)) or {}
+        headers = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def observe(self, kind: str, key, record, headers: dict | None = None) -> str:
+        """Record a fetched record; returns "added", "changed" or "unchanged"."""
+        now = datetime.now().isoformat()
+        digest = content_hash(record)
+        headers = headers or {}
+        with self._lock:
+            entry = self.kinds[kind].get(self._key(key))
+            if entry is None or entry.get("removed_at"):
+                outcome = "added"
+            elif entry["hash"] != digest:
+                outcome = "changed"
+            else:
+                outcome = "unchanged"
+            self.kinds[kind][self._key(key)] = {
+                "hash": digest,
+                "etag": headers.get("etag"),
+                "last_modified": headers.get("last-modified"),
+                "fetched_at": now,
+                "changed_at": now if outcome != "unchanged" else entry["changed_at"],
+            }
+            self.outcomes[kind][key] = outcome
+        return outcome
+
+    def not_modified(self, kind: str, key):
+        """The backend answered 304: the stored record is still current."""
+        with self._lock:
+            entry = self.kinds[kind][self._key(key)]
+            entry["fetched_at"] = datetime.now().isoformat()
+            self.outcomes[kind][key] = "unchanged"
+
+    def remove(self, kind: str, key) -> bool:
+        """Mark a live record as gone; False if it wasn't known or live."""
+        with self._lock:
+            entry = self.kinds[kind].get(self._key(key))
+            if entry is None or entry.get("removed_at"):
+                return False
+            entry["removed_at"] = datetime.now().isoformat()
+            self.outcomes[kind][key] = "removed"
+        return True
+
+    def outcome(self, kind: str, key) -> str | None:
+        """What `key` turned out to be this run; None if it got no answer."""
+        return self.outcomes[kind].get(key)
+
+    def changes(self, kind: str) -> dict:
+        """{"added": [...], "changed": [...], "removed": [...], "unchanged": n}"""
+        changes = {"added": [], "changed": [], "removed": [], "unchanged": 0}
+        for key, outcome in sorted(self.outcomes[kind].items()):
+            if outcome == "unchanged":
+                changes["unchanged"] += 1
+            else:
+                changes[outcome].append(key)
+        return changes
+
+    def summary(self, kind: str) -> str:
+        c = self.changes(kind)
+        return (
+            f"{len(c['added'])} added, {len(c['changed'])} changed, "
+            f"{len(c['removed'])} removed, {c['unchanged']} unchanged"
+        )
+
+    def save(self, mode: str):
+        """Persist the state and append this run's changes to the change log."""
+        with self._lock:
+            payload = {"version": STATE_VERSION, "kinds": self.kinds}
+            write_json_atomic(self.path, payload)
+        entry = {"run_at": datetime.now().isoformat(), "mode": mode}
+        for kind, outcomes in self.outcomes.items():
+            if outcomes:
+                entry[kind] = self.changes(kind)
+        with open(self.changes_file, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
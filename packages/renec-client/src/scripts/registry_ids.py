@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Stable ECE/CCAP identifier allocation for the master registries.
+
+IDs are addressed by an entity's normalized name (its `normalized_key`)
+and persisted in registry_ids.json, so every build hands an existing entity
+the ID it had before and only brand-new entities get the next free number.
+Entities that drop out of a build keep their ID reserved and get it back if
+they reappear; numbers are never reused.
+
+Each build also records a content hash per entity and emits the set of
+added/changed/removed IDs, so downstream consumers (e.g.
+packages/db/scripts/transform-renec-data.ts) can upsert just the diff.
+"""
+
+import hashlib
+import json
+from datetime import datetime
+from pathlib import Path
+
+IDS_VERSION = 1
+
+# Registry kind -> (ID prefix, registry file used to seed a first mapping)
+KINDS = {
+    "ece": ("ECE", "master_ece_registry.json"),
+    "ccap": ("CCAP", "master_ccap_registry.json"),
+}
+
+
+def entity_hash(record: dict) -> str:
+    """Hash of everything in a registry record except its ID."""
+    payload = json.dumps(
+        {k: v for k, v in record.items() if k != "id"},
+        ensure_ascii=False,
+        sort_keys=True,
+    )
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+def _id_number(entity_id: str) -> int:
+    return int(entity_id.rsplit("-", 1)[-1])
+
+
+class IdAllocator:
+    """Persistent normalized_key -> ID mapping for ECEs and CCAPs."""
+
+    def __init__(self, path: Path | None = None):
+        """Load the mapping at `path`; path=None gives a throwaway allocator."""
+        self.path = Path(path) if path else None
+        self.kinds = {kind: {"next": 1, "ids": {}} for kind in KINDS}
+        if self.path is None:
+            return
+        if self.path.exists():
+            with open(self.path, "r", encoding="utf-8") as f:
+                saved = json.load(f)
+            if saved.get("version") == IDS_VERSION:
+                self.kinds.update(saved["kinds"])
+        else:
+            self._seed_from_registries()
+
+    def _seed_from_registries(self):
+        """Adopt the IDs already published in the registry files, if any."""
+        for kind, (_, filename) in KINDS.items():
+            registry_file = self.path.parent / filename
+            if not registry_file.exists():
+                continue
+            with open(registry_file, "r", encoding="utf-8") as f:
+                registry = json.load(f).get("registry", [])
+            mapping = self.kinds[kind]
+            for record in registry:
+                mapping["ids"][record["normalized_key"]] = {
+                    "id": record["id"],
+                    "hash": entity_hash(record),
+                    "active": True,
+                }
+            if registry:
+                mapping["next"] = max(_id_number(r["id"]) for r in registry) + 1
+
+    def save(self):
+        if self.path is None:
+            return
+        with open(self.path, "w", encoding="utf-8") as f:
+            json.dump(
+                {"version": IDS_VERSION, "kinds": self.kinds},
+                f,
+                ensure_ascii=False,
+                indent=2,
+            )
+
+    def lookup(self, kind: str, key: str) -> str | None:
+        entry = self.kinds[kind]["ids"].get(key)
+        return entry["id"] if entry else None
+
+    def assign(self, kind: str, registry: list) -> dict:
+        """Fill in `id` on every record (in place); returns the ID-level diff.
+
+        New keys are numbered in registry order, so a first build over an
+        empty mapping reproduces the old positional numbering.
+        """
+        prefix = KINDS[kind][0]
+        mapping = self.kinds[kind]
+        diff = {"added": [], "changed": [], "removed": [], "reactivated": []}
+        seen = set()
+
+        for record in registry:
+            key = record["normalized_key"]
+            content_hash = entity_hash(record)
+            entry = mapping["ids"].get(key)
+
+            if entry is None:
+                entry = {"id": f"{prefix}-{mapping['next']:05d}", "active": True}
+                mapping["next"] += 1
+                mapping["ids"][key] = entry
+                diff["added"].append(entry["id"])
+            elif not entry.get("active", True):
+                entry["active"] = True
+                diff["reactivated"].append(entry["id"])
+            elif entry.get("hash") != content_hash:
+                diff["changed"].append(entry["id"])
+
+            entry["hash"] = content_hash
+            record["id"] = entry["id"]
+            seen.add(key)
+
+        now = datetime.now().isoformat()
+        for key, entry in mapping["ids"].items():
+            if key not in seen and entry.get("active", True):
+                entry["active"] = False
+                entry["retired_at"] = now
+                diff["removed"].append(entry["id"])
+
+        return diff
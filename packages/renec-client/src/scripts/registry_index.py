@@ -0,0 +1,310 @@
+#!/usr/bin/env python3
+"""
+Token inverted index over the master registries, plus a query CLI/library.
+
+Finding a certifier by name used to mean scanning master_ece_registry.json,
+and listing an EC's certifiers meant loading all of ec_ece_matrix.json.
+build_index() turns both into one small SQLite file (registry_index.sqlite3)
+holding:
+
+  - certifier name tokens -> ECE IDs (canonical and alternate names)
+  - EC title tokens       -> EC codes
+  - EC <-> ECE adjacency, indexed both ways
+
+Tokens are accent-folded and stopword-free (entity_resolution.tokens), so
+"educacion" finds "Educación". Queries AND their tokens together; the last
+one also matches as a prefix unless --exact is given, which suits
+type-ahead. Every lookup is a few B-tree probes; nothing else is loaded.
+
+Usage:
+  python registry_index.py build                  # (Re)build from the registries
+  python registry_index.py ece conalep            # Certifiers by name
+  python registry_index.py ec "seguridad indus"   # ECs by title (or code prefix)
+  python registry_index.py certifiers EC0217.01   # ECEs that certify an EC
+  python registry_index.py ecs ECE-00001          # ECs a certifier covers
+"""
+
+import argparse
+import os
+import re
+import sqlite3
+import sys
+import time
+from pathlib import Path
+
+from entity_resolution import tokens
+from json_stream import iter_json
+
+OUTPUT_DIR = Path(__file__).parent.parent.parent / "data" / "extracted"
+INDEX_FILE = OUTPUT_DIR / "registry_index.sqlite3"
+ECE_REGISTRY_FILE = OUTPUT_DIR / "master_ece_registry.json"
+MATRIX_FILE = OUTPUT_DIR / "ec_ece_matrix.json"
+DEFAULT_LIMIT = 20
+
+# Token kinds
+ECE = "ece"
+EC = "ec"
+
+EC_CODE_RE = re.compile(r"^ec\d", re.I)
+PREFIX_END = "\U0010ffff"  # Sorts after every token sharing a prefix
+
+SCHEMA = """
+CREATE TABLE eces (
+    id TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    entity_type TEXT,
+    ec_count INTEGER NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE ecs (
+    code TEXT PRIMARY KEY,
+    title TEXT NOT NULL,
+    ece_count INTEGER NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE tokens (
+    kind TEXT NOT NULL,
+    token TEXT NOT NULL,
+    ref TEXT NOT NULL,
+    PRIMARY KEY (kind, token, ref)
+) WITHOUT ROWID;
+CREATE TABLE edges (
+    ec_code TEXT NOT NULL,
+    ece_id TEXT NOT NULL,
+    PRIMARY KEY (ec_code, ece_id)
+) WITHOUT ROWID;
+CREATE INDEX edges_by_ece ON edges (ece_id, ec_code);
+"""
+
+
+def _title(code: str, title: str) -> str:
+    """Matrix titles repeat the code ("EC0001-Prestación..."); drop it."""
+    prefix = f"{code}-"
+    return title[len(prefix) :].strip() if title.startswith(prefix) else title
+
+
+def build_index(
+    ece_file: Path = ECE_REGISTRY_FILE,
+    matrix_file: Path = MATRIX_FILE,
+    index_file: Path = INDEX_FILE,
+) -> dict:
+    """Write the index from the registries (streamed); returns row counts.
+
+    Built under a temporary name and renamed into place, so readers never
+    see a half-built index.
+    """
+    tmp = index_file.with_name(index_file.name + ".tmp")
+    tmp.unlink(missing_ok=True)
+    conn = sqlite3.connect(tmp)
+    conn.execute("PRAGMA journal_mode=OFF")
+    conn.execute("PRAGMA synchronous=OFF")
+    conn.executescript(SCHEMA)
+
+    for ece in iter_json(ece_file, "registry"):
+        conn.execute(
+            "INSERT INTO eces VALUES (?, ?, ?, ?)",
+            (
+                ece["id"],
+                ece["canonical_name"],
+                ece.get("entity_type"),
+                ece.get("ec_count", len(ece.get("ec_codes", []))),
+            ),
+        )
+        names = [ece["canonical_name"], *ece.get("alternate_names", [])]
+        conn.executemany(
+            "INSERT OR IGNORE INTO tokens VALUES (?, ?, ?)",
+            [(ECE, t, ece["id"]) for name in names for t in set(tokens(name))],
+        )
+
+    for code, info in iter_json(matrix_file, "matrix"):
+        title = _title(code, info.get("title") or "")
+        conn.execute(
+            "INSERT INTO ecs VALUES (?, ?, ?)",
+            (code, title, info.get("ece_count", len(info.get("ece_ids", [])))),
+        )
+        conn.executemany(
+            "INSERT OR IGNORE INTO tokens VALUES (?, ?, ?)",
+            [(EC, t, code) for t in set(tokens(title))],
+        )
+        conn.executemany(
+            "INSERT OR IGNORE INTO edges VALUES (?, ?)",
+            [(code, ece_id) for ece_id in info.get("ece_ids", [])],
+        )
+
+    counts = {
+        table: conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+        for table in ("eces", "ecs", "tokens", "edges")
+    }
+    conn.commit()
+    conn.execute("VACUUM")
+    conn.close()
+    os.replace(tmp, index_file)
+    return counts
+
+
+class RegistryIndex:
+    """Read-only queries against registry_index.sqlite3."""
+
+    def __init__(self, path: Path = INDEX_FILE):
+        if not Path(path).exists():
+            raise FileNotFoundError(
+                f"{path} not found; run: python registry_index.py build"
+            )
+        self.conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+        self.conn.row_factory = sqlite3.Row
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _refs(self, kind: str, token: str, prefix: bool) -> set[str]:
+        if prefix:
+            rows = self.conn.execute(
+                "SELECT DISTINCT ref FROM tokens"
+                " WHERE kind = ? AND token >= ? AND token < ?",
+                (kind, token, token + PREFIX_END),
+            )
+        else:
+            rows = self.conn.execute(
+                "SELECT ref FROM tokens WHERE kind = ? AND token = ?", (kind, token)
+            )
+        return {ref for ref, in rows}
+
+    def _match(self, kind: str, query: str, prefix: bool) -> set[str]:
+        """Refs containing every query token (the last one as a prefix)."""
+        terms = tokens(query)
+        if not terms:
+            return set()
+        refs = None
+        for i, term in enumerate(terms):
+            found = self._refs(kind, term, prefix and i == len(terms) - 1)
+            refs = found if refs is None else refs & found
+            if not refs:
+                return set()
+        return refs
+
+    def _rows(self, sql: str, keys, limit: int) -> list[dict]:
+        keys = list(keys)
+        if not keys:
+            return []
+        marks = ",".join("?" * len(keys))
+        rows = self.conn.execute(sql.format(marks=marks), [*keys, limit])
+        return [dict(row) for row in rows]
+
+    def search_eces(
+        self, query: str, prefix: bool = True, limit: int = DEFAULT_LIMIT
+    ) -> list[dict]:
+        """Certifiers whose names match `query`, most ECs first."""
+        return self._rows(
+            "SELECT * FROM eces WHERE id IN ({marks})"
+            " ORDER BY ec_count DESC, name LIMIT ?",
+            self._match(ECE, query, prefix),
+            limit,
+        )
+
+    def search_ecs(
+        self, query: str, prefix: bool = True, limit: int = DEFAULT_LIMIT
+    ) -> list[dict]:
+        """ECs whose titles match `query`; "EC02..." matches codes instead."""
+        query = query.strip()
+        if EC_CODE_RE.match(query):
+            code = query.upper()
+            rows = self.conn.execute(
+                "SELECT * FROM ecs WHERE code >= ? AND code < ? ORDER BY code LIMIT ?",
+                (code, code + PREFIX_END if prefix else code + "\0", limit),
+            )
+            return [dict(row) for row in rows]
+        return self._rows(
+            "SELECT * FROM ecs WHERE code IN ({marks}) ORDER BY code LIMIT ?",
+            self._match(EC, query, prefix),
+            limit,
+        )
+
+    def ece(self, ece_id: str) -> dict | None:
+        row = self.conn.execute("SELECT * FROM eces WHERE id = ?", (ece_id,)).fetchone()
+        return dict(row) if row else None
+
+    def ec(self, code: str) -> dict | None:
+        row = self.conn.execute("SELECT * FROM ecs WHERE code = ?", (code,)).fetchone()
+        return dict(row) if row else None
+
+    def certifiers_for(self, ec_code: str) -> list[dict]:
+        """ECEs that certify an EC, most ECs first."""
+        rows = self.conn.execute(
+            "SELECT eces.* FROM edges JOIN eces ON eces.id = edges.ece_id"
+            " WHERE edges.ec_code = ? ORDER BY eces.ec_count DESC, eces.name",
+            (ec_code,),
+        )
+        return [dict(row) for row in rows]
+
+    def ecs_for(self, ece_id: str) -> list[dict]:
+        """ECs a certifier covers, by code."""
+        rows = self.conn.execute(
+            "SELECT ecs.* FROM edges JOIN ecs ON ecs.code = edges.ec_code"
+            " WHERE edges.ece_id = ? ORDER BY ecs.code",
+            (ece_id,),
+        )
+        return [dict(row) for row in rows]
+
+
+def _print_eces(rows: list[dict]):
+    for row in rows:
+        print(f"  {row['id']}  {row['name']}  ({row['ec_count']} ECs)")
+
+
+def _print_ecs(rows: list[dict]):
+    for row in rows:
+        print(f"  {row['code']:<10} {row['title'][:70]}  ({row['ece_count']} ECEs)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Registry inverted index")
+    parser.add_argument(
+        "command", choices=("build", "ece", "ec", "certifiers", "ecs")
+    )
+    parser.add_argument("terms", nargs="*", help="query text, EC code or ECE ID")
+    parser.add_argument("--limit", type=int, default=DEFAULT_LIMIT)
+    parser.add_argument(
+        "--exact", action="store_true", help="no prefix match on the last token"
+    )
+    args = parser.parse_args()
+    query = " ".join(args.terms)
+
+    if args.command == "build":
+        start = time.perf_counter()
+        counts = build_index()
+        print(f"✅ Index built: {INDEX_FILE}")
+        for table, n in counts.items():
+            print(f"   {table}: {n:,}")
+        size = INDEX_FILE.stat().st_size
+        print(f"   {size / 1024:.0f} KB in {time.perf_counter() - start:.2f}s")
+        return
+    if not query:
+        parser.error(f"{args.command} needs a query")
+
+    with RegistryIndex() as index:
+        start = time.perf_counter()
+        if args.command == "ece":
+            rows = index.search_eces(query, not args.exact, args.limit)
+        elif args.command == "ec":
+            rows = index.search_ecs(query, not args.exact, args.limit)
+        elif args.command == "certifiers":
+            rows = index.certifiers_for(query.upper())
+        else:
+            rows = index.ecs_for(query.upper())
+        elapsed = (time.perf_counter() - start) * 1000
+
+        if args.command in ("ece", "certifiers"):
+            _print_eces(rows)
+        else:
+            _print_ecs(rows)
+    print(f"{len(rows)} results in {elapsed:.1f} ms")
+    if not rows:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
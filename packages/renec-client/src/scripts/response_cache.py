@@ -0,0 +1,323 @@
+#!/usr/bin/env python3
+"""
+On-disk cache of raw CONOCER API responses.
+
+fetch_committee and fetch_ec_detail_api used to throw the raw payload away
+after json.loads, so fixing a parse or normalization bug meant re-hitting
+conocer.gob.mx for everything. With the cache enabled, ConocerClient keeps
+every answer it gets (bodies gzip-compressed, stored once per distinct
+content) keyed by method + URL + request body, and serves repeats locally:
+
+  CONOCER_CACHE=1               # enable, stored under data/cache/responses
+  CONOCER_CACHE=/some/dir       # enable, stored elsewhere
+  CONOCER_CACHE_TTL=86400       # seconds an entry is served (default 7 days,
+                                # negative = forever, e.g. to replay a harvest)
+  CONOCER_CACHE_MAX_MB=512      # least recently used entries beyond this go
+
+Successful responses and definitive misses (404/409) are cached; overloads
+(429/5xx) never are, and a 2xx body that fails Response.json() is dropped.
+Refresh mode passes use_cache=False, and conditional requests bypass the
+cache too: both always go to the network and replace the cached copy.
+
+Usage:
+  python response_cache.py stats   # Entries, distinct bodies, size on disk
+  python response_cache.py evict   # Drop expired entries and enforce the size cap
+  python response_cache.py clear   # Remove everything
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import shutil
+import sqlite3
+import sys
+import threading
+import time
+from pathlib import Path
+
+CACHE_DIR = Path(__file__).parent.parent.parent / "data" / "cache" / "responses"
+DEFAULT_TTL = 7 * 24 * 3600  # Seconds
+DEFAULT_MAX_MB = 512
+CACHEABLE_MISSES = frozenset({404, 409})  # Definitive "no such record" answers
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    method TEXT NOT NULL,
+    url TEXT NOT NULL,
+    status INTEGER NOT NULL,
+    headers TEXT NOT NULL,
+    digest TEXT NOT NULL,
+    stored_at REAL NOT NULL,
+    used_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_digest ON entries (digest);
+CREATE INDEX IF NOT EXISTS entries_used_at ON entries (used_at);
+CREATE TABLE IF NOT EXISTS blobs (
+    digest TEXT PRIMARY KEY,
+    size INTEGER NOT NULL
+);
+"""
+
+
+def request_key(method: str, url: str, body: bytes | None) -> str:
+    """Cache key of a request: method, full URL and body."""
+    h = hashlib.sha256()
+    for part in (method.upper().encode(), url.encode("utf-8"), body or b""):
+        h.update(part)
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+class ResponseCache:
+    """Content-addressed response store with TTL and LRU size eviction."""
+
+    def __init__(
+        self,
+        path: Path = CACHE_DIR,
+        ttl: float = DEFAULT_TTL,
+        max_bytes: int = DEFAULT_MAX_MB << 20,
+    ):
+        self.path = Path(path)
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.path.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(
+            self.path / "index.sqlite3", check_same_thread=False
+        )
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        self._bytes = self._total_bytes()
+
+    def close(self):
+        with self._lock:
+            self.conn.commit()
+            self.conn.close()
+
+    @staticmethod
+    def cacheable(status: int) -> bool:
+        return 200 <= status < 300 or status in CACHEABLE_MISSES
+
+    def _blob_path(self, digest: str) -> Path:
+        return self.path / "blobs" / digest[:2] / f"{digest}.gz"
+
+    def _total_bytes(self) -> int:
+        row = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM blobs").fetchone()
+        return row[0]
+
+    def _fresh(self, stored_at: float, now: float) -> bool:
+        return self.ttl < 0 or now - stored_at <= self.ttl
+
+    # -- lookups ---------------------------------------------------------
+
+    def contains(self, method: str, url: str, body: bytes | None = None) -> bool:
+        """Whether a fresh entry exists (without touching it)."""
+        key = request_key(method, url, body)
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT stored_at FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+        return row is not None and self._fresh(row[0], time.time())
+
+    def get(self, method: str, url: str, body: bytes | None = None):
+        """(status, headers, body) of a fresh entry, or None."""
+        key = request_key(method, url, body)
+        now = time.time()
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT status, headers, digest, stored_at FROM entries WHERE key = ?",
+                (key,),
+            ).fetchone()
+            if row is None or not self._fresh(row[3], now):
+                return None
+            status, headers, digest, _ = row
+            try:
+                content = gzip.decompress(self._blob_path(digest).read_bytes())
+            except (OSError, EOFError):
+                # Blob lost or torn (e.g. deleted by hand): treat as a miss and
+                # forget the blob too, so the next put() writes it again
+                self.conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                self._forget_blob(digest)
+                self.conn.commit()
+                return None
+            self.conn.execute(
+                "UPDATE entries SET used_at = ? WHERE key = ?", (now, key)
+            )
+        return status, json.loads(headers), content
+
+    # -- writes ----------------------------------------------------------
+
+    def delete(self, method: str, url: str, body: bytes | None = None):
+        """Forget a request's entry (e.g. a 200 whose body does not parse)."""
+        key = request_key(method, url, body)
+        with self._lock:
+            self.conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+            self.conn.commit()
+
+    def put(
+        self,
+        method: str,
+        url: str,
+        body: bytes | None,
+        status: int,
+        headers: dict,
+        content: bytes,
+    ):
+        """Store a response (only if its status is cacheable)."""
+        if not self.cacheable(status):
+            return
+        key = request_key(method, url, body)
+        digest = hashlib.sha256(content).hexdigest()
+        now = time.time()
+        with self._lock:
+            known = self.conn.execute(
+                "SELECT 1 FROM blobs WHERE digest = ?", (digest,)
+            ).fetchone()
+            if not known:
+                blob = self._blob_path(digest)
+                blob.parent.mkdir(parents=True, exist_ok=True)
+                tmp = blob.with_name(blob.name + f".{threading.get_ident()}.tmp")
+                tmp.write_bytes(gzip.compress(content, compresslevel=6))
+                os.replace(tmp, blob)
+                size = blob.stat().st_size
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO blobs (digest, size) VALUES (?, ?)",
+                    (digest, size),
+                )
+                self._bytes += size
+            self.conn.execute(
+                """
+                INSERT OR REPLACE INTO entries
+                    (key, method, url, status, headers, digest, stored_at, used_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                (
+                    key,
+                    method.upper(),
+                    url,
+                    status,
+                    json.dumps(headers),
+                    digest,
+                    now,
+                    now,
+                ),
+            )
+            self.conn.commit()
+            if self._bytes > self.max_bytes:
+                self._evict(now)
+
+    # -- eviction --------------------------------------------------------
+
+    def evict(self) -> int:
+        """Drop expired entries, then LRU entries over the size cap."""
+        with self._lock:
+            return self._evict(time.time())
+
+    def _evict(self, now: float) -> int:
+        removed = 0
+        if self.ttl >= 0:
+            removed += self.conn.execute(
+                "DELETE FROM entries WHERE stored_at < ?", (now - self.ttl,)
+            ).rowcount
+        self._drop_orphans()
+        while self._bytes > self.max_bytes:
+            # Oldest-used tenth of the entries per pass
+            rows = self.conn.execute(
+                """
+                SELECT key FROM entries ORDER BY used_at
+                LIMIT MAX(1, (SELECT COUNT(*) FROM entries) / 10)
+                """
+            ).fetchall()
+            if not rows:
+                break
+            self.conn.executemany("DELETE FROM entries WHERE key = ?", rows)
+            removed += len(rows)
+            self._drop_orphans()
+        self.conn.commit()
+        return removed
+
+    def _forget_blob(self, digest: str):
+        row = self.conn.execute(
+            "SELECT size FROM blobs WHERE digest = ?", (digest,)
+        ).fetchone()
+        if row:
+            self._bytes -= row[0]
+            self.conn.execute("DELETE FROM blobs WHERE digest = ?", (digest,))
+        self._blob_path(digest).unlink(missing_ok=True)
+
+    def _drop_orphans(self):
+        """Delete blobs no entry points at any more."""
+        orphans = self.conn.execute(
+            """
+            SELECT digest, size FROM blobs
+            WHERE digest NOT IN (SELECT digest FROM entries)
+            """
+        ).fetchall()
+        for digest, size in orphans:
+            self._blob_path(digest).unlink(missing_ok=True)
+            self._bytes -= size
+        self.conn.executemany(
+            "DELETE FROM blobs WHERE digest = ?", [(d,) for d, _ in orphans]
+        )
+
+    def clear(self):
+        with self._lock:
+            self.conn.execute("DELETE FROM entries")
+            self.conn.execute("DELETE FROM blobs")
+            self.conn.commit()
+            shutil.rmtree(self.path / "blobs", ignore_errors=True)
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries, oldest = self.conn.execute(
+                "SELECT COUNT(*), MIN(stored_at) FROM entries"
+            ).fetchone()
+            blobs = self.conn.execute("SELECT COUNT(*) FROM blobs").fetchone()[0]
+        return {
+            "entries": entries,
+            "blobs": blobs,
+            "bytes": self._bytes,
+            "oldest_age_hours": (time.time() - oldest) / 3600 if oldest else None,
+        }
+
+
+def cache_from_env() -> ResponseCache | None:
+    """The cache configured by CONOCER_CACHE*, or None when disabled."""
+    setting = os.environ.get("CONOCER_CACHE", "").strip()
+    if setting.lower() in ("", "0", "false", "no", "off"):
+        return None
+    path = CACHE_DIR if setting.lower() in ("1", "true", "yes", "on") else setting
+    ttl = float(os.environ.get("CONOCER_CACHE_TTL", DEFAULT_TTL))
+    max_mb = float(os.environ.get("CONOCER_CACHE_MAX_MB", DEFAULT_MAX_MB))
+    return ResponseCache(path, ttl=ttl, max_bytes=int(max_mb * (1 << 20)))
+
+
+def main():
+    command = sys.argv[1] if len(sys.argv) > 1 else "stats"
+    cache = cache_from_env() or ResponseCache()
+
+    if command == "stats":
+        stats = cache.stats()
+        print(f"Response cache: {cache.path}")
+        print(f"   entries: {stats['entries']:,}")
+        print(f"   distinct bodies: {stats['blobs']:,}")
+        print(f"   size: {stats['bytes'] / (1 << 20):.1f} MB")
+        if stats["oldest_age_hours"] is not None:
+            print(f"   oldest entry: {stats['oldest_age_hours']:.1f} h")
+    elif command == "evict":
+        print(f"✅ Evicted {cache.evict():,} entries")
+    elif command == "clear":
+        cache.clear()
+        print(f"✅ Cleared {cache.path}")
+    else:
+        print(__doc__)
+        sys.exit(1)
+    cache.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Status sidecar published by the EC extractors.
+
+Each running extractor keeps a tiny JSON file next to its checkpoint
+(certifiers_checkpoint.status.json, ...) with its counts, measured rolling
+throughput, PID and a heartbeat. It is rewritten atomically at most every
+WRITE_INTERVAL seconds, so check_extraction_status.py can report progress,
+liveness and an ETA by reading a few hundred bytes instead of parsing the
+checkpoint or guessing with pgrep.
+"""
+
+import json
+import os
+import socket
+import time
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+
+from checkpoint_journal import write_json_atomic
+
+WRITE_INTERVAL = 5.0  # Seconds between sidecar rewrites
+RATE_WINDOW = 300.0  # Seconds of history behind the rolling rate
+STALE_AFTER = 120.0  # Heartbeat age after which a "running" run is presumed dead
+
+
+def status_path(checkpoint_file: Path) -> Path:
+    """Sidecar path for a checkpoint: <name>.status.json."""
+    checkpoint_file = Path(checkpoint_file)
+    return checkpoint_file.with_name(checkpoint_file.stem + ".status.json")
+
+
+class StatusWriter:
+    """Tracks one run's progress and publishes it to the sidecar."""
+
+    def __init__(
+        self,
+        checkpoint_file: Path,
+        extractor: str,
+        total: int,
+        processed: int = 0,
+        failed: int = 0,
+        remaining: int | None = None,
+        counts: dict | None = None,
+        interval: float = WRITE_INTERVAL,
+        window: float = RATE_WINDOW,
+    ):
+        self.path = status_path(checkpoint_file)
+        self.extractor = extractor
+        self.total = total
+        self.processed = processed
+        self.failed = failed
+        # Resumed runs retry earlier failures, so remaining isn't derivable
+        self.remaining = (
+            remaining if remaining is not None else max(total - processed - failed, 0)
+        )
+        # Extractor-specific running totals, e.g. certifier relationships
+        self.counts = dict(counts or {})
+        self.interval = interval
+        self.window = window
+        self.started_at = datetime.now().isoformat()
+        self._start = time.monotonic()
+        self._completions = deque()  # monotonic timestamps of recent results
+        self._last_write = None
+
+    def rate_per_min(self) -> float:
+        """Results per minute over the last `window` seconds of the run."""
+        now = time.monotonic()
+        while self._completions and now - self._completions[0] > self.window:
+            self._completions.popleft()
+        span = min(now - self._start, self.window)
+        return len(self._completions) / span * 60 if span > 0 else 0.0
+
+    def record(self, ok: bool, **counts: int):
+        """Count one result and publish if the write interval has passed."""
+        for name, n in counts.items():
+            self.counts[name] = self.counts.get(name, 0) + n
+        if ok:
+            self.processed += 1
+        else:
+            self.failed += 1
+        self.remaining = max(self.remaining - 1, 0)
+        self._completions.append(time.monotonic())
+        self.beat()
+
+    def beat(self, force: bool = False):
+        """Publish the current status (heartbeat), rate-limited."""
+        now = time.monotonic()
+        if (
+            not force
+            and self._last_write is not None
+            and now - self._last_write < self.interval
+        ):
+            return
+        self._last_write = now
+        self._write("running")
+
+    def finish(self):
+        self._write("finished")
+
+    def _write(self, state: str):
+        rate = self.rate_per_min()
+        write_json_atomic(
+            self.path,
+            {
+                "extractor": self.extractor,
+                "state": state,
+                "pid": os.getpid(),
+                "host": socket.gethostname(),
+                "started_at": self.started_at,
+                "heartbeat": datetime.now().isoformat(),
+                "heartbeat_ts": time.time(),
+                "total": self.total,
+                "processed": self.processed,
+                "failed": self.failed,
+                "remaining": self.remaining,
+                "counts": self.counts,
+                "rate_per_min": round(rate, 2),
+                "eta_minutes": round(self.remaining / rate, 1) if rate > 0 else None,
+            },
+            indent=2,
+        )
+
+
+def read_status(checkpoint_file: Path) -> dict | None:
+    """The sidecar for a checkpoint, or None if there is none (or it's torn)."""
+    path = status_path(checkpoint_file)
+    if not path.exists():
+        return None
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def is_running(status: dict) -> bool:
+    """Whether the run behind a sidecar still looks alive.
+
+    The heartbeat must be fresh; when the run is on this host its PID must
+    also still exist.
+    """
+    if status.get("state") != "running":
+        return False
+    if time.time() - status.get("heartbeat_ts", 0) > STALE_AFTER:
+        return False
+    if status.get("host") == socket.gethostname():
+        return _pid_alive(status["pid"])
+    return True
@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""
+Degree statistics for the registries and the report.
+
+Degrees holds one integer per entity (ECs per certifier, certifiers per
+EC, ECs per committee) in an array that is built and sorted once. Counts
+above a threshold, histograms and percentiles are then binary searches or
+interpolations over the sorted array, and top-K is one stable argsort, so
+adding metrics costs no further passes over the registries.
+
+Relationships turns the EC -> ECE matrix into parallel edge arrays and
+breaks coverage down by any EC grouping (productive sector, committee).
+
+NumPy is used when installed; otherwise the same results come from plain
+lists, bisect and sets.
+
+Usage:
+  python stats_engine.py    # Print the distributions of the current build
+"""
+
+import json
+from bisect import bisect_left, bisect_right
+from pathlib import Path
+
+try:
+    import numpy as np
+except ImportError:  # Pure-Python fallback, same results
+    np = None
+
+from json_stream import iter_json
+
+OUTPUT_DIR = Path(__file__).parent.parent.parent / "data" / "extracted"
+STANDARDS_FILE = OUTPUT_DIR / "ec_standards_api.json"
+PERCENTILES = (25, 50, 75, 90, 99)
+ECE_HISTOGRAM = (1, 2, 5, 10, 20, 50, 100)  # ECs per certifier
+EC_HISTOGRAM = (0, 1, 2, 5, 10, 20, 50)  # Certifiers per EC
+
+
+def _interpolate(ordered: list, p: float) -> float:
+    """Linear-interpolated percentile, as numpy.percentile computes it."""
+    pos = (len(ordered) - 1) * p / 100
+    lo = int(pos)
+    hi = min(lo + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (pos - lo)
+
+
+class Degrees:
+    """Integer values (one per labelled entity) with their summaries."""
+
+    def __init__(self, values, labels=()):
+        values = list(values)
+        self.labels = list(labels)
+        if np is not None:
+            self.values = np.asarray(values, dtype=np.int64)
+            self.sorted = np.sort(self.values)
+        else:
+            self.values = values
+            self.sorted = sorted(values)
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def _ranks(self, thresholds, side: str = "left") -> list[int]:
+        """Number of values below each threshold (or at/below, side="right")."""
+        if np is not None:
+            return np.searchsorted(self.sorted, thresholds, side).tolist()
+        find = bisect_left if side == "left" else bisect_right
+        return [find(self.sorted, t) for t in thresholds]
+
+    def total(self) -> int:
+        return int(self.values.sum()) if np is not None else sum(self.values)
+
+    def mean(self, digits: int = 2) -> float:
+        return round(self.total() / len(self), digits) if len(self) else 0
+
+    def max(self) -> int:
+        return int(self.sorted[-1]) if len(self) else 0
+
+    def exactly(self, n: int) -> int:
+        below, at_most = self._ranks([n])[0], self._ranks([n], "right")[0]
+        return at_most - below
+
+    def at_least(self, n: int) -> int:
+        return len(self) - self._ranks([n])[0]
+
+    def percentiles(self, ps=PERCENTILES) -> dict:
+        """{"p50": ...} for each percentile in `ps` (empty when no values)."""
+        if not len(self):
+            return {}
+        if np is not None:
+            values = np.percentile(self.sorted, ps).tolist()
+        else:
+            values = [_interpolate(self.sorted, p) for p in ps]
+        return {f"p{p}": round(v, 2) for p, v in zip(ps, values)}
+
+    def histogram(self, edges) -> list[dict]:
+        """Counts in [edges[i], edges[i+1]); the last bin is open-ended.
+
+        Values below edges[0] are not counted.
+        """
+        ranks = self._ranks(edges) + [len(self)]
+        bins = []
+        for i, lo in enumerate(edges):
+            if i + 1 == len(edges):
+                label = f"{lo}+"
+            elif edges[i + 1] == lo + 1:
+                label = str(lo)
+            else:
+                label = f"{lo}-{edges[i + 1] - 1}"
+            bins.append({"range": label, "count": ranks[i + 1] - ranks[i]})
+        return bins
+
+    def top(self, k: int) -> list[tuple[str, int]]:
+        """(label, value) of the k largest values; ties keep input order."""
+        if np is not None:
+            order = np.argsort(-self.values, kind="stable")[:k].tolist()
+        else:
+            order = sorted(range(len(self)), key=lambda i: -self.values[i])[:k]
+        return [(self.labels[i], int(self.values[i])) for i in order]
+
+
+class Relationships:
+    """EC -> ECE matrix as edge arrays, for degree and coverage statistics."""
+
+    def __init__(self, matrix: dict):
+        self.ec_codes = list(matrix)
+        ece_ids = sorted({e for info in matrix.values() for e in info["ece_ids"]})
+        ece_number = {ece_id: j for j, ece_id in enumerate(ece_ids)}
+        self.n_eces = len(ece_ids)
+        self.ec_degrees = Degrees(
+            (len(matrix[c]["ece_ids"]) for c in self.ec_codes), self.ec_codes
+        )
+        edge_ec = [
+            i for i, c in enumerate(self.ec_codes) for _ in matrix[c]["ece_ids"]
+        ]
+        edge_ece = [ece_number[e] for c in self.ec_codes for e in matrix[c]["ece_ids"]]
+        if np is not None:
+            self.edge_ec = np.asarray(edge_ec, dtype=np.int64)
+            self.edge_ece = np.asarray(edge_ece, dtype=np.int64)
+        else:
+            self.edge_ec, self.edge_ece = edge_ec, edge_ece
+
+    def breakdown(self, ec_groups: dict) -> list[dict]:
+        """Coverage per group of ECs ({ec_code: group}), most ECs first.
+
+        ECs missing from `ec_groups` are left out.
+        """
+        names = sorted(set(ec_groups.values()))
+        number = {name: g for g, name in enumerate(names)}
+        group_of = [number.get(ec_groups.get(c), -1) for c in self.ec_codes]
+        if np is not None:
+            ecs, covered, links, distinct = self._count_np(group_of, len(names))
+        else:
+            ecs, covered, links, distinct = self._count_py(group_of, len(names))
+
+        rows = [
+            {
+                "name": name,
+                "ecs": ecs[g],
+                "ecs_with_certifiers": covered[g],
+                "coverage_pct": round(100 * covered[g] / ecs[g], 1) if ecs[g] else 0,
+                "ec_ece_links": links[g],
+                "unique_certifiers": distinct[g],
+            }
+            for g, name in enumerate(names)
+        ]
+        rows.sort(key=lambda row: (-row["ecs"], row["name"]))
+        return rows
+
+    def _count_np(self, group_of: list[int], n_groups: int):
+        groups = np.asarray(group_of, dtype=np.int64)
+        degrees = self.ec_degrees.values
+        known = groups >= 0
+        ecs = np.bincount(groups[known], minlength=n_groups)
+        covered = np.bincount(groups[known & (degrees > 0)], minlength=n_groups)
+        links = np.bincount(groups[known], weights=degrees[known], minlength=n_groups)
+        # Distinct (group, ECE) pairs, encoded as one integer each
+        edge_groups = groups[self.edge_ec]
+        mask = edge_groups >= 0
+        width = max(self.n_eces, 1)
+        pairs = np.unique(edge_groups[mask] * width + self.edge_ece[mask])
+        distinct = np.bincount(pairs // width, minlength=n_groups)
+        return (
+            ecs.tolist(),
+            covered.tolist(),
+            links.astype(np.int64).tolist(),
+            distinct.tolist(),
+        )
+
+    def _count_py(self, group_of: list[int], n_groups: int):
+        ecs = [0] * n_groups
+        covered = [0] * n_groups
+        links = [0] * n_groups
+        members = [set() for _ in range(n_groups)]
+        for g, degree in zip(group_of, self.ec_degrees.values):
+            if g >= 0:
+                ecs[g] += 1
+                covered[g] += 1 if degree else 0
+                links[g] += degree
+        for i, j in zip(self.edge_ec, self.edge_ece):
+            if group_of[i] >= 0:
+                members[group_of[i]].add(j)
+        return ecs, covered, links, [len(m) for m in members]
+
+
+def ec_groups(standards) -> dict[str, dict[str, str]]:
+    """{"sector": {ec_code: sector}, "committee": {ec_code: committee}}."""
+    groups = {"sector": {}, "committee": {}}
+    for std in standards:
+        code = std.get("codigo") or std.get("clave")
+        if not code:
+            continue
+        if std.get("secProductivo"):
+            groups["sector"][code] = std["secProductivo"].strip()
+        if std.get("comite"):
+            groups["committee"][code] = std["comite"].strip()
+    return groups
+
+
+def load_ec_groups(path: Path = STANDARDS_FILE) -> dict[str, dict[str, str]]:
+    """ec_groups() of the standards catalog (empty groups if not extracted)."""
+    return ec_groups(iter_json(path) if path.exists() else ())
+
+
+def main():
+    stats_file = OUTPUT_DIR / "registry_stats.json"
+    with open(stats_file, "r", encoding="utf-8") as f:
+        stats = json.load(f)
+    print(f"Stats engine: {'numpy ' + np.__version__ if np else 'pure Python'}")
+    for key in ("ece_registry_stats", "ec_certifier_stats"):
+        print(f"\n{key}:")
+        print(json.dumps(stats.get(key, {}), indent=2, ensure_ascii=False))
+    for key in ("by_sector", "by_committee"):
+        rows = stats.get(key, [])
+        print(f"\n{key} ({len(rows)} groups, top 5):")
+        for row in rows[:5]:
+            print(
+                f"  {row['name'][:50]:<50} {row['ecs']:>4} ECs "
+                f"{row['coverage_pct']:>5}% covered, "
+                f"{row['unique_certifiers']} ECEs"
+            )
+
+
+if __name__ == "__main__":
+    main()